@@ -0,0 +1,166 @@
+"""
+Cost of a 2,000-posting board through scraper + orchestrator filter, with the
+per-posting work done for every posting (old loops) vs. only for postings
+that pass the early title check (BaseScraper.accept_title).
+
+    python benchmarks/bench_early_filter.py [--postings 2000] [--data-share 0.05] [--rounds 20]
+
+Greenhouse is fed a streamed boards-api payload and Workday a sequence of
+20-posting pages, both from an in-memory fake session.
+"""
+from __future__ import annotations
+import argparse, json, os, random, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("WD_MAX_PAGES", "1000")
+
+import django  # noqa: E402
+django.setup()
+
+from jobs.scraper import api  # noqa: E402
+from jobs.scraper.base import categorize_title  # noqa: E402
+from jobs.scraper.greenhouse import GreenhouseScraper, GH_FIELDS  # noqa: E402
+from jobs.scraper.jsonstream import iter_array_items, STREAM_CHUNK  # noqa: E402
+from jobs.scraper.workday import WorkdayScraper  # noqa: E402
+
+DATA = ["Data Scientist", "Senior Data Engineer", "Data Analyst II", "Machine Learning Engineer", "BI Analyst"]
+OTHER = ["Store Manager", "Software Engineer", "Sales Associate", "Pharmacist", "Account Executive",
+         "Registered Nurse", "Product Manager", "Warehouse Associate", "Financial Analyst", "Cashier"]
+CITIES = ["Seattle, WA", "Austin, TX", "New York, NY", "Toronto, Canada", "London, United Kingdom", "Remote - US"]
+
+
+def make_board(n: int, share: float, seed: int = 3):
+    rnd = random.Random(seed)
+    jobs = []
+    for i in range(n):
+        title = rnd.choice(DATA if rnd.random() < share else OTHER)
+        jobs.append({
+            "id": 4000000 + i, "internal_job_id": 3000000 + i, "requisition_id": f"R{i:05d}",
+            "title": title, "updated_at": "2026-10-01T12:00:00-04:00",
+            "absolute_url": f"https://boards.greenhouse.io/acme/jobs/{4000000 + i}",
+            "location": {"name": rnd.choice(CITIES)},
+            "metadata": [{"id": 1, "name": "Employment Type", "value": "Full-time", "value_type": "single_select"}],
+            "data_compliance": [{"type": "gdpr", "requires_consent": False, "retention_period": None}],
+            # what Workday calls them
+            "externalPath": f"/job/{rnd.choice(CITIES).split(',')[0]}/{title.replace(' ', '-')}_R{i:05d}",
+            "locationsText": rnd.choice(CITIES), "postedOn": "Posted 3 Days Ago",
+            "bulletFields": [f"R{i:05d}"],
+        })
+    return jobs
+
+
+class _Resp:
+    def __init__(self, body=None, data=None):
+        self.status_code, self._body, self._data = 200, body, data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, size):
+        for i in range(0, len(self._body), size):
+            yield self._body[i:i + size]
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.gh_body = json.dumps({"jobs": jobs, "meta": {"total": len(jobs)}}).encode()
+        self.headers = {}
+
+    def get(self, url, **kw):
+        return _Resp(body=self.gh_body)
+
+    def post(self, url, json=None, **kw):
+        off, lim = json["offset"], json["limit"]
+        page = [{k: j[k] for k in ("title", "externalPath", "locationsText", "postedOn", "bulletFields")}
+                for j in self.jobs[off:off + lim]]
+        return _Resp(data={"total": len(self.jobs), "jobPostings": page})
+
+
+class Co:
+    name = "Acme"
+    careers_url = "https://acme.wd5.myworkdayjobs.com/External"
+    data_query_url = None
+
+
+# ---- the per-posting loops as they were before the hook ----
+def legacy_greenhouse(session):
+    with session.get("x", stream=True) as r:
+        seen = set()
+        for j in iter_array_items(r.iter_content(STREAM_CHUNK), key="jobs", fields=GH_FIELDS):
+            title = (j.get("title") or "").strip()
+            url = (j.get("absolute_url") or j.get("url") or "").strip()
+            if not title or not url or url in seen:
+                continue
+            seen.add(url)
+            yield {"title": title, "apply_url": url, "source": "greenhouse-api", "snippet": None,
+                   "category": categorize_title(title)}
+
+
+def legacy_workday(session):
+    wd = WorkdayScraper()
+    seen, offset = set(), 0
+    while True:
+        postings = session.post("x", json={"limit": 20, "offset": offset}).json()["jobPostings"]
+        if not postings:
+            break
+        for p in postings:
+            title = (p.get("title") or "").strip()
+            loc = (p.get("locationsText") or "").strip()
+            if not wd._is_us(loc):
+                continue
+            url = wd._apply_url("acme.wd5.myworkdayjobs.com", "External", p.get("externalPath") or "")
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            yield {"title": title or "Data Role", "apply_url": url, "source": "workday-api", "snippet": loc}
+        offset += 20
+
+
+def run(label, scraper, make_hits, session, rounds):
+    built = kept = 0
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        hits = list(make_hits(session))
+        built = len(hits)
+        kept = len(list(api._kept(scraper, Co(), hits, set())))
+    dt = (time.perf_counter() - t0) / rounds
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} {dt * 1000:8.2f} ms/board  hit dicts built={built:5d}  kept={kept:4d}  peak={peak / 1024:8.0f} KiB")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--postings", type=int, default=2000)
+    ap.add_argument("--data-share", type=float, default=0.05)
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    session = FakeSession(make_board(args.postings, args.data_share))
+    gh, wd = GreenhouseScraper(), WorkdayScraper()
+    gh._board_token = lambda company, session=None: "acme"
+
+    a = run("greenhouse legacy", gh, legacy_greenhouse, session, args.rounds)
+    b = run("greenhouse early filter", gh, lambda s: gh.iter_hits(Co(), s), session, args.rounds)
+    print(f"  -> {a / b:.1f}x")
+    a = run("workday legacy", wd, legacy_workday, session, args.rounds)
+    b = run("workday early filter", wd, lambda s: wd.iter_hits(Co(), s), session, args.rounds)
+    print(f"  -> {a / b:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+CPU time of GenericScraper's page extraction: the old anchor regex +
+BeautifulSoup + state regexes vs. the single-pass jobs.scraper.htmlscan.
+
+    python benchmarks/bench_generic_extract.py [DIR_OF_SAVED_HTML] [--rounds N]
+
+Without a directory a synthetic corpus is used (anchor-list pages and
+script-rendered pages with large __NEXT_DATA__ blobs).
+"""
+from __future__ import annotations
+import argparse, json, os, re, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from jobs.scraper.htmlscan import scan_html  # noqa: E402
+from jobs.scraper.generic import JOB_URL_HINT, KEY_HINTS, _clean_text  # noqa: E402
+
+
+def legacy_extract(html: str):
+    anchors = []
+    for m in re.finditer(r'<a\s[^>]*href=["\'](.*?)["\'][^>]*>(.*?)</a>', html, re.I | re.S):
+        href, text = m.group(1), _clean_text(m.group(2))
+        if JOB_URL_HINT.search(href) or any(k in text.lower() for k in KEY_HINTS):
+            anchors.append((href, text))
+    if anchors:
+        return len(anchors)
+    soup = BeautifulSoup(html, "html.parser")
+    blobs = [(s.string or s.text or "") for s in soup.find_all("script", {"type": re.compile(r"^application/(ld\+)?json$", re.I)})]
+    for pat in (r'__NEXT_DATA__\s*=\s*(\{.*?\})', r'__NUXT__\s*=\s*(\{.*?\})',
+                r'__INITIAL_STATE__\s*=\s*(\{.*?\})', r'__APOLLO_STATE__\s*=\s*(\{.*?\})'):
+        blobs.extend(m.group(1) for m in re.finditer(pat, html, re.I | re.S))
+    return len(blobs)
+
+
+def single_pass_extract(html: str):
+    scan = scan_html(html)
+    anchors = []
+    for href, text in scan.anchors:
+        text = _clean_text(text)
+        if JOB_URL_HINT.search(href) or any(k in text.lower() for k in KEY_HINTS):
+            anchors.append((href, text))
+    if anchors:
+        return len(anchors)
+    return len(scan.json_scripts) + len(scan.state_blobs)
+
+
+def synthetic_corpus():
+    nav = "".join(f'<li><a href="/c/{i}" class="nav">Category {i}</a></li>' for i in range(300))
+    body = "<div>" + "<p>lorem ipsum dolor sit amet</p>" * 2000 + "</div>"
+    listing = "".join(f'<a href="/jobs/{i}">Senior Data Scientist {i}</a>' for i in range(200))
+    jobs = [{"title": f"Data Engineer {i}", "url": f"/job/{i}", "meta": {"x": list(range(20))}} for i in range(3000)]
+    state = json.dumps({"props": {"pageProps": {"jobs": jobs}}})
+    return {
+        "anchor-listing": f"<html><body><nav>{nav}</nav>{body}{listing}</body></html>",
+        "next-data": f'<html><body><nav>{nav}</nav>{body}<script>window.__NEXT_DATA__ = {state};</script></body></html>',
+        "ldjson": f'<html><body>{body}<script type="application/ld+json">{state}</script></body></html>',
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", nargs="?")
+    ap.add_argument("--rounds", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.corpus:
+        pages = {p.name: p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(args.corpus).glob("*.htm*"))}
+    else:
+        pages = synthetic_corpus()
+    if not pages:
+        sys.exit("no .html files in corpus")
+
+    total_old = total_new = 0.0
+    print(f"{'page':32} {'KB':>7} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+    for name, html in pages.items():
+        t0 = time.process_time()
+        for _ in range(args.rounds):
+            legacy_extract(html)
+        t1 = time.process_time()
+        for _ in range(args.rounds):
+            single_pass_extract(html)
+        t2 = time.process_time()
+        old = (t1 - t0) / args.rounds * 1000
+        new = (t2 - t1) / args.rounds * 1000
+        total_old += old; total_new += new
+        print(f"{name[:32]:32} {len(html) // 1024:>7} {old:>10.2f} {new:>10.2f} {old / max(new, 1e-9):>7.1f}x")
+    print(f"{'TOTAL':32} {'':>7} {total_old:>10.2f} {total_new:>10.2f} {total_old / max(total_new, 1e-9):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Startup cost of the scraper layer, as paid by `manage.py run_scrape_now --company X`
+(or a Celery worker importing jobs.tasks), measured in fresh interpreters.
+
+    python benchmarks/bench_import_time.py [--ats greenhouse] [--runs 7]
+
+"lazy"  : import jobs.scraper.api and build the candidate list for one company
+          (scraper modules load through jobs.scraper.registry on first use, and only
+          those whose registry URL hints match the company are imported).
+"eager" : the same, plus every registered scraper and bs4 imported up front,
+          which is what the old module-level imports in api.py did.
+Django setup is done before the clock starts in both cases.
+"""
+from __future__ import annotations
+import argparse, json, statistics, subprocess, sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+URLS = {
+    "greenhouse": "https://boards.greenhouse.io/acme",
+    "lever": "https://jobs.lever.co/acme",
+    "workday": "https://acme.wd5.myworkdayjobs.com/External",
+    "smartrecruiters": "https://careers.smartrecruiters.com/Acme",
+    "icims": "https://careers-acme.icims.com/jobs/search",
+}
+
+CHILD = r"""
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+import django; django.setup()
+before = set(sys.modules)
+t0 = time.perf_counter()
+from jobs.scraper import api, registry
+if {eager!r}:
+    registry.load_all()
+    import bs4
+from jobs.models import Company
+api._build_candidates(Company(name="X", careers_url={url!r}))
+dt = time.perf_counter() - t0
+new = set(sys.modules) - before
+print(json.dumps({{"ms": dt * 1000, "modules": len(new), "bs4": "bs4" in sys.modules}}))
+"""
+
+
+def run(eager: bool, url: str) -> dict:
+    code = CHILD.format(root=str(ROOT), eager=eager, url=url)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ats", default="greenhouse", choices=sorted(URLS))
+    ap.add_argument("--runs", type=int, default=7)
+    args = ap.parse_args()
+
+    print(f"company ATS: {args.ats}  runs: {args.runs}")
+    for label, eager in (("eager", True), ("lazy", False)):
+        res = [run(eager, URLS[args.ats]) for _ in range(args.runs)]
+        ms = statistics.median(r["ms"] for r in res)
+        print(f"{label:6} median {ms:7.1f} ms   new modules {res[0]['modules']:4}   bs4 loaded: {res[0]['bs4']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Query plans and latency of the hot JobHit queries on a 1M-row table, with
+the original single-column indexes (up to migration 0007) and with the
+query-shaped partial / composite indexes (0008_jobhit_query_indexes, as
+changed by 0010_jobhit_indexes_without_include).
+
+    python benchmarks/bench_latest_indexes.py [--rows 1000000] [--companies 2000] [--repeat 5]
+
+Runs on a throwaway SQLite file by default. With DATABASE_URL set it runs on
+that PostgreSQL database instead - it migrates it and fills jobs_jobhit, so
+point it at a scratch database and pass --scratch to confirm.
+"""
+from __future__ import annotations
+import argparse, os, random, statistics, sys, tempfile, time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+BEFORE = "0007_category_max_length"   # last migration with the single-column indexes
+
+CATEGORIES = ["Data Scientist", "Data Engineer", "Data Analyst", "Other"]
+TITLES = {
+    "Data Scientist": ["Data Scientist", "Senior Data Scientist", "Data Scientist II"],
+    "Data Engineer": ["Data Engineer", "Senior Data Engineer", "Staff Data Engineer"],
+    "Data Analyst": ["Data Analyst", "Business Intelligence Analyst", "Senior Data Analyst"],
+    "Other": ["Machine Learning Engineer", "Analytics Manager"],
+}
+
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--companies", type=int, default=2000)
+    ap.add_argument("--days", type=int, default=180, help="found_at spread (days back from now)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--scratch", action="store_true", help="allow filling the DATABASE_URL database")
+    return ap.parse_args()
+
+
+def setup(args):
+    from django.conf import settings
+
+    if os.getenv("DATABASE_URL"):
+        if not args.scratch:
+            sys.exit("DATABASE_URL is set: pass --scratch to fill that database with benchmark rows")
+        path = None
+    else:
+        fd, path = tempfile.mkstemp(prefix="bench_idx_", suffix=".sqlite3")
+        os.close(fd)
+        settings.DATABASES["default"]["NAME"] = path
+    import django
+    django.setup()
+    return path
+
+
+def load(args):
+    from django.core.management import call_command
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from jobs.models import Company, JobHit
+    from jobs.scraper.crosspost import posting_group
+
+    call_command("migrate", verbosity=0)
+    call_command("migrate", "jobs", BEFORE, verbosity=0)   # the old index set
+    JobHit.objects.all().delete()
+    Company.objects.all().delete()
+
+    Company.objects.bulk_create(
+        [Company(name=f"Company {i:05d}", careers_url=f"https://c{i}.example.com/careers") for i in range(args.companies)],
+        batch_size=1000,
+    )
+    cids = list(Company.objects.values_list("id", flat=True))
+
+    rnd = random.Random(7)
+    now = timezone.now()
+    span = args.days * 86400
+    table = connection.ops.quote_name(JobHit._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} (company_id, title, apply_url, canonical_key, posting_group, source, raw_snippet, "
+        f"is_active, category, first_seen_at, found_at, last_seen_at) "
+        f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    t0 = time.perf_counter()
+    batch = []
+    with connection.cursor() as cur:
+        for i in range(args.rows):
+            cid = rnd.choice(cids)
+            cat = rnd.choices(CATEGORIES, weights=(30, 30, 30, 10))[0]
+            title = rnd.choice(TITLES[cat])
+            age = rnd.random() * span
+            found = now - timedelta(seconds=age)
+            # postings are live ~3 weeks, then the sweep switches them off
+            active = age < 21 * 86400 and rnd.random() < 0.9
+            seen = now - timedelta(seconds=max(0.0, age - 21 * 86400)) if not active else now
+            url = f"https://c{cid}.example.com/jobs/{i}"
+            batch.append((
+                cid, title, url, url, posting_group(cid, title), "bench", None,
+                active, cat, found, found, seen,
+            ))
+            if len(batch) == 20000:
+                with transaction.atomic():
+                    cur.executemany(sql, batch)
+                batch.clear()
+        if batch:
+            with transaction.atomic():
+                cur.executemany(sql, batch)
+    print(f"loaded {args.rows:,} rows / {len(cids):,} companies in {time.perf_counter() - t0:.1f}s")
+    return cids
+
+
+def analyze():
+    from django.db import connection
+
+    with connection.cursor() as cur:
+        cur.execute("ANALYZE")
+
+
+def queries(cids):
+    from django.db.models import Q
+    from django.utils import timezone
+    from jobs.models import JobHit
+
+    now = timezone.now()
+    # what the latest view reads per row
+    view = ("title", "apply_url", "found_at", "category", "posting_group", "first_seen_at", "company", "company__name")
+    active = JobHit.objects.filter(is_active=True)
+    return [
+        ("latest 1d",
+         lambda: active.filter(found_at__gte=now - timedelta(days=1))
+         .select_related("company").only(*view).order_by("-found_at")),
+        ("latest 7d, category",
+         lambda: active.filter(found_at__gte=now - timedelta(days=7), category="Data Engineer")
+         .select_related("company").only(*view).order_by("-found_at")),
+        ("stored categories",   # cached by the view, read every CATEGORY_CACHE_SECONDS
+         lambda: active.order_by().values_list("category", flat=True).distinct()),
+        ("latest 30d, category",
+         lambda: active.filter(found_at__gte=now - timedelta(days=30), category="Data Analyst")
+         .select_related("company").only(*view).order_by("-found_at")),
+        ("latest 30d, first 200",
+         lambda: active.filter(found_at__gte=now - timedelta(days=30))
+         .select_related("company").only(*view).order_by("-found_at")[:200]),
+        ("sweep, one company",
+         lambda: JobHit.objects.filter(company_id=cids[len(cids) // 2], is_active=True)
+         .filter(Q(last_seen_at__lt=now - timedelta(hours=1)) | Q(last_seen_at__isnull=True))
+         .values_list("pk", flat=True)),
+        ("archive scan",
+         lambda: JobHit.objects.filter(is_active=False)
+         .filter(Q(last_seen_at__lt=now - timedelta(days=30)) |
+                 Q(last_seen_at__isnull=True, found_at__lt=now - timedelta(days=30)))
+         .order_by("pk").values_list("pk", flat=True)[:900]),
+    ]
+
+
+def run(label, cids, repeat):
+    from django.db import connection
+
+    print(f"\n===== {label} =====")
+    out = {}
+    for name, make in queries(cids):
+        qs = make()
+        # PostgreSQL: EXPLAIN ANALYZE, whose execution time leaves out the transfer
+        # and decoding of the rows that the medians below include
+        plan = qs.explain(analyze=True) if connection.vendor == "postgresql" else qs.explain()
+        # the ORM's SQL, executed and fetched raw: model instantiation is the same
+        # with either index set and would only blur the database's share
+        sql, params = qs.query.sql_with_params()
+        times, n = [], 0
+        with connection.cursor() as cur:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                cur.execute(sql, params)
+                n = len(cur.fetchall())
+                times.append(time.perf_counter() - t0)
+        out[name] = statistics.median(times)
+        print(f"\n-- {name}: {n:,} rows, median {out[name] * 1000:.1f} ms")
+        for line in plan.splitlines():
+            print(f"   {line}")
+    return out
+
+
+def main():
+    args = parse_args()
+    path = setup(args)
+    try:
+        from django.core.management import call_command
+        from django.db import connection
+
+        print(f"backend: {connection.vendor}")
+        cids = load(args)
+        analyze()
+        before = run("before: single-column found_at / category indexes", cids, args.repeat)
+
+        t0 = time.perf_counter()
+        call_command("migrate", "jobs", verbosity=0)
+        analyze()
+        print(f"\nmigrate to latest (index build) took {time.perf_counter() - t0:.1f}s")
+        after = run("after: partial / composite indexes", cids, args.repeat)
+
+        print("\n===== summary (median ms) =====")
+        print(f"{'query':<26}{'before':>10}{'after':>10}{'speedup':>10}")
+        for name in before:
+            b, a = before[name] * 1000, after[name] * 1000
+            print(f"{name:<26}{b:>10.1f}{a:>10.1f}{(b / a if a else 0):>9.1f}x")
+    finally:
+        if path:
+            for suffix in ("", "-wal", "-shm"):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+
+
+if __name__ == "__main__":
+    main()
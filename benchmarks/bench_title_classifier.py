@@ -0,0 +1,92 @@
+"""
+Title keep/classify throughput: the old whitelist substring scan +
+if-chain from jobs/scraper/api.py vs. the compiled jobs.scraper.titles matcher,
+with and without its LRU cache.
+
+    python benchmarks/bench_title_classifier.py [--titles 1000000] [--data-share 0.1]
+
+Titles are synthetic: mostly non-data roles (as on a real board) with a
+`--data-share` fraction of data titles, in mixed case.
+"""
+from __future__ import annotations
+import argparse, random, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from jobs.scraper.titles import TitleMatcher  # noqa: E402
+from jobs.scraper.keywords import TITLE_RULES  # noqa: E402
+
+LEGACY_WHITELIST = [
+    "data scientist", "applied scientist", "ml scientist", "machine learning scientist",
+    "machine learning analyst", "data engineer", "machine learning engineer", "ml engineer",
+    "data analyst", "data analytics", "business intelligence", "bi analyst",
+    "data scientist intern", "data science intern", "data analyst intern",
+]
+
+
+def legacy_classify(title: str):
+    t = (title or "").lower()
+    if not any(kw in t for kw in LEGACY_WHITELIST):
+        return None
+    if "intern" in t:
+        return "Data Analyst" if "analyst" in t else "Data Scientist"
+    if "machine learning analyst" in t:
+        return "Data Scientist"
+    if "data engineer" in t or "machine learning engineer" in t or "ml engineer" in t:
+        return "Data Engineer"
+    if "data scientist" in t or "applied scientist" in t or "ml scientist" in t or "machine learning scientist" in t:
+        return "Data Scientist"
+    if "data analyst" in t or "data analytics" in t or "business intelligence" in t or "bi analyst" in t:
+        return "Data Analyst"
+    return "Other"
+
+
+SENIORITY = ["", "Senior ", "Sr. ", "Lead ", "Staff ", "Principal ", "Associate "]
+SUFFIX = ["", " II", " III", " - Remote", ", Marketing", " (Contract)", " Intern", ", Supply Chain"]
+DATA_ROLES = ["Data Scientist", "Data Engineer", "Data Analyst", "Machine Learning Engineer",
+              "Applied Scientist", "ML Engineer", "Business Intelligence Analyst", "BI Analyst",
+              "Data Analytics Manager", "Machine Learning Analyst", "Data Science Intern"]
+OTHER_ROLES = ["Software Engineer", "Store Manager", "Sales Associate", "Product Manager",
+               "Registered Nurse", "Warehouse Associate", "Financial Analyst", "Account Executive",
+               "Cashier", "Customer Service Representative", "Mechanical Engineer", "Pharmacist",
+               "Research Scientist", "HR Business Partner", "Security Analyst", "Delivery Driver"]
+
+
+def make_titles(n: int, data_share: float, seed: int = 7):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        roles = DATA_ROLES if rnd.random() < data_share else OTHER_ROLES
+        out.append(rnd.choice(SENIORITY) + rnd.choice(roles) + rnd.choice(SUFFIX))
+    return out
+
+
+def bench(fn, titles):
+    t0 = time.perf_counter()
+    out = [fn(t) for t in titles]
+    return time.perf_counter() - t0, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--titles", type=int, default=1_000_000)
+    ap.add_argument("--data-share", type=float, default=0.1)
+    args = ap.parse_args()
+
+    titles = make_titles(args.titles, args.data_share)
+    t_old, old = bench(legacy_classify, titles)
+    t_raw, raw = bench(TitleMatcher(TITLE_RULES, cache_size=0).classify, titles)
+    cached = TitleMatcher(TITLE_RULES)
+    t_new, new = bench(cached.classify, titles)
+
+    diff = sum(1 for a, b in zip(old, new) if a != b) + sum(1 for a, b in zip(raw, new) if a != b)
+    kept = sum(1 for c in new if c)
+    print(f"titles={len(titles):,} distinct={len(set(titles)):,} kept={kept:,} disagreements={diff}")
+    print(f"legacy          {t_old:6.2f}s  {len(titles) / t_old:12,.0f} titles/s")
+    print(f"matcher         {t_raw:6.2f}s  {len(titles) / t_raw:12,.0f} titles/s  ({t_old / t_raw:.1f}x)")
+    print(f"matcher + LRU   {t_new:6.2f}s  {len(titles) / t_new:12,.0f} titles/s  ({t_old / t_new:.1f}x)  {cached.cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
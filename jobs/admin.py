@@ -1,6 +1,7 @@
 # jobs/admin.py
 from django.contrib import admin
-from .models import Company, JobHit
+from . import taxonomy
+from .models import Company, JobHit, JobHitArchive, TaxonomyTerm
 
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
@@ -18,3 +19,32 @@ class JobHitAdmin(admin.ModelAdmin):
     search_fields = ("company__name", "title", "apply_url")
     ordering = ("-found_at",)
 
+
+@admin.register(JobHitArchive)
+class JobHitArchiveAdmin(admin.ModelAdmin):
+    list_display = ("company", "title", "source", "last_seen_at", "archived_at")
+    list_filter = ("source", "archived_at")
+    search_fields = ("company__name", "title", "apply_url")
+    ordering = ("-archived_at",)
+
+
+@admin.register(TaxonomyTerm)
+class TaxonomyTermAdmin(admin.ModelAdmin):
+    list_display = ("phrase", "kind", "category", "priority", "is_active", "updated_at")
+    list_editable = ("category", "priority", "is_active")
+    list_filter = ("kind", "category", "is_active")
+    search_fields = ("phrase",)
+    ordering = ("kind", "priority", "id")
+
+    # this process reloads right away; scrapers and other workers on their next version check
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        taxonomy.refresh(force=True)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        taxonomy.refresh(force=True)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        taxonomy.refresh(force=True)
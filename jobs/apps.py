@@ -1,13 +1,23 @@
 from django.apps import AppConfig
 
 
+def _sqlite_pragmas(sender, connection, **kwargs):
+    # every new SQLite connection (one per thread): WAL + busy timeout take the
+    # edge off concurrent writers; other backends need nothing here
+    if connection.vendor != "sqlite":
+        return
+    try:
+        with connection.cursor() as cur:
+            cur.execute("PRAGMA journal_mode=WAL;")
+            cur.execute("PRAGMA busy_timeout=30000;")
+    except Exception:
+        pass
+
+
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
     def ready(self):
-        try:
-            with connection.cursor() as cur:
-                cur.execute("PRAGMA journal_mode=WAL;")
-                cur.execute("PRAGMA busy_timeout=30000;")
-        except Exception:
-            pass
\ No newline at end of file
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(_sqlite_pragmas, dispatch_uid="jobs_sqlite_pragmas")
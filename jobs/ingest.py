@@ -0,0 +1,216 @@
+# jobs/ingest.py
+from __future__ import annotations
+from typing import Dict, Iterable, List, Tuple
+import logging, os, random, time
+
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+# Bulk write path for PostgreSQL. A batch of hits is COPYed into a temporary
+# staging table and merged into JobHit with one INSERT ... ON CONFLICT
+# (company, canonical_key) DO UPDATE, instead of a lookup + INSERT/UPDATE per
+# hit. Experimental and opt-in (PG_BULK_INGEST=1): it is covered by
+# jobs.tests.MergeHitsTests, which only run against a PostgreSQL DATABASE_URL.
+# Everywhere else upsert_hit() writes one hit at a time.
+PG_BULK_INGEST = os.getenv("PG_BULK_INGEST", "0") == "1"
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "2000"))
+
+_STAGE = "jobhit_stage"
+_STAGE_COLUMNS = (
+    ("company_id", "bigint"),
+    ("title", "text"),
+    ("apply_url", "text"),
+    ("canonical_key", "text"),
+    ("posting_group", "text"),
+    ("source", "text"),
+    ("raw_snippet", "text"),
+    ("category", "text"),
+    ("found_at", "timestamptz"),
+)
+
+
+def bulk_enabled() -> bool:
+    return PG_BULK_INGEST and connection.vendor == "postgresql"
+
+
+log = logging.getLogger(__name__)
+
+_UPDATE_FIELDS = ["title", "source", "raw_snippet", "is_active", "category", "found_at",
+                  "canonical_key", "posting_group", "last_seen_at", "missed_runs"]
+
+
+def upsert_hit(company, h: Dict, run_started, max_tries: int = 6) -> bool:
+    """
+    Insert or update one hit of company, stamped as seen by the run that
+    started at run_started. A locked database (SQLite under concurrent
+    writers) is retried with exponential backoff and jitter; returns False
+    when the hit could not be written.
+    """
+    from jobs.models import JobHit
+    from jobs.scraper.canonical import canonical_key
+
+    delay = 0.15
+    now = timezone.now()
+    for _ in range(max_tries):
+        try:
+            with transaction.atomic():
+                key = h.get("canonical_key") or canonical_key(h.get("apply_url") or "")
+                # rows from before canonical keys existed are still found by their URL
+                rows = JobHit.objects.filter(company=company)
+                obj = (rows.filter(canonical_key=key).first()
+                       or rows.filter(apply_url=h.get("apply_url")).first())
+                if obj is None:
+                    JobHit.objects.create(
+                        company=company,
+                        apply_url=h.get("apply_url"),
+                        canonical_key=key,
+                        posting_group=h.get("posting_group"),
+                        title=h.get("title") or "Data Scientist",
+                        source=h.get("source") or "auto",
+                        raw_snippet=h.get("snippet"),
+                        is_active=True,
+                        category=h.get("category") or None,
+                        found_at=h.get("found_at") or now,
+                        first_seen_at=now,  # only on insert
+                        last_seen_at=run_started,
+                        missed_runs=0,
+                    )
+                else:
+                    # first_seen_at is kept, and apply_url stays the first URL seen
+                    obj.title = h.get("title") or obj.title
+                    obj.source = h.get("source") or obj.source
+                    obj.raw_snippet = h.get("snippet")
+                    obj.is_active = True
+                    if h.get("category"):
+                        obj.category = h["category"]
+                    obj.found_at = h.get("found_at") or now
+                    obj.canonical_key = key
+                    obj.posting_group = h.get("posting_group") or obj.posting_group
+                    obj.last_seen_at = run_started
+                    obj.missed_runs = 0
+                    obj.save(update_fields=_UPDATE_FIELDS)
+                return True
+        except OperationalError:
+            time.sleep(delay + random.uniform(0, delay))
+            delay = min(delay * 2, 2.0)
+        except Exception:
+            log.exception("upsert of %s for %s failed", h.get("apply_url"), getattr(company, "name", company))
+            return False
+    return False
+
+
+def _row(company_id: int, h: Dict, now) -> Tuple:
+    from jobs.scraper.canonical import canonical_key
+
+    url = h.get("apply_url") or ""
+    return (
+        company_id,
+        h.get("title") or "Data Scientist",
+        url,
+        h.get("canonical_key") or canonical_key(url),
+        h.get("posting_group"),
+        h.get("source") or "auto",
+        h.get("snippet"),
+        h.get("category") or None,
+        h.get("found_at") or now,
+    )
+
+
+def merge_hits(items: Iterable[Tuple[int, Dict]], run_started) -> Tuple[int, int]:
+    """
+    COPY (company_id, hit) pairs into the staging table and merge them into
+    JobHit. Returns (inserted, updated). Must run on PostgreSQL; the batch is
+    one transaction, so a failure leaves nothing of it behind.
+    """
+    from jobs.models import JobHit
+
+    now = timezone.now()
+    rows: List[Tuple] = [_row(cid, h, now) for cid, h in items]
+    if not rows:
+        return 0, 0
+
+    qn = connection.ops.quote_name
+    hit = qn(JobHit._meta.db_table)
+    cols = ", ".join(name for name, _ in _STAGE_COLUMNS)
+
+    with transaction.atomic(), connection.cursor() as cur:
+        # per-connection temp table; ON COMMIT DELETE ROWS empties it after each batch
+        cur.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {_STAGE} ("
+            + ", ".join(f"{name} {typ}" for name, typ in _STAGE_COLUMNS)
+            + ") ON COMMIT DELETE ROWS"
+        )
+        with cur.copy(f"COPY {_STAGE} ({cols}) FROM STDIN") as cp:
+            for r in rows:
+                cp.write_row(r)
+
+        # rows saved before canonical keys existed (or under an older rule) match
+        # by URL: hand them their key first, unless another row already holds it
+        cur.execute(
+            f"""
+            UPDATE {hit} AS j SET canonical_key = s.canonical_key
+            FROM {_STAGE} AS s
+            WHERE j.company_id = s.company_id AND j.apply_url = s.apply_url
+              AND j.canonical_key IS DISTINCT FROM s.canonical_key
+              AND NOT EXISTS (
+                  SELECT 1 FROM {hit} AS k
+                  WHERE k.company_id = s.company_id AND k.canonical_key = s.canonical_key
+              )
+            """
+        )
+
+        # the merge: DISTINCT ON keeps one staged row per posting (ON CONFLICT may
+        # touch a row only once per statement); first_seen_at only on insert, and
+        # apply_url stays the first URL seen. A staged row is only held back when
+        # it would insert a URL another row (with another key) still holds.
+        cur.execute(
+            f"""
+            INSERT INTO {hit} (
+                company_id, title, apply_url, canonical_key, posting_group, source, raw_snippet,
+                category, found_at, is_active, first_seen_at, last_seen_at, missed_runs
+            )
+            SELECT DISTINCT ON (company_id, canonical_key)
+                company_id, title, apply_url, canonical_key, posting_group, source, raw_snippet,
+                category, found_at, TRUE, %s, %s, 0
+            FROM {_STAGE} AS s
+            -- (company, apply_url) is unique too: an insert may not take a URL another key holds;
+            -- an update of the row that has the key leaves apply_url alone and always goes ahead
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {hit} AS k
+                WHERE k.company_id = s.company_id AND k.apply_url = s.apply_url
+                  AND k.canonical_key IS DISTINCT FROM s.canonical_key
+            ) OR EXISTS (
+                SELECT 1 FROM {hit} AS k
+                WHERE k.company_id = s.company_id AND k.canonical_key = s.canonical_key
+            )
+            ORDER BY company_id, canonical_key, found_at DESC
+            ON CONFLICT (company_id, canonical_key) DO UPDATE SET
+                title = EXCLUDED.title,
+                source = EXCLUDED.source,
+                raw_snippet = EXCLUDED.raw_snippet,
+                category = COALESCE(EXCLUDED.category, {hit}.category),
+                posting_group = COALESCE(EXCLUDED.posting_group, {hit}.posting_group),
+                found_at = EXCLUDED.found_at,
+                is_active = TRUE,
+                last_seen_at = EXCLUDED.last_seen_at,
+                missed_runs = 0
+            RETURNING (xmax = 0)
+            """,
+            [now, run_started],
+        )
+        flags = [r[0] for r in cur.fetchall()]
+
+        # the row still holding a staged URL under another key was seen by this
+        # run too: stamp it, or the end-of-run sweep would count it as missed
+        cur.execute(
+            f"""
+            UPDATE {hit} AS j SET last_seen_at = %s, is_active = TRUE, missed_runs = 0
+            FROM {_STAGE} AS s
+            WHERE j.company_id = s.company_id AND j.apply_url = s.apply_url
+              AND j.canonical_key IS DISTINCT FROM s.canonical_key
+            """,
+            [run_started],
+        )
+
+    inserted = sum(1 for f in flags if f)
+    return inserted, len(flags) - inserted
@@ -0,0 +1,98 @@
+# jobs/management/commands/canonicalize_jobs.py
+from __future__ import annotations
+from typing import Dict, List, Tuple
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs.models import JobHit
+from jobs.scraper.canonical import canonical_key
+from jobs.scraper.crosspost import posting_group
+
+WRITE_BATCH = 900
+
+
+class Command(BaseCommand):
+    help = ("Fill JobHit.canonical_key / posting_group and collapse stored rows "
+            "that are URL variants of one posting.")
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=5000, help="Rows per read/write batch")
+        parser.add_argument("--company", type=str, default=None, help="Substring match for company name")
+        parser.add_argument("--dry-run", action="store_true", default=False, help="Count changes, write nothing")
+
+    def handle(self, *args, **opts):
+        verbosity = int(opts.get("verbosity", 1))
+        chunk = max(1, int(opts["chunk"]))
+        dry = bool(opts.get("dry_run"))
+
+        qs = JobHit.objects.all()
+        if opts.get("company"):
+            qs = qs.filter(company__name__icontains=opts["company"].strip())
+        # oldest row first, so the survivor of each group keeps the earliest first_seen_at
+        qs = qs.order_by("pk").only(
+            "pk", "company_id", "apply_url", "canonical_key", "is_active",
+            "title", "source", "raw_snippet", "posting_group",
+        )
+
+        keep: Dict[Tuple[int, str], int] = {}      # (company, key) -> surviving pk
+        dirty: List[JobHit] = []                   # survivors whose stored key is missing/stale
+        revive: List[int] = []                     # survivors whose duplicate was still active
+        doomed: List[int] = []
+        regroup: List[JobHit] = []                 # survivors whose cross-posting group is missing/stale
+        seen = 0
+        last_pk = None
+        t0 = time.perf_counter()
+        while True:
+            page = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            rows = list(page[:chunk].iterator(chunk_size=chunk))
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            seen += len(rows)
+
+            for r in rows:
+                key = canonical_key(r.apply_url)
+                group = (r.company_id, key)
+                if group in keep:
+                    doomed.append(r.pk)
+                    if r.is_active:
+                        revive.append(keep[group])
+                    continue
+                keep[group] = r.pk
+                if r.canonical_key != key:
+                    dirty.append(JobHit(pk=r.pk, canonical_key=key))
+                # the Workday snippet is the posting's location; other sources stored none
+                loc = r.raw_snippet if (r.source or "").startswith("workday") else ""
+                group_key = posting_group(r.company_id, r.title, loc or "")
+                if r.posting_group != group_key:
+                    regroup.append(JobHit(pk=r.pk, posting_group=group_key))
+
+            if verbosity >= 2:
+                dt = time.perf_counter() - t0
+                self.stdout.write(f"[CHUNK] up to pk={last_pk} rows={seen} merged={len(doomed)} ({seen / dt:,.0f} rows/s)")
+
+        if not dry:
+            # duplicates go first: a later duplicate may already hold the key the
+            # survivor is about to take, and (company, canonical_key) is unique
+            with transaction.atomic():
+                for i in range(0, len(doomed), WRITE_BATCH):
+                    JobHit.objects.filter(pk__in=doomed[i:i + WRITE_BATCH]).delete()
+                # clear stale keys before writing new ones so survivors can't collide with each other
+                pks = [o.pk for o in dirty]
+                for i in range(0, len(pks), WRITE_BATCH):
+                    JobHit.objects.filter(pk__in=pks[i:i + WRITE_BATCH]).update(canonical_key=None)
+                JobHit.objects.bulk_update(dirty, ["canonical_key"], batch_size=WRITE_BATCH)
+                JobHit.objects.bulk_update(regroup, ["posting_group"], batch_size=WRITE_BATCH)
+                for i in range(0, len(revive), WRITE_BATCH):
+                    JobHit.objects.filter(pk__in=revive[i:i + WRITE_BATCH]).update(is_active=True)
+
+        dt = time.perf_counter() - t0
+        rate = seen / dt if dt > 0 else 0.0
+        verb = "would" if dry else "did"
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. rows={seen} postings={len(keep)} {verb} merge={len(doomed)} rekey={len(dirty)} regroup={len(regroup)} "
+            f"in {dt:.1f}s ({rate:,.0f} rows/s)"
+        ))
@@ -0,0 +1,38 @@
+# jobs/management/commands/load_taxonomy.py
+from __future__ import annotations
+from django.core.management.base import BaseCommand
+
+from jobs import taxonomy
+from jobs.models import TaxonomyTerm
+from jobs.scraper.generic import KEY_HINTS
+from jobs.scraper.keywords import KEYWORDS, TITLE_RULES
+
+
+class Command(BaseCommand):
+    help = "Copy the built-in title rules / search terms / anchor hints into TaxonomyTerm for editing in the admin."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=[k for k, _ in TaxonomyTerm.KIND_CHOICES], default=None,
+                            help="Only this kind (default: all)")
+
+    def handle(self, *args, **opts):
+        builtin = {
+            TaxonomyTerm.KIND_TITLE: list(TITLE_RULES),
+            TaxonomyTerm.KIND_SEARCH: [(p, "") for p in KEYWORDS],
+            TaxonomyTerm.KIND_HINT: [(p, "") for p in KEY_HINTS],
+        }
+        kinds = [opts["kind"]] if opts.get("kind") else list(builtin)
+
+        created = 0
+        for kind in kinds:
+            # priorities keep the built-in order (and so title-rule precedence); existing rows are left alone
+            for i, (phrase, cat) in enumerate(builtin[kind]):
+                _, new = TaxonomyTerm.objects.get_or_create(
+                    kind=kind, phrase=phrase,
+                    defaults={"category": cat, "priority": (i + 1) * 10},
+                )
+                created += int(new)
+
+        taxonomy.refresh(force=True)
+        self.stdout.write(self.style.SUCCESS(f"Done. terms created={created}"))
@@ -0,0 +1,78 @@
+# jobs/management/commands/reclassify_jobs.py
+from __future__ import annotations
+from collections import defaultdict
+from typing import Dict, List
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from jobs import taxonomy
+from jobs.models import JobHit
+from jobs.scraper.titles import classify_titles
+
+UPDATE_BATCH = 900
+
+
+class Command(BaseCommand):
+    help = "Re-run title classification over stored JobHits (after the title rules changed)."
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=5000, help="Rows per read/classify/write batch")
+        parser.add_argument("--company", type=str, default=None, help="Substring match for company name")
+        parser.add_argument("--only-active", action="store_true", default=False)
+        parser.add_argument("--dry-run", action="store_true", default=False, help="Count changes, write nothing")
+
+    def handle(self, *args, **opts):
+        verbosity = int(opts.get("verbosity", 1))
+        chunk = max(1, int(opts["chunk"]))
+        dry = bool(opts.get("dry_run"))
+        taxonomy.refresh(force=True)
+
+        qs = JobHit.objects.all()
+        if opts.get("only_active"):
+            qs = qs.filter(is_active=True)
+        if opts.get("company"):
+            qs = qs.filter(company__name__icontains=opts["company"].strip())
+        # only what classification needs; keyset pagination on pk keeps every
+        # chunk query an index range scan and memory flat at one chunk
+        qs = qs.order_by("pk").only("pk", "title", "category")
+
+        seen = changed = 0
+        last_pk = None
+        t0 = time.perf_counter()
+        while True:
+            page = qs if last_pk is None else qs.filter(pk__gt=last_pk)
+            rows = list(page[:chunk].iterator(chunk_size=chunk))
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+            seen += len(rows)
+
+            # one batched classify call per chunk; unmatched titles become "Other"
+            cats = classify_titles([r.title for r in rows])
+            dirty: Dict[str, List[int]] = defaultdict(list)
+            for r, cat in zip(rows, cats):
+                cat = cat or "Other"
+                if r.category != cat:
+                    dirty[cat].append(r.pk)
+            changed += sum(len(v) for v in dirty.values())
+            if dirty and not dry:
+                # one UPDATE ... WHERE pk IN (...) per target category instead of
+                # bulk_update's per-row CASE; ids go in groups under SQLite's parameter cap
+                with transaction.atomic():
+                    for cat, pks in dirty.items():
+                        for i in range(0, len(pks), UPDATE_BATCH):
+                            JobHit.objects.filter(pk__in=pks[i:i + UPDATE_BATCH]).update(category=cat)
+
+            if verbosity >= 2:
+                dt = time.perf_counter() - t0
+                self.stdout.write(f"[CHUNK] up to pk={last_pk} rows={seen} changed={changed} ({seen / dt:,.0f} rows/s)")
+
+        dt = time.perf_counter() - t0
+        rate = seen / dt if dt > 0 else 0.0
+        verb = "would change" if dry else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. rows={seen} {verb}={changed} in {dt:.1f}s ({rate:,.0f} rows/s)"
+        ))
@@ -1,13 +1,17 @@
 # jobs/management/commands/run_scrape_now.py
 from concurrent.futures import ThreadPoolExecutor
-import traceback, time, random
+import queue, traceback
 
 from django.core.management.base import BaseCommand
-from django.db import transaction, OperationalError
 from django.utils import timezone
 
-from jobs.models import Company, JobHit
-from jobs.scraper.api import fetch_company_jobs, build_session
+from jobs.models import Company
+from jobs import ingest, retention, taxonomy
+from jobs.scraper.api import iter_company_jobs, build_session
+from jobs.scraper.coverage import Coverage
+from jobs.scraper import stats, titles
+
+_DONE = object()  # end-of-company marker on the hit queue
 
 
 class Command(BaseCommand):
@@ -19,6 +23,12 @@ class Command(BaseCommand):
         parser.add_argument("--parallel", type=int, default=8)
         parser.add_argument("--limit", type=int, default=5000)
         parser.add_argument("--company", type=str, default=None, help="Substring match for company name")
+        parser.add_argument("--cascade", choices=["all", "race"], default=None,
+                            help="all: merge every candidate scraper; race: stop at the first that finds jobs "
+                                 "(default: SCRAPE_CASCADE)")
+        parser.add_argument("--archive-days", type=int, default=retention.ARCHIVE_AFTER_DAYS,
+                            help="Move hits inactive and unseen this many days to the archive (0 = keep; "
+                                 "default: ARCHIVE_AFTER_DAYS)")
 
     def handle(self, *args, **opts):
         # -------- 安静输出封装：用 -v 0/1/2/3 控制 --------
@@ -41,6 +51,7 @@ class Command(BaseCommand):
         parallel = max(1, int(opts["parallel"]))
         limit = int(opts["limit"])
         name_filter = (opts.get("company") or "").strip()
+        cascade = opts.get("cascade")
 
         qs = Company.objects.all()
         if only_active:
@@ -53,83 +64,125 @@ class Command(BaseCommand):
         _info(f"[INFO] companies to scan: {len(companies)}, parallel={parallel}")
 
         session = build_session()
+        run_started = timezone.now()  # every hit saved by this run is stamped with it
+        stats.reset()
+        taxonomy.refresh(force=True)
 
         # 线程里只“抓”，不写库（避免并发写锁）
+        # hits are handed over one by one through a queue, so the main thread
+        # writes a company's first pages while its later pages are still loading
+        q: "queue.Queue" = queue.Queue()
+        coverage = {}  # company id -> Coverage, filled in before the company's end marker
+
         def work(c: Company):
+            err = None
+            cov = coverage[c.id] = Coverage()
             try:
-                hits = fetch_company_jobs(c, session=session) or []
-                return (c.id, hits, None)
+                for h in iter_company_jobs(c, session=session, cascade=cascade, coverage=cov):
+                    q.put((c.id, h, None))
             except Exception as e:
-                return (c.id, [], f"{c.name}: {e}\n{traceback.format_exc()}")
-
-        if parallel == 1:
-            results = [work(c) for c in companies]
-        else:
-            with ThreadPoolExecutor(max_workers=parallel) as ex:
-                results = list(ex.map(work, companies))
+                err = f"{c.name}: {e}\n{traceback.format_exc()}"
+            q.put((c.id, None, err or _DONE))
 
         id_to_company = {c.id: c for c in companies}
 
-        def upsert_with_retry(c: Company, h: dict, max_tries=6):
-            delay = 0.15
-            now = timezone.now()
-            for _ in range(max_tries):
-                try:
-                    with transaction.atomic():
-                        obj, created = JobHit.objects.get_or_create(
-                            company=c,
-                            apply_url=h.get("apply_url"),
-                            defaults={
-                                "title": h.get("title") or "Data Scientist",
-                                "source": h.get("source") or "auto",
-                                "raw_snippet": h.get("snippet"),
-                                "is_active": True,
-                                "category": h.get("category"),
-                                "found_at": h.get("found_at") or now,
-                                "first_seen_at": now,  # 仅在创建时写入
-                            },
-                        )
-                        if not created:
-                            # 更新但不覆盖 first_seen_at
-                            obj.title = h.get("title") or obj.title
-                            obj.source = h.get("source") or obj.source
-                            obj.raw_snippet = h.get("snippet")
-                            obj.is_active = True
-                            if h.get("category"):
-                                obj.category = h["category"]
-                            obj.found_at = h.get("found_at") or now
-                            obj.save(update_fields=["title", "source", "raw_snippet", "is_active", "category", "found_at"])
-                        return True
-                except OperationalError:
-                    time.sleep(delay + random.uniform(0, delay))  # 指数退避 + 抖动
-                    delay = min(delay * 2, 2.0)
-                except Exception:
-                    return False
-            return False
-
         ok = 0
         fetched = 0
         saved = 0
-        for cid, hits, err in results:
-            c = id_to_company.get(cid)
-            if err:
-                _warn(f"[WARN] {err}")
-            if c is None:
-                continue
-            ok += 1
-            fetched += len(hits)
-            for h in hits:
-                if upsert_with_retry(c, h):
-                    saved += 1
+        deactivated = 0
+        partial = 0  # companies whose scrape stopped short of the full listing
+        latest = {}  # company id -> newest found_at among its hits
+        saved_for = {}  # company id -> hits saved this run
+
+        # PostgreSQL: hits are buffered and merged INGEST_BATCH at a time (COPY into a
+        # staging table + one INSERT ... ON CONFLICT); SQLite keeps the per-hit upsert
+        bulk = ingest.bulk_enabled()
+        buffered = []  # (company id, hit) not merged yet
+        lost = set()   # company ids with a batch that failed to merge: no sweep for them
+        if bulk:
+            _info(f"[INFO] bulk ingest: COPY + merge, batch={ingest.INGEST_BATCH}")
+
+        def flush():
+            nonlocal saved
+            if not buffered:
+                return
+            batch = buffered[:]
+            buffered.clear()
+            try:
+                ins, upd = ingest.merge_hits(batch, run_started)
+            except Exception as e:
+                lost.update(cid for cid, _ in batch)
+                _warn(f"[WARN] bulk merge of {len(batch)} hits failed: {e}")
+                return
+            saved += ins + upd
+            for cid, _ in batch:
+                saved_for[cid] = saved_for.get(cid, 0) + 1
+
+        def finish(c: Company, failed: bool):
+            nonlocal deactivated, partial
+            if bulk:
+                flush()  # c's hits must be in the table before the sweep looks at it
+                failed = failed or c.id in lost
+            cov = coverage.get(c.id) or Coverage()
+            if not cov.complete:
+                partial += 1
+                if verbosity >= 2:
+                    _info(f"[INFO] {c.name}: partial scrape ({', '.join(cov.reasons)})")
+            # 下架本次没见到的职位：set-based UPDATEs per company. Skipped when the
+            # scrape failed, swallowed an error or came back empty - that is far more
+            # often a block or an outage than a company closing every opening at once.
+            # A partial scrape (caps, planned terms, a race) only applies the grace period.
+            if not failed and not cov.errors and saved_for.get(c.id):
+                try:
+                    deactivated += retention.deactivate_unseen(c, run_started, complete=cov.complete)
+                except Exception as e:
+                    _warn(f"[WARN] deactivate {c.name}: {e}")
 
             # 更新公司元数据
+            # (only called after c's worker finished, so its scrape_cache is settled)
             try:
                 c.last_checked_at = timezone.now()
-                if hits:
-                    ts = max([(h.get("found_at") or timezone.now()) for h in hits])
-                    c.last_found_at = ts
-                c.save(update_fields=["last_checked_at", "last_found_at"])
+                if c.id in latest:
+                    c.last_found_at = latest[c.id]
+                c.save(update_fields=["last_checked_at", "last_found_at", "scrape_cache"])
             except Exception:
                 pass
 
-        _done(f"Done. companies ok={ok}, hits fetched={fetched}, hits saved={saved}")
+        with ThreadPoolExecutor(max_workers=parallel) as ex:
+            for c in companies:
+                ex.submit(work, c)
+            pending = len(companies)
+            while pending:
+                cid, h, err = q.get()
+                c = id_to_company.get(cid)
+                if h is None:
+                    pending -= 1
+                    if err is not _DONE:
+                        _warn(f"[WARN] {err}")
+                    if c is not None:
+                        ok += 1
+                        finish(c, failed=err is not _DONE)
+                    continue
+                if c is None:
+                    continue
+                fetched += 1
+                ts = h.get("found_at") or timezone.now()
+                latest[cid] = max(latest.get(cid, ts), ts)
+                if bulk:
+                    buffered.append((cid, h))
+                    if len(buffered) >= ingest.INGEST_BATCH:
+                        flush()
+                    continue
+                if ingest.upsert_hit(c, h, run_started):
+                    saved += 1
+                    saved_for[cid] = saved_for.get(cid, 0) + 1
+
+        archived = retention.archive_unseen(days=int(opts["archive_days"]))
+
+        _done(f"Done. companies ok={ok} (partial={partial}), hits fetched={fetched}, hits saved={saved}, "
+              f"deactivated={deactivated}, archived={archived}")
+        run_stats = stats.format_stats()
+        if run_stats:
+            _info(f"[STATS] {run_stats}")
+        tc = titles.cache_stats()
+        _info(f"[TITLES] cache hits={tc['hits']} misses={tc['misses']} size={tc['size']} hit_rate={tc['hit_rate']:.1%}")
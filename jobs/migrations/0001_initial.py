@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('homepage_url', models.URLField(blank=True, null=True)),
+                ('careers_url', models.URLField(blank=True, null=True)),
+                ('ats', models.CharField(default='AUTO', max_length=40)),
+                ('is_active', models.BooleanField(db_index=True, default=True)),
+                ('ats_type', models.CharField(blank=True, db_index=True, max_length=32, null=True)),
+                ('ats_key', models.CharField(blank=True, max_length=128, null=True)),
+                ('last_checked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_found_at', models.DateTimeField(blank=True, null=True)),
+                ('data_query_url', models.URLField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobHit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=500)),
+                ('apply_url', models.URLField(max_length=1000)),
+                ('source', models.CharField(blank=True, max_length=100, null=True)),
+                ('raw_snippet', models.TextField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('category', models.CharField(blank=True, choices=[('DS', 'Data Scientist'), ('DA', 'Data Analyst'), ('DE', 'Data Engineer'), ('INTERN', 'Data Science Intern')], max_length=10, null=True)),
+                ('first_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('found_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hits', to='jobs.company')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['found_at'], name='jobs_jobhit_found_a_249483_idx'), models.Index(fields=['category'], name='jobs_jobhit_categor_1ee729_idx')],
+                'unique_together': {('company', 'apply_url')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='scrape_cache',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_company_scrape_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaxonomyTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('title', 'Title rule'), ('search', 'Search term'), ('hint', 'Generic anchor hint')], default='title', max_length=10)),
+                ('phrase', models.CharField(max_length=200)),
+                ('category', models.CharField(blank=True, choices=[('Data Scientist', 'Data Scientist'), ('Data Engineer', 'Data Engineer'), ('Data Analyst', 'Data Analyst')], default='', max_length=40)),
+                ('priority', models.IntegerField(default=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('kind', 'priority', 'id'),
+                'unique_together': {('kind', 'phrase')},
+            },
+        ),
+    ]
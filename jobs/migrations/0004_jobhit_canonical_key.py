@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_taxonomyterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobhit',
+            name='canonical_key',
+            field=models.CharField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='jobhit',
+            constraint=models.UniqueConstraint(fields=('company', 'canonical_key'), name='jobhit_company_canonical_key'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_jobhit_canonical_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobhit',
+            name='posting_group',
+            field=models.CharField(blank=True, db_index=True, max_length=16, null=True),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_jobhit_posting_group'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobhit',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='JobHitArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hit_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=500)),
+                ('apply_url', models.URLField(max_length=1000)),
+                ('canonical_key', models.CharField(blank=True, max_length=500, null=True)),
+                ('posting_group', models.CharField(blank=True, max_length=16, null=True)),
+                ('source', models.CharField(blank=True, max_length=100, null=True)),
+                ('raw_snippet', models.TextField(blank=True, null=True)),
+                ('category', models.CharField(blank=True, choices=[('DS', 'Data Scientist'), ('DA', 'Data Analyst'), ('DE', 'Data Engineer'), ('INTERN', 'Data Science Intern')], max_length=10, null=True)),
+                ('first_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('found_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_hits', to='jobs.company')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_jobhit_last_seen_at_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobhit',
+            name='category',
+            field=models.CharField(blank=True, choices=[('Data Scientist', 'Data Scientist'), ('Data Analyst', 'Data Analyst'), ('Data Engineer', 'Data Engineer'), ('Other', 'Other')], max_length=40, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jobhitarchive',
+            name='category',
+            field=models.CharField(blank=True, choices=[('Data Scientist', 'Data Scientist'), ('Data Analyst', 'Data Analyst'), ('Data Engineer', 'Data Engineer'), ('Other', 'Other')], max_length=40, null=True),
+        ),
+    ]
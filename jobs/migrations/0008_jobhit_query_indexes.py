@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_category_max_length'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobhit',
+            name='jobs_jobhit_found_a_249483_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobhit',
+            name='jobs_jobhit_categor_1ee729_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobhit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-found_at'], include=('company', 'category', 'first_seen_at', 'posting_group'), name='jobhit_active_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='jobhit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-found_at'], include=('company', 'first_seen_at', 'posting_group'), name='jobhit_active_cat_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='jobhit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['company', 'last_seen_at'], name='jobhit_active_company_seen'),
+        ),
+        migrations.AddIndex(
+            model_name='jobhit',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['last_seen_at'], name='jobhit_inactive_seen'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_jobhit_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobhit',
+            name='missed_runs',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_jobhit_missed_runs'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobhit',
+            name='jobhit_active_recent',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobhit',
+            name='jobhit_active_cat_recent',
+        ),
+        migrations.AddIndex(
+            model_name='jobhit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-found_at'], name='jobhit_active_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='jobhit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-found_at'], name='jobhit_active_cat_recent'),
+        ),
+    ]
@@ -24,43 +24,149 @@ class Company(models.Model):
     # Your validated search-result URL (after typing "data" and hitting Enter).
     data_query_url = models.URLField(blank=True, null=True)
 
+    # Per-company scraper state (resolved tenant/site ids, probe results ...),
+    # written by scrapers in memory and saved by the command after each run.
+    scrape_cache = models.JSONField(default=dict, blank=True)
+
     def __str__(self) -> str:
         return self.name
 
 
+# what jobs.scraper.titles.classify_title() stores (the old DS/DA/DE codes were never written,
+# and their max_length=10 only held on SQLite, which doesn't enforce it)
 CATEGORY_CHOICES = (
-    ("DS", "Data Scientist"),
-    ("DA", "Data Analyst"),
-    ("DE", "Data Engineer"),
-    ("INTERN", "Data Science Intern"),
+    ("Data Scientist", "Data Scientist"),
+    ("Data Analyst", "Data Analyst"),
+    ("Data Engineer", "Data Engineer"),
+    ("Other", "Other"),
 )
 
 
 class JobHit(models.Model):
     """
-    A single job hit we found for a company. We dedupe by (company, apply_url).
+    A single job hit we found for a company. We dedupe by (company, canonical_key),
+    so tracking params / locale prefixes / embed-vs-board URLs collapse into one row.
+    Cross-postings of one role stay separate rows but share `posting_group`.
     We also track `first_seen_at` to allow "newly found first" ordering in UI.
     """
     company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="hits")
     title = models.CharField(max_length=500)
     apply_url = models.URLField(max_length=1000)
+    # jobs.scraper.canonical.canonical_key(apply_url): URL variants of one posting share it
+    canonical_key = models.CharField(max_length=500, blank=True, null=True)
+    # jobs.scraper.crosspost.posting_group(): copies of one role (other city / requisition) share it
+    posting_group = models.CharField(max_length=16, blank=True, null=True, db_index=True)
     source = models.CharField(max_length=100, blank=True, null=True)
     raw_snippet = models.TextField(blank=True, null=True)  # optional preview
     is_active = models.BooleanField(default=True)
 
     # classification and timeline
-    category = models.CharField(max_length=10, choices=CATEGORY_CHOICES, blank=True, null=True)
+    category = models.CharField(max_length=40, choices=CATEGORY_CHOICES, blank=True, null=True)
     first_seen_at = models.DateTimeField(blank=True, null=True)
 
     # each scrape run updates found_at for "today" tally
     found_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # start time of the last run that saw this posting; runs that miss it deactivate it
+    last_seen_at = models.DateTimeField(blank=True, null=True)
+    # complete scrapes in a row that missed it (reset on every sighting); see jobs.retention
+    missed_runs = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         unique_together = (("company", "apply_url"),)
+        constraints = [
+            models.UniqueConstraint(fields=["company", "canonical_key"], name="jobhit_company_canonical_key"),
+        ]
+        # shaped after the hot queries (see benchmarks/bench_latest_indexes.py):
+        #  - latest view: is_active, found_at >= since [, category = x], ORDER BY found_at DESC;
+        #    partial on active rows, newest first (no INCLUDE columns: the view reads
+        #    title and apply_url from the table anyway, so PostgreSQL never ran an
+        #    index-only scan on them)
+        #  - end-of-run sweep: company's active rows with last_seen_at < run start
+        #  - archive pass: inactive rows by last_seen_at
+        # found_at keeps its db_index for the unfiltered admin/date queries.
         indexes = [
-            models.Index(fields=["found_at"]),
-            models.Index(fields=["category"]),
+            models.Index(
+                fields=["-found_at"], name="jobhit_active_recent",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["category", "-found_at"], name="jobhit_active_cat_recent",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["company", "last_seen_at"], name="jobhit_active_company_seen",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["last_seen_at"], name="jobhit_inactive_seen",
+                condition=models.Q(is_active=False),
+            ),
         ]
 
     def __str__(self) -> str:
         return f"{self.company.name} | {self.title}"
+
+
+class JobHitArchive(models.Model):
+    """
+    Cold storage for JobHits that stayed inactive (unseen by every run) for
+    ARCHIVE_AFTER_DAYS; see jobs.retention.archive_unseen(). Same columns,
+    no uniqueness: a posting that comes back is a new JobHit again.
+    """
+    hit_id = models.BigIntegerField()  # JobHit pk it had while live
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="archived_hits")
+    title = models.CharField(max_length=500)
+    apply_url = models.URLField(max_length=1000)
+    canonical_key = models.CharField(max_length=500, blank=True, null=True)
+    posting_group = models.CharField(max_length=16, blank=True, null=True)
+    source = models.CharField(max_length=100, blank=True, null=True)
+    raw_snippet = models.TextField(blank=True, null=True)
+    category = models.CharField(max_length=40, choices=CATEGORY_CHOICES, blank=True, null=True)
+    first_seen_at = models.DateTimeField(blank=True, null=True)
+    found_at = models.DateTimeField(default=timezone.now)
+    last_seen_at = models.DateTimeField(blank=True, null=True)
+    archived_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.company.name} | {self.title} (archived)"
+
+
+TITLE_CATEGORY_CHOICES = (
+    ("Data Scientist", "Data Scientist"),
+    ("Data Engineer", "Data Engineer"),
+    ("Data Analyst", "Data Analyst"),
+)
+
+
+class TaxonomyTerm(models.Model):
+    """
+    Admin-editable keyword taxonomy. While a kind has active rows they replace
+    the built-in list in jobs/scraper/keywords.py for that kind:
+      title  - whitelist phrase -> category (lower priority wins on overlap)
+      search - terms sent to ATS keyword searches (iCIMS, Oracle, SuccessFactors)
+      hint   - anchor-text hints for the generic HTML scraper
+    Workers pick up edits through jobs.taxonomy.refresh().
+    """
+    KIND_TITLE = "title"
+    KIND_SEARCH = "search"
+    KIND_HINT = "hint"
+    KIND_CHOICES = (
+        (KIND_TITLE, "Title rule"),
+        (KIND_SEARCH, "Search term"),
+        (KIND_HINT, "Generic anchor hint"),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_TITLE)
+    phrase = models.CharField(max_length=200)
+    # only for title rules
+    category = models.CharField(max_length=40, choices=TITLE_CATEGORY_CHOICES, blank=True, default="")
+    priority = models.IntegerField(default=100)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (("kind", "phrase"),)
+        ordering = ("kind", "priority", "id")
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {self.phrase}" + (f" -> {self.category}" if self.category else "")
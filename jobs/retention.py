@@ -0,0 +1,81 @@
+# jobs/retention.py
+from __future__ import annotations
+from datetime import timedelta
+import os
+
+from django.db import transaction
+from django.utils import timezone
+
+# End-of-scrape bookkeeping. Every upsert stamps JobHit.last_seen_at with the
+# run's start time and zeroes missed_runs. Once a company's scrape has finished
+# without errors, set-based UPDATEs count a miss on its rows the run did not
+# stamp - only when the scrape was complete (jobs.scraper.coverage) - and turn
+# off rows missed SWEEP_MISSES complete runs in a row, or unseen for
+# SWEEP_GRACE_DAYS whatever the coverage. Rows unseen for ARCHIVE_AFTER_DAYS
+# move to JobHitArchive so the live table only holds postings that can still be open.
+SWEEP_MISSES = int(os.getenv("SWEEP_MISSES", "2"))
+SWEEP_GRACE_DAYS = int(os.getenv("SWEEP_GRACE_DAYS", "14"))
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_CHUNK = 900
+
+_ARCHIVED_FIELDS = (
+    "company_id", "title", "apply_url", "canonical_key", "posting_group", "source", "raw_snippet",
+    "category", "first_seen_at", "found_at", "last_seen_at",
+)
+
+
+def deactivate_unseen(company, run_started, complete: bool = True,
+                      misses: int = SWEEP_MISSES, grace_days: int = SWEEP_GRACE_DAYS) -> int:
+    """
+    Sweep the company's active hits not seen since run_started; returns the
+    number set to is_active=False. Call it only for a scrape that finished
+    without errors. complete=True counts a miss on each of them and turns off
+    the ones at `misses`; either way, hits unseen for `grace_days` (> 0) go off.
+    """
+    from django.db.models import F, Q
+    from jobs.models import JobHit
+
+    unseen = JobHit.objects.filter(company=company, is_active=True).filter(
+        Q(last_seen_at__lt=run_started) | Q(last_seen_at__isnull=True)
+    )
+    off = 0
+    with transaction.atomic():
+        if complete:
+            unseen.update(missed_runs=F("missed_runs") + 1)
+            off += unseen.filter(missed_runs__gte=max(1, misses)).update(is_active=False)
+        if grace_days > 0:
+            cutoff = run_started - timedelta(days=grace_days)
+            # rows from before last_seen_at existed fall back to found_at
+            off += unseen.filter(
+                Q(last_seen_at__lt=cutoff) | Q(last_seen_at__isnull=True, found_at__lt=cutoff)
+            ).update(is_active=False)
+    return off
+
+
+def archive_unseen(days: int = ARCHIVE_AFTER_DAYS, chunk: int = ARCHIVE_CHUNK) -> int:
+    """Move inactive hits unseen for `days` into JobHitArchive; returns the row count (0 when days <= 0)."""
+    from django.db.models import Q
+    from jobs.models import JobHit, JobHitArchive
+
+    if days <= 0:
+        return 0
+    cutoff = timezone.now() - timedelta(days=days)
+    # rows from before last_seen_at existed fall back to found_at
+    stale = JobHit.objects.filter(is_active=False).filter(
+        Q(last_seen_at__lt=cutoff) | Q(last_seen_at__isnull=True, found_at__lt=cutoff)
+    )
+    moved = 0
+    now = timezone.now()
+    while True:
+        # copy + delete per chunk in one transaction: a crash never loses or doubles a row
+        with transaction.atomic():
+            rows = list(stale.order_by("pk").values("pk", *_ARCHIVED_FIELDS)[:chunk])
+            if not rows:
+                break
+            pks = [r.pop("pk") for r in rows]
+            JobHitArchive.objects.bulk_create(
+                [JobHitArchive(hit_id=pk, archived_at=now, **r) for pk, r in zip(pks, rows)]
+            )
+            JobHit.objects.filter(pk__in=pks).delete()
+            moved += len(pks)
+    return moved
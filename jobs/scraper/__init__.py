@@ -0,0 +1,11 @@
+# jobs/scraper/__init__.py
+# The orchestrator is loaded on first attribute access, so importing the
+# package (e.g. jobs.scraper.registry) stays cheap.
+__all__ = ["fetch_company_jobs", "iter_company_jobs", "build_session"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,25 @@
 # jobs/scraper/api.py
 from __future__ import annotations
-import os
-from typing import List, Dict, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+import os, threading
+from typing import List, Dict, Optional, Iterable, Iterator, TYPE_CHECKING
+from urllib.parse import urlparse
+
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from urllib.parse import urlparse
 
-from django.utils import timezone
-from jobs.models import Company
+from . import registry
+from .coverage import Coverage, mark_partial, tracking
+from .pool import Cancelled, RaceTicket, race_session, racing
+from .stats import bump
+from .titles import classify_title
+from .canonical import canonical_key
+from .crosspost import posting_group
 
-from .workday import WorkdayScraper
-from .greenhouse import GreenhouseScraper
-from .lever import LeverScraper
-from .successfactors import SuccessFactorsScraper
-from .icims import ICIMSScraper
-from .phenom import PhenomScraper
-from .oracle import OracleCloudScraper
-from .smartrecruiters import SmartRecruitersScraper
-from .generic import GenericScraper
+if TYPE_CHECKING:
+    from jobs.models import Company
 
 from .detectors import detect_ats as _detect_ats_loose
 
@@ -26,23 +27,8 @@ HTTP_POOL = int(os.getenv("HTTP_POOL", "64"))
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "15"))
 HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
 VERBOSE = os.getenv("VERBOSE", "0") == "1"
-
-_WHITELIST = [
-    # DS 
-    "data scientist", "applied scientist", "ml scientist", "machine learning scientist",
-    "machine learning analyst",
-
-    # DE
-    "data engineer", "machine learning engineer", "ml engineer",
-
-    # DA
-    "data analyst", "data analytics", "business intelligence", "bi analyst",
-
-    # intern
-    "data scientist intern", "data science intern", "data analyst intern",
-]
-_WHITELIST_LC = [t.lower() for t in _WHITELIST]
-
+SCRAPE_CASCADE = os.getenv("SCRAPE_CASCADE", "all")   # all | race
+RACE_WIDTH = int(os.getenv("RACE_WIDTH", "3"))
 
 def build_session() -> requests.Session:
     s = requests.Session()
@@ -66,34 +52,6 @@ def build_session() -> requests.Session:
     return s
 
 
-def _keep_title(title: str) -> bool:
-    t = (title or "").lower()
-    return any(kw in t for kw in _WHITELIST_LC)
-
-def _classify(title: str) -> str:
-    t = (title or "").lower()
-
-    # 
-    if "intern" in t:
-        if "analyst" in t:
-            return "Data Analyst"   # data analyst intern -> DA
-        else:
-            return "Data Scientist" # ds/data science/ml intern -> DS
-
-    # ML analyst --> DS
-    if "machine learning analyst" in t:
-        return "Data Scientist"
-
-    if "data engineer" in t or "machine learning engineer" in t or "ml engineer" in t:
-        return "Data Engineer"
-    if ("data scientist" in t) or ("applied scientist" in t) or ("ml scientist" in t) or ("machine learning scientist" in t):
-        return "Data Scientist"
-    if ("data analyst" in t) or ("data analytics" in t) or ("business intelligence" in t) or ("bi analyst" in t):
-        return "Data Analyst"
-
-
-    return "Other"
-
 # ---------- ATS  ----------
 def _guess_ats_from_url(url: str) -> Optional[str]:
     u = (url or "").lower()
@@ -114,6 +72,10 @@ def _guess_ats_from_url(url: str) -> Optional[str]:
     if host.endswith("lever.co") or host.endswith("jobs.lever.co"):
         return "lever"
 
+    # Taleo (its careersection paths would otherwise look like SuccessFactors)
+    if host.endswith("taleo.net"):
+        return "taleo"
+
     # SuccessFactors (rmk / careersection )
     if host.endswith("successfactors.com") or "careersection" in u or "sfcareer" in u:
         return "successfactors"
@@ -145,8 +107,6 @@ def _uniq_keep_order(items: Iterable[str]) -> List[str]:
         seen.add(x); out.append(x)
     return out
 
-from urllib.parse import urlparse
-
 def _safe_handles(scraper, company) -> bool:
     
     url = getattr(company, "data_query_url", None) or (company.careers_url or "")
@@ -154,12 +114,29 @@ def _safe_handles(scraper, company) -> bool:
         if hasattr(scraper, "handles"):
             try:
                 return bool(scraper.handles(company))
-            except TypeError:
+            except (TypeError, AttributeError):
+                # handles(url: str) scrapers choke on a Company
                 return bool(scraper.handles(url))
         return True
     except Exception:
         return False
 
+def _may_claim(name: str, company) -> bool:
+    """False only when the registry's URL hints rule out name's handles()."""
+    hints = registry.hints(name)
+    if hints is None:
+        return True
+    urls = " ".join(u for u in (getattr(company, "data_query_url", None), company.careers_url) if u)
+    text = (urls or str(company)).lower()
+    if any(h in text for h in hints):
+        return True
+    tags = {(getattr(company, a, "") or "").lower() for a in ("ats", "ats_type")}
+    if name in tags:
+        return True
+    cache = getattr(company, "scrape_cache", None)
+    return isinstance(cache, dict) and any(str(k).startswith(name + ".") for k in cache)
+
+
 def _build_candidates(company: Company) -> List[object]:
     entry = getattr(company, "data_query_url", None) or (company.careers_url or "")
     at1 = _guess_ats_from_url(entry)
@@ -171,39 +148,225 @@ def _build_candidates(company: Company) -> List[object]:
     except Exception:
         at3 = None
 
-    order = _uniq_keep_order([
-        at1, at2, at3,
-        "workday", "greenhouse", "lever", "successfactors", "icims",
-        "phenom", "oracle", "smartrecruiters",
-        "generic",
-    ])
-
-    reg = {
-        "workday": WorkdayScraper,
-        "greenhouse": GreenhouseScraper,
-        "lever": LeverScraper,
-        "successfactors": SuccessFactorsScraper,
-        "icims": ICIMSScraper,
-        "phenom": PhenomScraper,
-        "oracle": OracleCloudScraper,
-        "smartrecruiters": SmartRecruitersScraper,
-        "generic": GenericScraper,
-    }
-
-    cand = [reg[k]() for k in order if k in reg]
-    cand = [sc for sc in cand if _safe_handles(sc, company)]
+    # scraper modules are imported by the registry on first use, and only for
+    # names that were detected or whose URL hints leave handles() a chance
+    detected = _uniq_keep_order([at1, at2, at3])
+    order = [k for k in _uniq_keep_order(detected + registry.names())
+             if k in detected or _may_claim(k, company)]
+
+    # ranked by confidence: the detected ATS, then scrapers whose handles()
+    # claims the company, then ones without handles() that only guess
+    ranked = []
+    for k in order:
+        cls = registry.get(k)
+        if cls is None:
+            continue
+        sc = cls()
+        if not _safe_handles(sc, company):
+            continue
+        tier = 3 if _is_fallback(sc) else 0 if k in detected else 1 if hasattr(sc, "handles") else 2
+        ranked.append((tier, sc))
+    cand = [sc for _, sc in sorted(ranked, key=lambda t: t[0])]
     if not cand:
-        cand = [GenericScraper()]
+        cand = [registry.get("generic")()]
     return cand
 
 
 
 
-def fetch_company_jobs(company: Company, session: Optional[requests.Session] = None) -> List[Dict]:
+def _scraper_failed(scraper, e: Exception) -> None:
+    # a lost race is not a failure of the scrape; anything else leaves it incomplete
+    if not isinstance(e, Cancelled):
+        mark_partial(f"{scraper.__class__.__name__.lower()}.raised", error=True)
+
+
+def _run_scraper(scraper, company: Company, s) -> List[Dict]:
+    try:
+        return scraper.fetch(company, session=s) or []
+    except TypeError:
+        # older scrapers take the session positionally
+        try:
+            return scraper.fetch(company, s) or []
+        except Exception as e:
+            _scraper_failed(scraper, e)
+            return []
+    except Exception as e:
+        _scraper_failed(scraper, e)
+        return []
+
+
+def _iter_scraper(scraper, company: Company, s) -> Iterator[Dict]:
+    """
+    Hits of one scraper as they arrive. Scrapers with iter_hits() stream page
+    by page; list-returning ones go through fetch() and are yielded afterwards.
+    A scraper error ends its stream but keeps what was already yielded, and
+    marks the scrape partial.
+    """
+    it = getattr(scraper, "iter_hits", None)
+    if it is None:
+        yield from _run_scraper(scraper, company, s)
+        return
+    try:
+        try:
+            hits = it(company, session=s)
+        except TypeError:
+            hits = it(company, s)
+        yield from hits or ()
+    except Exception as e:
+        _scraper_failed(scraper, e)
+        return
+
+
+def _tracked(cov: Coverage, hits: Iterable[Dict]) -> Iterator[Dict]:
+    """hits with cov as the current Coverage while the scraper code behind them runs."""
+    it = iter(hits)
+    while True:
+        # set per step, so the caller never runs with cov attached between hits
+        with tracking(cov):
+            try:
+                h = next(it)
+            except StopIteration:
+                return
+        yield h
+
+
+def _kept(scraper, company: Company, hits: Iterable[Dict], seen: set) -> Iterator[Dict]:
+    from django.utils import timezone
+
+    now = timezone.now()
+    for h in hits:
+        title = (h.get("title") or "").strip()
+        url = (h.get("apply_url") or h.get("url") or "").strip()
+        if not title or not url:
+            continue
+
+        # whitelist + category in one pass; None means not a data role
+        cat = classify_title(title)
+        if cat is None:
+            continue
+
+        # URL variants of one posting (tracking params, embed pages ...) collapse here already
+        key = canonical_key(url)
+        if key in seen:
+            continue
+        seen.add(key)
+        # same role posted again for another city / requisition -> same group
+        group = posting_group(getattr(company, "pk", None), title, h.get("location") or "")
+
+        yield {
+            "title": title,
+            "apply_url": url,
+            "canonical_key": key,
+            "posting_group": group,
+            "source": h.get("source") or scraper.__class__.__name__.replace("Scraper","").lower(),
+            "snippet": h.get("snippet") or "",
+            "company_name": getattr(company, "name", ""),
+            "found_at": h.get("found_at") or now,
+            "category": cat,
+        }
+
+
+def _is_fallback(scraper) -> bool:
+    generic = registry.get("generic")
+    return generic is not None and isinstance(scraper, generic)
+
+
+def _race(company: Company, s, cands: List[object], cov: Coverage) -> Iterator[Dict]:
     """
-    return:
-      title, apply_url, source, snippet, company_name, found_at, category
+    Run the ATS candidates RACE_WIDTH at a time, in rank order (see
+    _build_candidates), and keep the best-ranked one that returns whitelisted
+    postings. A candidate only wins once every higher-ranked one has finished
+    empty; when it wins, the lower-ranked ones are cancelled at their next
+    request and the remaining candidates never start. The generic scraper is
+    not confident enough to win a race and only runs when nobody did.
+
+    A win leaves the scrape partial in cov whenever a candidate was cancelled
+    or never ran: postings only it would have found went unseen.
     """
+    ats = [sc for sc in cands if not _is_fallback(sc)]
+    fallback = [sc for sc in cands if _is_fallback(sc)]
+    width = max(1, RACE_WIDTH)
+
+    for i in range(0, len(ats), width):
+        wave = ats[i:i + width]
+        # one stop event per candidate, so a winner cancels only those ranked below it
+        tickets = [RaceTicket(threading.Event()) for _ in wave]
+        covs = [Coverage() for _ in wave]
+
+        def run(k: int) -> List[Dict]:
+            with racing(tickets[k]), tracking(covs[k]):
+                return list(_iter_scraper(wave[k], company, race_session(s)))
+
+        winner, out = None, []
+        done: Dict[int, List[Dict]] = {}
+        with ThreadPoolExecutor(max_workers=len(wave)) as ex:
+            futs = {ex.submit(copy_context().run, run, k): k for k in range(len(wave))}
+            for f in as_completed(futs):
+                k = futs[f]
+                done[k] = list(_kept(wave[k], company, f.result(), set()))
+                if winner is not None:
+                    continue
+                # a finished lower-ranked result waits until everything above it came back empty
+                for r in range(len(wave)):
+                    if r not in done:
+                        break
+                    if done[r]:
+                        winner, out = r, done[r]
+                        for t in tickets[r + 1:]:
+                            t.stop.set()
+                        break
+            # leaving the block waits for the losers; with their stop events set
+            # they fail fast at their next request instead of finishing the crawl
+
+        bump("race.waves")
+        bump("race.requests", sum(t.sent for t in tickets))
+        # an empty answer from a candidate that errored says nothing about the listing
+        for k in range(len(wave) if winner is None else winner + 1):
+            cov.merge(covs[k])
+        if winner is None:
+            continue
+
+        skipped = len(ats) - (i + len(wave)) + len(fallback)
+        if skipped or winner < len(wave) - 1:
+            cov.partial("race")
+        wasted = sum(t.sent for k, t in enumerate(tickets) if k != winner)
+        blocked = sum(t.blocked for t in tickets)
+        bump("race.won")
+        bump("race.scrapers_skipped", skipped)
+        bump("race.requests_blocked", blocked)
+        bump("race.requests_wasted", wasted)
+        if VERBOSE:
+            print(f"[RACE] {company.name} winner={wave[winner].__class__.__name__} "
+                  f"hits={len(out)} skipped={skipped} blocked={blocked} wasted={wasted}", flush=True)
+        yield from out
+        return
+
+    bump("race.fallback")
+    seen = set()
+    for scraper in fallback:
+        yield from _kept(scraper, company, _tracked(cov, _iter_scraper(scraper, company, s)), seen)
+
+
+def iter_company_jobs(
+    company: Company,
+    session: Optional[requests.Session] = None,
+    cascade: Optional[str] = None,
+    coverage: Optional[Coverage] = None,
+) -> Iterator[Dict]:
+    """
+    Filtered, classified, de-duplicated hits for one company, yielded as the
+    scrapers produce them. Each hit has:
+      title, apply_url, canonical_key, posting_group, source, snippet, company_name, found_at, category
+
+    cascade="all" runs every candidate scraper and merges their hits;
+    cascade="race" stops at the first confident one (see _race).
+
+    Pass a Coverage to learn, once the generator is exhausted, whether the
+    scrape saw the company's whole listing (coverage.complete) or stopped
+    short: a swallowed error, a page / hit cap, a capped or planned keyword
+    list, a race that cut other candidates off.
+    """
+    cov = coverage if coverage is not None else Coverage()
     s = session or build_session()
     entry_url = getattr(company, "data_query_url", None) or (company.careers_url or "")
 
@@ -213,53 +376,20 @@ def fetch_company_jobs(company: Company, session: Optional[requests.Session] = N
         except Exception:
             pass
 
-    out_all: List[Dict] = []
-    seen = set()
+    cands = _build_candidates(company)
+    if (cascade or SCRAPE_CASCADE) == "race":
+        yield from _race(company, s, cands, cov)
+        return
 
-    for scraper in _build_candidates(company):
-        try:
-            hits = scraper.fetch(company, session=s) or []
-        except TypeError:
-            # 
-            try:
-                hits = scraper.fetch(company, s) or []
-            except Exception:
-                hits = []
-        except Exception:
-            hits = []
+    seen = set()
+    for scraper in cands:
+        yield from _kept(scraper, company, _tracked(cov, _iter_scraper(scraper, company, s)), seen)
 
-        if not hits:
-            continue
 
-        now = timezone.now()
-        for h in hits:
-            title = (h.get("title") or "").strip()
-            url = (h.get("apply_url") or h.get("url") or "").strip()
-            if not title or not url:
-                continue
-
-            # filter whitelist
-            if not _keep_title(title):
-                continue
-
-            if url in seen:
-                continue
-            seen.add(url)
-
-            cat = _classify(title)
-            if cat == "Other":
-                continue  # 
-
-            out_all.append({
-                "title": title,
-                "apply_url": url,
-                "source": h.get("source") or scraper.__class__.__name__.replace("Scraper","").lower(),
-                "snippet": h.get("snippet") or "",
-                "company_name": getattr(company, "name", ""),
-                "found_at": h.get("found_at") or now,
-                "category": cat,
-            })
-
-       
-
-    return out_all
+def fetch_company_jobs(
+    company: Company,
+    session: Optional[requests.Session] = None,
+    cascade: Optional[str] = None,
+) -> List[Dict]:
+    """List form of iter_company_jobs()."""
+    return list(iter_company_jobs(company, session, cascade))
@@ -0,0 +1,45 @@
+# jobs/scraper/cache.py
+from __future__ import annotations
+from typing import Any, Optional
+import os, time
+
+# Entries live in Company.scrape_cache as {key: {"v": value, "ts": epoch}}.
+# Scrapers only touch the in-memory dict; the caller persists the company.
+SCRAPE_CACHE_TTL_HOURS = int(os.getenv("SCRAPE_CACHE_TTL_HOURS", str(24 * 7)))
+
+
+def _store(company) -> Optional[dict]:
+    data = getattr(company, "scrape_cache", None)
+    if isinstance(data, dict):
+        return data
+    try:
+        data = {}
+        setattr(company, "scrape_cache", data)
+        return data
+    except Exception:
+        return None
+
+
+def cache_get(company, key: str, ttl_hours: Optional[int] = None) -> Any:
+    data = getattr(company, "scrape_cache", None)
+    if not isinstance(data, dict):
+        return None
+    ent = data.get(key)
+    if not isinstance(ent, dict):
+        return None
+    ttl = SCRAPE_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours
+    if ttl and time.time() - (ent.get("ts") or 0) > ttl * 3600:
+        return None
+    return ent.get("v")
+
+
+def cache_set(company, key: str, value: Any) -> None:
+    data = _store(company)
+    if data is not None:
+        data[key] = {"v": value, "ts": int(time.time())}
+
+
+def cache_drop(company, key: str) -> None:
+    data = getattr(company, "scrape_cache", None)
+    if isinstance(data, dict):
+        data.pop(key, None)
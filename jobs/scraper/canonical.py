@@ -0,0 +1,188 @@
+# jobs/scraper/canonical.py
+from __future__ import annotations
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+import hashlib, re
+
+# One posting, one key. canonical_key() maps the URL variants an ATS hands
+# out for the same posting (tracking params, locale prefixes, embed vs board
+# pages, details/ vs job/ paths, /apply suffixes) to a stable string.
+# apply_url keeps whatever URL we saw first; JobHit rows are unique on
+# (company, canonical_key).
+
+CANONICAL_KEY_MAX = 500
+
+# stripped from every URL: campaign tags and ad / email click ids, never a posting id
+TRACKING_PARAMS = {
+    "gclid", "gbraid", "wbraid", "dclid", "fbclid", "msclkid", "yclid", "twclid", "li_fat_id",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+}
+_TRACKING_PREFIXES = ("utm_",)
+# stripped only on ATS hosts, where the posting id lives in the path; on a custom
+# careers site "ref" / "source" / "mode" / ... may well be the id (job.php?ref=1234)
+ATS_TRACKING_PARAMS = {
+    "gh_src", "source", "src", "ref", "referrer", "lever-source", "lever-origin",
+    "iis", "iisn", "mode", "in_iframe", "codes", "jobpipeline", "share",
+    "trk", "trackingid", "sourcetype", "ccid",
+}
+ATS_HOSTS = (
+    "greenhouse.io", "lever.co", "myworkdayjobs.com", "myworkdaysite.com", "icims.com",
+    "smartrecruiters.com", "oraclecloud.com", "taleo.net", "successfactors.com", "successfactors.eu",
+)
+
+_LOCALE_RE = re.compile(r"^[a-z]{2}[-_][a-z]{2}$", re.I)   # en-US, fr_CA
+_WD_REQ_RE = re.compile(r"_((?:jr|r|req)?[-_]?\d[\w-]*)$", re.I)
+_WD_HOST_RE = re.compile(r"\.wd\d+\.")
+_DIGITS_RE = re.compile(r"(\d{3,})")
+_UUID_RE = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I)
+
+
+def _parts(path: str) -> List[str]:
+    return [p for p in (path or "").split("/") if p]
+
+
+def _workday(host: str, path: List[str], query: dict) -> Optional[str]:
+    if "myworkdayjobs.com" not in host and not _WD_HOST_RE.search(host):
+        return None
+    if path and _LOCALE_RE.match(path[0]):
+        path = path[1:]
+    for marker in ("job", "details"):
+        if marker in path:
+            i = path.index(marker)
+            site = path[i - 1] if i > 0 else ""
+            slug = path[-1]
+            m = _WD_REQ_RE.search(slug)
+            ident = m.group(1) if m else slug
+            return f"workday:{host}/{site.lower()}/{ident.lower()}"
+    return None
+
+
+def _greenhouse(host: str, path: List[str], query: dict) -> Optional[str]:
+    # boards / job-boards / embed pages and company sites carrying ?gh_jid= all share the job id
+    if query.get("gh_jid", "").isdigit():
+        return f"greenhouse:{query['gh_jid']}"
+    if "greenhouse.io" not in host:
+        return None
+    if query.get("token", "").isdigit():
+        return f"greenhouse:{query['token']}"
+    if "jobs" in path:
+        i = path.index("jobs")
+        if i + 1 < len(path) and path[i + 1].isdigit():
+            return f"greenhouse:{path[i + 1]}"
+    return None
+
+
+def _lever(host: str, path: List[str], query: dict) -> Optional[str]:
+    if not host.endswith("lever.co"):
+        return None
+    for p in path:
+        if _UUID_RE.fullmatch(p):
+            return f"lever:{p.lower()}"
+    return None
+
+
+def _icims(host: str, path: List[str], query: dict) -> Optional[str]:
+    if "icims.com" not in host or "jobs" not in path:
+        return None
+    i = path.index("jobs")
+    if i + 1 < len(path) and path[i + 1].isdigit():
+        tenant = re.sub(r"^(?:careers|jobs|internal)-", "", host)
+        return f"icims:{tenant}/{path[i + 1]}"
+    return None
+
+
+def _smartrecruiters(host: str, path: List[str], query: dict) -> Optional[str]:
+    if not host.endswith("smartrecruiters.com") or len(path) < 2:
+        return None
+    m = re.match(r"(\d{6,})", path[1])
+    return f"smartrecruiters:{path[0].lower()}/{m.group(1)}" if m else None
+
+
+def _oracle(host: str, path: List[str], query: dict) -> Optional[str]:
+    low = [p.lower() for p in path]
+    for marker in ("requisition", "requisitions", "job"):
+        if marker in low and ("candidateexperience" in low or host.endswith("oraclecloud.com")):
+            i = low.index(marker)
+            rest = [p for p in path[i + 1:] if p.lower() != "preview"]
+            if rest and rest[0].isdigit():
+                return f"oracle:{host}/{rest[0]}"
+    return None
+
+
+def _taleo(host: str, path: List[str], query: dict) -> Optional[str]:
+    if not host.endswith("taleo.net"):
+        return None
+    job = query.get("job") or query.get("requisition")
+    return f"taleo:{host}/{job.lower()}" if job else None
+
+
+def _phenom(host: str, path: List[str], query: dict) -> Optional[str]:
+    # /<country>/<lang>/job/<id>/<slug>
+    low = [p.lower() for p in path]
+    if "job" in low:
+        i = low.index("job")
+        if i >= 2 and i + 1 < len(path) and _DIGITS_RE.fullmatch(path[i + 1] or ""):
+            return f"phenom:{host}/{path[i + 1]}"
+    return None
+
+
+_RULES: Tuple[Callable[[str, List[str], dict], Optional[str]], ...] = (
+    _greenhouse, _workday, _lever, _icims, _smartrecruiters, _oracle, _taleo, _phenom,
+)
+
+
+def _is_ats_host(host: str) -> bool:
+    return any(host == h or host.endswith("." + h) for h in ATS_HOSTS) or bool(_WD_HOST_RE.search(host))
+
+
+def canonical_url(url: str) -> str:
+    """URL with scheme/host lower-cased, fragment, tracking params and default port dropped, query sorted.
+
+    Campaign / click-id params go everywhere; the wider ATS_TRACKING_PARAMS only on ATS hosts.
+    """
+    u = urlparse((url or "").strip())
+    host = (u.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if u.port and u.port not in (80, 443):
+        host = f"{host}:{u.port}"
+    drop = TRACKING_PARAMS | ATS_TRACKING_PARAMS if _is_ats_host(host) else TRACKING_PARAMS
+    query = sorted(
+        (k, v) for k, v in parse_qsl(u.query, keep_blank_values=False)
+        if k.lower() not in drop and not k.lower().startswith(_TRACKING_PREFIXES)
+    )
+    parts = _parts(u.path)
+    if len(parts) > 1 and _LOCALE_RE.match(parts[0]):
+        parts = parts[1:]
+    path = "/" + "/".join(parts)
+    out = f"https://{host}{path}"
+    if query:
+        out += "?" + urlencode(query)
+    return out
+
+
+def _fit(key: str) -> str:
+    if len(key) <= CANONICAL_KEY_MAX:
+        return key
+    # keep long keys distinct instead of truncating them into each other
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return key[:CANONICAL_KEY_MAX - 17] + "#" + digest
+
+
+def canonical_key(url: str) -> str:
+    """Stable identity of a posting URL: "<ats>:<id>" when an ATS rule knows it, else the canonical URL."""
+    if not url:
+        return ""
+    u = urlparse(url.strip())
+    host = (u.hostname or "").lower()
+    path = _parts(u.path)
+    query = {k.lower(): v for k, v in parse_qsl(u.query)}
+    for rule in _RULES:
+        try:
+            key = rule(host, path, query)
+        except Exception:
+            key = None
+        if key:
+            return _fit(key)
+    # path case is kept for generic sites; only the host is case-insensitive
+    return _fit(canonical_url(url))
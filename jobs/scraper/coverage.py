@@ -0,0 +1,66 @@
+# jobs/scraper/coverage.py
+from __future__ import annotations
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+import threading
+
+from .stats import bump
+
+# Whether one company's scrape saw everything the company has posted.
+# Scrapers call mark_partial() wherever they knowingly stop short (a page or
+# hit cap, a capped or planned keyword list, an error they swallow); the
+# caller of iter_company_jobs() reads the result once the generator is done
+# and only then lets the end-of-run sweep switch off postings it did not see.
+# The Coverage travels in a ContextVar, so fan_out / in_waves workers (which
+# run in a copy of the caller's context) report into the same object.
+
+
+class Coverage:
+    """Outcome of one company's scrape: complete unless somebody said otherwise."""
+
+    def __init__(self) -> None:
+        self.reasons: List[str] = []
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return not self.reasons
+
+    def partial(self, reason: str, error: bool = False) -> None:
+        with self._lock:
+            if reason not in self.reasons:
+                self.reasons.append(reason)
+            if error:
+                self.errors += 1
+
+    def merge(self, other: "Coverage") -> None:
+        for r in other.reasons:
+            self.partial(r)
+        with self._lock:
+            self.errors += other.errors
+
+    def __repr__(self) -> str:
+        return "Coverage(complete)" if self.complete else f"Coverage(partial: {', '.join(self.reasons)})"
+
+
+_current: ContextVar[Optional[Coverage]] = ContextVar("scrape_coverage", default=None)
+
+
+@contextmanager
+def tracking(cov: Coverage) -> Iterator[Coverage]:
+    """Report mark_partial() calls made in this context (and its fan_out workers) to cov."""
+    token = _current.set(cov)
+    try:
+        yield cov
+    finally:
+        _current.reset(token)
+
+
+def mark_partial(reason: str, error: bool = False) -> None:
+    """The running scrape stopped short of the full listing; no-op outside tracking()."""
+    bump(f"partial.{reason}")
+    cov = _current.get()
+    if cov is not None:
+        cov.partial(reason, error=error)
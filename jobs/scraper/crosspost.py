@@ -0,0 +1,71 @@
+# jobs/scraper/crosspost.py
+from __future__ import annotations
+from typing import List
+import hashlib, re
+
+# Cross-posting groups. Companies post one role several times (one per city,
+# per requisition, per "Senior"/"Sr." spelling); posting_group() reduces a
+# hit to its role signature - company + title with the posting's own
+# location, US state codes, requisition ids and separators stripped, word
+# order kept - and hashes that to 16 hex chars. Rows sharing the value are
+# copies of one role, so the UI can collapse them with a dict lookup per row
+# instead of comparing titles.
+
+GROUP_KEY_LEN = 16
+
+_REQ_RE = re.compile(
+    r"\(\s*(?:req|job|id)?[\s#:.-]*[a-z]{0,3}[-_]?\d{3,}[\w-]*\s*\)"      # (R12345), (Req #123)
+    r"|\b(?:req(?:uisition)?|job\s*id|id)\b[\s#:.-]*[a-z]{0,3}[-_]?\d[\w-]*"
+    r"|#\s*\w*\d\w*"
+    r"|\b(?:jr|r|req)[-_]?\d{3,}\w*\b"
+    r"|\b\d{4,}\b",
+    re.I,
+)
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_LOCATION_SPLIT_RE = re.compile(r"\s*(?:[,;/|(){}\[\]]|\s-\s|\s+or\s+)\s*", re.I)
+
+US_STATES = {
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS", "KY",
+    "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND",
+    "OH", "OK", "OR", "PA", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY", "DC",
+}
+# a state code only where it reads as one: upper-case, after a comma / dash / bracket ("Austin, TX", "(NY)")
+_STATE_RE = re.compile(r"(?:,|\s-|\(|\|)\s*(?:" + "|".join(sorted(US_STATES)) + r")\b\)?")
+# work arrangement rather than role
+WORK_MODE_WORDS = {"remote", "hybrid", "onsite"}
+# one spelling per word, so "Sr. Data Engineer" and "Senior Data Engineer" share a group
+SYNONYMS = {
+    "sr": "senior", "jr": "junior", "snr": "senior", "mgr": "manager", "eng": "engineer",
+    "engr": "engineer", "ml": "machine learning", "ai": "artificial intelligence",
+    "bi": "business intelligence", "assoc": "associate", "principle": "principal",
+}
+_STOP = {"a", "an", "and", "the", "of", "for", "in", "at", "to", "with", "or", "&", "-"}
+
+
+def _location_phrases(location: str) -> List[str]:
+    """The posting's location split into place names ("Austin, TX" -> ["austin", "tx"])."""
+    parts = _LOCATION_SPLIT_RE.split(location or "")
+    return [p.strip().lower() for p in parts if p and len(p.strip()) > 1 and not p.strip().isdigit()]
+
+
+def title_signature(title: str, location: str = "") -> List[str]:
+    """Role words of a title in order, without its location, requisition ids and filler words."""
+    t = _REQ_RE.sub(" ", title or "")
+    t = _STATE_RE.sub(" ", t)                             # case-sensitive: "TX", not "tx" / "it"
+    t = t.lower()
+    # only what the hit says its location is: "Platform" or "Analytics" in a title is role text
+    for place in sorted(_location_phrases(location), key=len, reverse=True):
+        t = re.sub(r"(?<![a-z0-9])" + re.escape(place) + r"(?![a-z0-9])", " ", t)
+    words = []
+    for w in _WORD_RE.findall(t):
+        if w in _STOP or w in WORK_MODE_WORDS:
+            continue
+        words.extend(SYNONYMS.get(w, w).split())
+    return words
+
+
+def posting_group(company_id, title: str, location: str = "") -> str:
+    """Compact cross-posting key: equal for copies of one role at one company."""
+    sig = " ".join(title_signature(title, location)) or (title or "").strip().lower()
+    digest = hashlib.blake2b(f"{company_id}|{sig}".encode("utf-8"), digest_size=GROUP_KEY_LEN // 2)
+    return digest.hexdigest()
@@ -52,6 +52,10 @@ def detect_ats(url: str, session=None) -> Optional[Tuple[str, Optional[str]]]:
     if "oraclecloud.com" in h or "/hcmui/candidateexperience/" in p:
         return ("oracle", None)
 
+    # Taleo (before SuccessFactors: both use /careersection/ paths)
+    if h.endswith("taleo.net"):
+        return ("taleo", None)
+
     # SuccessFactors
     if "successfactors.com" in h or "careersection" in p or "/go/" in p:
         return ("successfactors", None)
@@ -78,6 +82,8 @@ def detect_ats(url: str, session=None) -> Optional[Tuple[str, Optional[str]]]:
                 return ("smartrecruiters", None)
             if "hcmui/candidateexperience" in t or "oraclecloud.com" in t:
                 return ("oracle", None)
+            if "taleo.net" in t:
+                return ("taleo", None)
             if "careersection" in t or "successfactors" in t or "rmk" in t:
                 return ("successfactors", None)
             if "phenompeople" in t or "/phsearch/api/v1/search" in t or "window.phenom" in t:
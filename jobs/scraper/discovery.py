@@ -22,6 +22,7 @@ def _detect_ats(url: str) -> Optional[str]:
     host = urlparse(url).netloc.lower()
     path = urlparse(url).path.lower()
     if "myworkdayjobs.com" in host: return "WORKDAY"
+    if host.endswith("taleo.net") and "careersection" in path: return "TALEO"
     if host.endswith("successfactors.com") and ("career" in path or "sfcareer" in path): return "SUCCESSFACTORS"
     if host.endswith("icims.com"): return "ICIMS"
     if "smartrecruiters.com" in host: return "SMARTRECRUITERS"
@@ -92,7 +93,7 @@ def discover_from_homepage(homepage_url: str, s: requests.Session) -> Tuple[Opti
         if "career" in low: s += 5
         if "jobs" in low: s += 3
         if "work" in low: s += 1
-        if any(host in low for host in ("myworkdayjobs.com","successfactors.com","icims.com","smartrecruiters.com","lever.co")): s += 7
+        if any(host in low for host in ("myworkdayjobs.com","successfactors.com","icims.com","smartrecruiters.com","lever.co","taleo.net")): s += 7
         if "cdn." in low: s -= 10
         if "rmkcdn." in low: s -= 10
         return s
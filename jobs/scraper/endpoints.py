@@ -0,0 +1,71 @@
+# jobs/scraper/endpoints.py
+from __future__ import annotations
+from typing import List
+from urllib.parse import urljoin, urlparse
+import re
+
+from .canonical import ATS_HOSTS
+
+# Guess the XHR endpoint a script-rendered careers page loads its listings
+# from, by looking at quoted URLs inside its inline scripts
+# (fetch("/api/jobs?..."), axios.get('https://.../positions/search'), apiUrl: "...").
+
+_QUOTED_URL_RE = re.compile(r"""["'`]((?:https?:)?/[^"'`\s<>\\]{2,300})["'`]""")
+_API_HINT_RE = re.compile(r"(/api/|/apis?/|\bapi\.|/wp-json/|/search\b|\.json\b|/v\d+/)", re.I)
+_JOB_HINT_RE = re.compile(r"(job|position|opening|posting|requisition|vacanc|career)", re.I)
+_ASSET_RE = re.compile(r"\.(?:js|mjs|css|png|jpe?g|gif|svg|ico|woff2?|ttf|map|pdf)(?:\?|$)", re.I)
+
+# probes only go to the careers site's own domain or to a job board's API;
+# anything else quoted in a script (analytics, CDNs, partner widgets) is skipped
+API_HOSTS = ATS_HOSTS + (
+    "phenompeople.com", "workable.com", "ashbyhq.com", "recruitee.com", "jobvite.com",
+    "bamboohr.com", "eightfold.ai", "avature.net", "ultipro.com", "paylocity.com",
+)
+# second-level labels under which a registrable domain takes three labels (acme.co.uk)
+_SLD = {"co", "com", "net", "org", "gov", "edu", "ac", "or", "ne", "go"}
+
+
+def _registrable(host: str) -> str:
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SLD:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def allowed_endpoint(url: str, page_url: str) -> bool:
+    """True when url is on page_url's registrable domain or on a known ATS / job-board host."""
+    host = (urlparse(url).hostname or "").lower()
+    page_host = (urlparse(page_url).hostname or "").lower()
+    if not host or not page_host:
+        return False
+    if _registrable(host) == _registrable(page_host):
+        return True
+    return any(host == h or host.endswith("." + h) for h in API_HOSTS)
+
+
+def _score(url: str, page_host: str) -> int:
+    low = url.lower()
+    s = 0
+    if "/api/" in low or "api." in urlparse(low).netloc: s += 3
+    if "search" in low: s += 1
+    if re.search(r"\bjobs?\b", low): s += 2
+    if urlparse(url).netloc == page_host: s += 2
+    return s
+
+
+def endpoint_candidates(html: str, scan, page_url: str, limit: int = 5) -> List[str]:
+    """Likely job-search JSON endpoints referenced by the page's inline scripts, best first."""
+    page_host = urlparse(page_url).netloc
+    found = {}
+    for start, end in scan.script_spans:
+        for m in _QUOTED_URL_RE.finditer(html, start, end):
+            raw = m.group(1)
+            if "${" in raw or "{{" in raw or _ASSET_RE.search(raw):
+                continue
+            if not (_API_HINT_RE.search(raw) and _JOB_HINT_RE.search(raw)):
+                continue
+            full = urljoin(page_url, raw)
+            if not full.startswith(("http://", "https://")) or not allowed_endpoint(full, page_url):
+                continue
+            found.setdefault(full, _score(full, page_host))
+    return sorted(found, key=found.get, reverse=True)[:limit]
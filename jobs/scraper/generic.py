@@ -1,12 +1,19 @@
 # jobs/scraper/generic.py
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import os, re, json
 from html import unescape
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlparse
 from django.utils import timezone
-from .base import BaseScraper, categorize_title
-from bs4 import BeautifulSoup
+from .base import BaseScraper, categorize_title, vlog
+from .cache import cache_get, cache_set, cache_drop
+from .coverage import mark_partial
+from .endpoints import allowed_endpoint, endpoint_candidates
+from .pool import host_slot, in_waves
+from .stats import bump
+from .htmlscan import scan_html
+from .jsonwalk import load_blob, walk_json
+from .keywords import anchor_hints
 
 
 KEY_HINTS = [
@@ -26,6 +33,14 @@ def _terms_from_env() -> List[str]:
 JOB_URL_HINT = re.compile(r"(job|jobs|opening|opportunit|requisition|position|careers?/.*job)", re.I)
 PAGINATION_URL_HINT = re.compile(r"(?:/jobs/(?:page|p)/\d+/?$|[?&]page=\d+)", re.I)
 NAV_TEXT_RE = re.compile(r"^(?:go to )?(?:next|previous|prev|first|last)\s+page$", re.I)
+PAGE_NUM_RE = re.compile(r"(?:[?&]page=|/jobs/(?:page|p)/)(?P<n>\d+)", re.I)
+_PAGE_SLOT = "\x00page\x00"   # page-number slot in a _page_urls template
+
+GENERIC_PAGINATE = os.getenv("GENERIC_PAGINATE", "0") == "1"
+GENERIC_MAX_PAGES = int(os.getenv("GENERIC_MAX_PAGES", "5"))
+GENERIC_DISCOVER_API = os.getenv("GENERIC_DISCOVER_API", "0") == "1"
+GENERIC_API_PROBES = int(os.getenv("GENERIC_API_PROBES", "3"))
+GENERIC_API_RETRY_HOURS = int(os.getenv("GENERIC_API_RETRY_HOURS", "72"))
 
 
 TEXT_STOPWORDS = tuple(s.lower() for s in [
@@ -54,48 +69,32 @@ class GenericScraper(BaseScraper):
 
     def handles(self, url: str) -> bool:
         return True 
-    def fetch(self, company, session) -> List[Dict]:
-        out: List[Dict] = []
-
-        
-        base_url = getattr(company, "data_query_url", None) \
-        or getattr(company, "careers_url", None) \
-        or getattr(company, "homepage_url", None)
-
-        if not base_url:
-            return out
-
+    def _get(self, session, url: str) -> Optional[Tuple[str, str]]:
+        """(html, final url) of one page, or None."""
         try:
-            
-            r = session.get(
-                base_url,
-                timeout=int(os.getenv("HTTP_TIMEOUT", "12")),
-                headers={
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-                    "Cache-Control": "no-cache",
-                },
-            )
+            with host_slot(url):
+                r = session.get(
+                    url,
+                    timeout=int(os.getenv("HTTP_TIMEOUT", "12")),
+                    headers={
+                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+                        "Cache-Control": "no-cache",
+                    },
+                )
             r.raise_for_status()
-            html = r.text or ""
-            final_url = r.url
+            return (r.text or ""), r.url
         except Exception:
-            return out
-
-       
-        terms = set([k.lower() for k in KEY_HINTS] + _terms_from_env())
-        max_hits = int(os.getenv("GENERIC_MAX_HITS", "500"))
-        now = timezone.now()
+            return None
 
-     
-        for m in re.finditer(r'<a\s[^>]*href=["\'](.*?)["\'][^>]*>(.*?)</a>', html, re.I | re.S):
-            href, text = m.group(1), m.group(2)
+    def _anchor_hits(self, scan, final_url: str, terms, now, max_hits: int) -> List[Dict]:
+        out: List[Dict] = []
+        for href, text in scan.anchors:
             anchor = _clean_text(text)
             if not anchor or len(anchor) < 6:
                 continue
             low_anchor = anchor.lower()
             low_href = (href or "").lower()
-            
-  
+
             if PAGINATION_URL_HINT.search(low_href) or NAV_TEXT_RE.match(anchor):
                 continue
             if any(sw in low_anchor for sw in TEXT_STOPWORDS):
@@ -106,7 +105,7 @@ class GenericScraper(BaseScraper):
             if not (looks_like_job or has_term):
                 continue
 
-            apply_url = urljoin(final_url, (href or "").strip())
+            apply_url = urljoin(final_url, unescape(href or "").strip())
             if not apply_url.startswith(("http://", "https://")):
                 continue
 
@@ -120,112 +119,146 @@ class GenericScraper(BaseScraper):
             })
             if len(out) >= max_hits:
                 break
+        return out
+
+    def _page_urls(self, scan, final_url: str) -> List[str]:
+        """
+        Pages 2..GENERIC_MAX_PAGES built from the ?page=N or /jobs/page/N
+        links on the first page (the most common pattern wins).
+        """
+        templates: Dict[str, int] = {}
+        host = urlparse(final_url).netloc
+        for href, _text in scan.anchors:
+            full = urljoin(final_url, unescape(href or "").strip())
+            m = PAGE_NUM_RE.search(full)
+            if not m or urlparse(full).netloc != host:
+                continue
+            # a placeholder, not str.format: URLs may carry literal braces (?q={x})
+            tpl = full[:m.start("n")] + _PAGE_SLOT + full[m.end("n"):]
+            templates[tpl] = templates.get(tpl, 0) + 1
+        if not templates:
+            return []
+        tpl = max(templates, key=templates.get)
+        current = final_url.rstrip("/")
+        pages = (tpl.replace(_PAGE_SLOT, str(n)) for n in range(2, GENERIC_MAX_PAGES + 1))
+        return [u for u in pages if u.rstrip("/") != current]
+
+    def _follow_pages(self, session, scan, final_url: str, out: List[Dict], terms, now, max_hits: int) -> List[Dict]:
+        """Following pages, a wave at a time; stops at the first wave without new postings."""
+        urls = self._page_urls(scan, final_url)
+        if not urls:
+            return []
+        seen = {h["apply_url"] for h in out}
+        extra: List[Dict] = []
+
+        def grab(url: str) -> List[Dict]:
+            got = self._get(session, url)
+            if not got:
+                return []
+            page_html, page_url = got
+            return self._anchor_hits(scan_html(page_html), page_url, terms, now, max_hits)
+
+        for wave in in_waves(grab, urls):
+            added = 0
+            for hits in wave:
+                for h in hits:
+                    if h["apply_url"] in seen:
+                        continue
+                    seen.add(h["apply_url"]); extra.append(h); added += 1
+            bump("generic.pages", len(wave))
+            if not added or len(out) + len(extra) >= max_hits:
+                break
+        else:
+            # every page up to GENERIC_MAX_PAGES still brought new postings
+            mark_partial("generic.max_pages")
+        return extra
 
+    def _json_hits(self, blobs, base_url: str, terms, now, max_hits: int, source: str = "generic-json") -> List[Dict]:
+        out: List[Dict] = []
 
-        if not out:
-            soup = None
+        def add_hit(title: str, url: str, source=source):
+            if not (title and url):
+                return
+            apply_url = urljoin(base_url, url.strip())
+            if not apply_url.startswith(("http://", "https://")):
+                return
+            lt = (title or "").lower()
+            lu = (url or "").lower()
+            looks_like_job = bool(JOB_URL_HINT.search(lu))
+            has_term = (not terms) or any(k in lt for k in terms) or any(k in lu for k in terms)
+            if not (looks_like_job or has_term):
+                return
+            out.append({
+                "title": _clean_text(title),
+                "apply_url": apply_url,
+                "source": source,
+                "snippet": None,
+                "category": categorize_title(title or ""),
+                "found_at": now,
+            })
+
+        def visit(node: dict) -> bool:
+            # 1) schema.org/JobPosting（ld+json）
+            typ = node.get("@type") or node.get("type")
+            if isinstance(typ, str) and "jobposting" in typ.lower():
+                t = node.get("title") or node.get("name")
+                u = node.get("url") or node.get("sameAs") or node.get("applicationUrl")
+                if t and u and isinstance(t, str) and isinstance(u, str):
+                    add_hit(t, u, source="generic-ldjson")
+
+            titles = [node.get(k) for k in ("title","jobTitle","name","positionTitle","postingTitle")]
+            urls   = [node.get(k) for k in ("absolute_url","url","applyUrl","jobUrl","canonicalPath","href","link","path")]
+            title = next((t for t in titles if isinstance(t, str) and t.strip()), None)
+            url   = next((u for u in urls   if isinstance(u, str) and u.strip()), None)
+            if title and url:
+                add_hit(title, url)
+            return len(out) >= max_hits
+
+        for blob in blobs:
             try:
-                soup = BeautifulSoup(html, "html.parser")
+                walk_json(blob, visit)
             except Exception:
-                soup = None
-
-            json_blobs = []
-
-            # <script type="application/json">...</script> and <script type="application/ld+json">...</script>
-            if soup is not None:
-                for s in soup.find_all("script", {"type": re.compile(r"^application/(ld\+)?json$", re.I)}):
-                    txt = (s.string or s.text or "").strip()
-                    if not txt:
-                        continue
-                    try:
-                        data = json.loads(txt)
-                   
-                        json_blobs.append(data)
-                    except Exception:
-                
-                        last = txt.rfind("}")
-                        if last > 0:
-                            try:
-                                json_blobs.append(json.loads(txt[:last+1]))
-                            except Exception:
-                                pass
-
-          
-                text_all = html
-                for pat in (
-                    r'__NEXT_DATA__\s*=\s*(\{.*?\})',
-                    r'__NUXT__\s*=\s*(\{.*?\})',
-                    r'__INITIAL_STATE__\s*=\s*(\{.*?\})',
-                    r'__APOLLO_STATE__\s*=\s*(\{.*?\})',
-                ):
-                    for m in re.finditer(pat, text_all, re.I | re.S):
-                        blob = m.group(1)
-                        if not blob:
-                            continue
-                        try:
-                            json_blobs.append(json.loads(blob))
-                        except Exception:
-                            last = blob.rfind("}")
-                            if last > 0:
-                                try:
-                                    json_blobs.append(json.loads(blob[:last+1]))
-                                except Exception:
-                                    pass
-
-            def add_hit(title: str, url: str, source="generic-json"):
-                if not (title and url):
-                    return
-                apply_url = urljoin(final_url, url.strip())
-                if not apply_url.startswith(("http://", "https://")):
-                    return
-                lt = (title or "").lower()
-                lu = (url or "").lower()
-                looks_like_job = bool(JOB_URL_HINT.search(lu))
-                has_term = (not terms) or any(k in lt for k in terms) or any(k in lu for k in terms)
-                if not (looks_like_job or has_term):
-                    return
-                out.append({
-                    "title": _clean_text(title),
-                    "apply_url": apply_url,
-                    "source": source,
-                    "snippet": None,
-                    "category": categorize_title(title or ""),
-                    "found_at": now,
-                })
-
-            def walk(node):
-                if isinstance(node, dict):
-                    # 1) schema.org/JobPosting（ld+json）
-                    typ = node.get("@type") or node.get("type")
-                    if isinstance(typ, str) and "jobposting" in typ.lower():
-                        t = node.get("title") or node.get("name")
-                        u = node.get("url") or node.get("sameAs") or node.get("applicationUrl")
-                        if t and u:
-                            add_hit(t, u, source="generic-ldjson")
-
-
-                    titles = [node.get(k) for k in ("title","jobTitle","name","positionTitle","postingTitle")]
-                    urls   = [node.get(k) for k in ("absolute_url","url","applyUrl","jobUrl","canonicalPath","href","link","path")]
-                    title = next((t for t in titles if isinstance(t, str) and t.strip()), None)
-                    url   = next((u for u in urls   if isinstance(u, str) and u.strip()), None)
-                    if title and url:
-                        add_hit(title, url)
-
-                    for v in node.values():
-                        walk(v)
-                elif isinstance(node, list):
-                    for it in node:
-                        walk(it)
-
-            for blob in json_blobs:
-                try:
-                    walk(blob)
-                except Exception:
-                    continue
-                if len(out) >= max_hits:
-                    break
-
+                continue
+            if len(out) >= max_hits:
+                break
+        return out
 
+    def _get_json(self, session, url: str):
+        try:
+            with host_slot(url):
+                r = session.get(url, timeout=int(os.getenv("HTTP_TIMEOUT", "12")), headers={"Accept": "application/json"})
+            bump("generic.api_requests")
+            if r.status_code != 200:
+                return None
+            text = r.text or ""
+            if "json" not in r.headers.get("content-type", "") and not text.lstrip().startswith(("{", "[")):
+                return None
+            return load_blob(text)
+        except Exception:
+            return None
+
+    def _api_hits(self, session, api: Dict, terms, now, max_hits: int) -> List[Dict]:
+        data = self._get_json(session, api["url"])
+        if data is None:
+            return []
+        return self._json_hits([data], api.get("base") or api["url"], terms, now, max_hits, source="generic-api")
+
+    def _discover_api(self, session, company, html: str, scan, final_url: str, terms, now, max_hits: int) -> List[Dict]:
+        """Validate endpoint candidates from the page's scripts; remember the first one that yields jobs."""
+        if cache_get(company, "generic.api_none", ttl_hours=GENERIC_API_RETRY_HOURS):
+            return []
+        for url in endpoint_candidates(html, scan, final_url, limit=GENERIC_API_PROBES):
+            api = {"url": url, "base": final_url}
+            hits = self._api_hits(session, api, terms, now, max_hits)
+            if hits:
+                vlog(f"[GENERIC] {getattr(company, 'name', '')} json api={url}")
+                bump("generic.api_discovered")
+                cache_set(company, "generic.api", api)
+                return hits
+        cache_set(company, "generic.api_none", True)
+        return []
+
+    def _dedup(self, out: List[Dict], max_hits: int) -> List[Dict]:
         seen = set(); dedup = []
         for h in out:
             if h["apply_url"] in seen:
@@ -233,5 +266,73 @@ class GenericScraper(BaseScraper):
             seen.add(h["apply_url"]); dedup.append(h)
             if len(dedup) >= max_hits:
                 break
-
         return dedup
+
+    def fetch(self, company, session) -> List[Dict]:
+        out: List[Dict] = []
+
+        
+        base_url = getattr(company, "data_query_url", None) \
+        or getattr(company, "careers_url", None) \
+        or getattr(company, "homepage_url", None)
+
+        if not base_url:
+            return out
+
+        terms = set([k.lower() for k in anchor_hints(KEY_HINTS)] + _terms_from_env())
+        max_hits = int(os.getenv("GENERIC_MAX_HITS", "500"))
+        now = timezone.now()
+
+        # a JSON endpoint found on an earlier run replaces the HTML download entirely
+        api = cache_get(company, "generic.api")
+        if api and not allowed_endpoint(api["url"], api.get("base") or base_url):
+            cache_drop(company, "generic.api")   # remembered before probes were held to the site's domain
+            api = None
+        if api:
+            hits = self._api_hits(session, api, terms, now, max_hits)
+            if hits:
+                bump("generic.api_direct")
+                if len(hits) >= max_hits:
+                    mark_partial("generic.max_hits")
+                return self._dedup(hits, max_hits)
+            cache_drop(company, "generic.api")
+
+        got = self._get(session, base_url)
+        if not got:
+            return out
+        html, final_url = got
+
+        # one pass collects anchors, JSON scripts and state blobs together
+        scan = scan_html(html)
+        out = self._anchor_hits(scan, final_url, terms, now, max_hits)
+
+        # opt-in: custom careers sites that paginate with ?page=N or /jobs/page/N
+        if out and GENERIC_PAGINATE and len(out) < max_hits:
+            out.extend(self._follow_pages(session, scan, final_url, out, terms, now, max_hits))
+        elif out and self._page_urls(scan, final_url):
+            mark_partial("generic.unpaginated")
+
+
+        if not out:
+            def iter_blobs():
+                # parsed lazily, so blobs after the hit cap are never decoded
+                # <script type="application/json">...</script> and <script type="application/ld+json">...</script>
+                for txt in scan.json_scripts:
+                    data = load_blob(txt)
+                    if data is not None:
+                        yield data
+                # window.__NEXT_DATA__ / __NUXT__ / __INITIAL_STATE__ / __APOLLO_STATE__ = {...}
+                for _name, text in scan.state_blobs:
+                    data = load_blob(text)
+                    if data is not None:
+                        yield data
+
+            out = self._json_hits(iter_blobs(), final_url, terms, now, max_hits)
+
+        # opt-in: still nothing, so the listing is probably loaded by XHR; look for that endpoint once
+        if not out and GENERIC_DISCOVER_API:
+            out = self._discover_api(session, company, html, scan, final_url, terms, now, max_hits)
+
+        if len(out) >= max_hits:
+            mark_partial("generic.max_hits")
+        return self._dedup(out, max_hits)
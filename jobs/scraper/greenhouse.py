@@ -1,15 +1,18 @@
 # jobs/scraper/greenhouse.py
 from __future__ import annotations
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from urllib.parse import urlparse, urljoin
 import re, json
 from .base import vlog
 from .base import BaseScraper, categorize_title
+from .coverage import mark_partial
+from .jsonstream import iter_array_items, STREAM_CHUNK
 
 GH_FOR_RE   = re.compile(r"[?&]for=([a-z0-9\-_]+)", re.I)
 GH_DATA_RE  = re.compile(r'data-gh-(?:for|org)\s*=\s*["\']([a-z0-9\-_]+)["\']', re.I)
 GH_LINK_RE  = re.compile(r'https?://boards\.greenhouse\.io/(?:embed/)?([a-z0-9\-_]+)(?:/|["\'?])', re.I)
 PROBE_PATHS = ("/careers/jobs", "/careers", "/jobs", "/search")
+GH_FIELDS   = ("title", "absolute_url", "url", "location")
 
 class GreenhouseScraper(BaseScraper):
     name = "greenhouse-api"
@@ -75,11 +78,12 @@ class GreenhouseScraper(BaseScraper):
 
     def _api_ok(self, session, token: str) -> bool:
         try:
-            r = session.get(f"https://boards-api.greenhouse.io/v1/boards/{token}/jobs?content=true", timeout=8)
-            if r.status_code != 200:
-                return False
-            j = r.json()
-            return isinstance(j, dict) and "jobs" in j
+            with session.get(f"https://boards-api.greenhouse.io/v1/boards/{token}/jobs", timeout=8, stream=True) as r:
+                if r.status_code != 200:
+                    return False
+                # a valid board starts with {"jobs": ...}; no need to read the rest
+                head = next(r.iter_content(1024), b"") or b""
+                return b'"jobs"' in head
         except Exception:
             return False
 
@@ -112,10 +116,9 @@ class GreenhouseScraper(BaseScraper):
 
         return None
 
-    def fetch(self, company, session) -> List[Dict]:
-        out: List[Dict] = []
+    def iter_hits(self, company, session=None) -> Iterator[Dict]:
         if not getattr(company, "careers_url", None):
-            return out
+            return
 
         token = self._board_token(company, session=session)
         try:
@@ -123,31 +126,36 @@ class GreenhouseScraper(BaseScraper):
         except Exception:
             pass
         if not token:
-            return out
+            return
 
-        api = f"https://boards-api.greenhouse.io/v1/boards/{token}/jobs?content=true"
+        # no content=true: we never use the descriptions, and the array is streamed
+        api = f"https://boards-api.greenhouse.io/v1/boards/{token}/jobs"
+        seen = set()
         try:
-            r = session.get(api, timeout=12, headers={"User-Agent": "Mozilla/5.0"})
-            if r.status_code != 200:
-                return out
-            data = r.json() or {}
+            with session.get(api, timeout=12, headers={"User-Agent": "Mozilla/5.0"}, stream=True) as r:
+                if r.status_code != 200:
+                    mark_partial("greenhouse.error", error=True)
+                    return
+                # the title check runs on the decoded posting, before it is trimmed or turned into a hit
+                wanted = lambda j: isinstance(j, dict) and self.accept_title(j.get("title") or "")
+                for j in iter_array_items(r.iter_content(STREAM_CHUNK), key="jobs", fields=GH_FIELDS, where=wanted):
+                    title = (j.get("title") or "").strip()
+                    url = (j.get("absolute_url") or j.get("url") or "").strip()
+                    if not title or not url or url in seen:
+                        continue
+                    seen.add(url)
+                    cat = categorize_title(title)
+                    yield {
+                        "title": title,
+                        "apply_url": url,
+                        "source": self.name,
+                        "snippet": None,
+                        "category": cat,
+                        "location": (j.get("location") or {}).get("name") if isinstance(j.get("location"), dict) else None,
+                    }
         except Exception:
-            return out
+            mark_partial("greenhouse.error", error=True)
+            return
 
-        jobs = data.get("jobs") or []
-        seen = set()
-        for j in jobs:
-            title = (j.get("title") or "").strip()
-            url = (j.get("absolute_url") or j.get("url") or "").strip()
-            if not title or not url or url in seen:
-                continue
-            seen.add(url)
-            cat = categorize_title(title)
-            out.append({
-                "title": title,
-                "apply_url": url,
-                "source": self.name,
-                "snippet": None,
-                "category": cat,
-            })
-        return out
+    def fetch(self, company, session=None) -> List[Dict]:
+        return list(self.iter_hits(company, session))
@@ -0,0 +1,92 @@
+# jobs/scraper/htmlscan.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import re
+
+# One forward pass over a careers page that collects everything
+# GenericScraper looks at: anchors, JSON <script> blocks and the
+# window.__NEXT_DATA__ / __NUXT__ / ... state assignments. No tree is built.
+# The loop jumps from one <a / <script start to the next and never rescans
+# text it has moved past, so the cost stays linear even on pages full of
+# unterminated tags: a start tag is read up to its ">" with quoted values
+# taken whole (a ">" inside one does not end the tag), and a tag that never
+# closes ends the scan, the way a browser swallows the rest of the page into
+# it. An anchor's inner html runs to </a> or the next <a>.
+
+STATE_NAMES = ("__NEXT_DATA__", "__NUXT__", "__INITIAL_STATE__", "__APOLLO_STATE__")
+
+# A tag start, the rest of the start tag with quoted values taken whole and, for
+# an anchor, its inner html up to </a> or the next <a>. The empty alternatives
+# keep a tag that never closes a match (attrs=None) instead of a retry at the
+# next "<a", which is what made unterminated tags quadratic.
+_HEAD = r"""[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*"""
+_TAG_RE = re.compile(
+    r"<(?:a(?=[\s/>])(?:(?P<attrs>" + _HEAD + r")>(?P<a_body>[^<]*(?:<(?!/a\s*>|a[\s>])[^<]*)*)(?P<a_end></a\s*>)?|)"
+    r"|script(?=[\s/>])(?:(?P<s_attrs>" + _HEAD + r")>|))",
+    re.I,
+)
+# an attribute named exactly `name`, never text inside another attribute's quoted value
+_ATTR = r"""(?:[^>"']|"[^"]*"|'[^']*')*?(?<![\w-])%s\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))"""
+_HREF_RE = re.compile(_ATTR % "href", re.I)
+_TYPE_RE = re.compile(_ATTR % "type", re.I)
+_SCRIPT_END_RE = re.compile(r"</script\s*>", re.I)
+_JSON_TYPE_RE = re.compile(r"^application/(ld\+)?json$", re.I)
+_STATE_RE = re.compile(r"(%s)\s*=\s*" % "|".join(STATE_NAMES), re.I)
+
+
+@dataclass
+class HtmlScan:
+    anchors: List[Tuple[str, str]] = field(default_factory=list)   # (href, inner html)
+    json_scripts: List[str] = field(default_factory=list)          # bodies of application/(ld+)json scripts
+    state_blobs: List[Tuple[str, str]] = field(default_factory=list)  # (state name, text after "name =")
+    script_spans: List[Tuple[int, int]] = field(default_factory=list)  # (start, end) of every inline script body
+
+
+def _attr(regex, attrs: str) -> Optional[str]:
+    m = regex.match(attrs)
+    if not m:
+        return None
+    return next((g for g in m.groups() if g is not None), None)
+
+
+def scan_html(html: str) -> HtmlScan:
+    out = HtmlScan()
+    html = html or ""
+    pos, n = 0, len(html)
+    while pos < n:
+        m = _TAG_RE.search(html, pos)
+        if not m:
+            break
+        attrs = m.group("attrs")
+        if attrs is not None:
+            # an unclosed <a> ends where the next one starts
+            hm = _HREF_RE.match(attrs)
+            if hm:
+                h1, h2, h3 = hm.groups()
+                href = h1 if h1 is not None else h2 if h2 is not None else h3
+            if hm and href:
+                out.anchors.append((href, m.group("a_body")))
+            pos = m.end()
+            continue
+        attrs = m.group("s_attrs")
+        if attrs is None:
+            break   # the tag never closes: everything after it is inside it
+
+        end = _SCRIPT_END_RE.search(html, m.end())
+        stop = end.start() if end else n
+        body = html[m.end():stop]
+        pos = end.end() if end else n
+        if body:
+            out.script_spans.append((m.end(), stop))
+        typ = (_attr(_TYPE_RE, attrs) or "").strip()
+        if typ and _JSON_TYPE_RE.match(typ):
+            body = body.strip()
+            if body:
+                out.json_scripts.append(body)
+            continue
+        if "__" not in body:
+            continue
+        for sm in _STATE_RE.finditer(body):
+            out.state_blobs.append((sm.group(1), body[sm.end():]))
+    return out
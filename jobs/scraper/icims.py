@@ -1,9 +1,18 @@
 from __future__ import annotations
 from typing import List, Dict, Tuple
 from urllib.parse import urlparse, urlunparse, urlencode
-from .keywords import KEYWORDS, KEY_SUBSTRINGS
-import re, requests
-from bs4 import BeautifulSoup
+from .keywords import search_keywords
+from .titles import keep_title
+from .base import vlog
+from .coverage import mark_partial
+from .pool import host_slot, in_waves, race_session
+from .planner import plan_terms, learn_terms, plan_missed
+from .stats import bump
+import os, re, requests
+
+ICIMS_MAX_PAGES = int(os.getenv("ICIMS_MAX_PAGES", "3"))
+ICIMS_KW_PARALLEL = int(os.getenv("ICIMS_KW_PARALLEL", "4"))
+ICIMS_MAX_HITS = 300
 
 def _tenant_host(netloc: str) -> str:
     host = netloc.lower()
@@ -11,10 +20,6 @@ def _tenant_host(netloc: str) -> str:
     host = re.sub(r"^(?:careers\-|jobs\-)", "", host)
     return host
 
-def _keep(t: str) -> bool:
-    t = (t or "").lower()
-    return any(k in t for k in KEY_SUBSTRINGS)
-
 def _brand_from_host(host: str) -> str | None:
     """
     careers.heb.com -> heb
@@ -41,83 +46,118 @@ class ICIMSScraper:
 
         return f"{scheme}://{host}/jobs/search?ss=1"
 
+    def _parse_page(self, html: str, page_url: str) -> Tuple[List[Dict], bool]:
+        """One parse per page: job anchors plus whether a Next link exists."""
+        from bs4 import BeautifulSoup  # imported on first parse, not at module import
+        soup = BeautifulSoup(html, "html.parser")
+        out=[]; seen=set()
+        for a in soup.select('a.iCIMS_Anchor[href*="/jobs/"], a[href*="/jobs/"]'):
+            t = a.get_text(" ", strip=True) or ""
+            href = a.get("href") or ""
+            if not href or not keep_title(t):
+                continue
+            if href.startswith("http"):
+                full = href
+            else:
+                base = page_url.split("/jobs/")[0]
+                full = f"{base}/jobs/{href.split('/jobs/')[-1]}"
+            if full in seen:
+                continue
+            seen.add(full)
+            out.append({"title": t or "Data Scientist", "apply_url": full, "source":"icims-html", "snippet": None})
+        has_next = bool(soup.select_one('a[aria-label="Next"], a[rel="next"]'))
+        return out, has_next
+
+    def _crawl_keyword(self, s: requests.Session, search: str, kw: str) -> Tuple[List[Dict], int, int]:
+        """Walk one keyword's result pages; returns (hits, requests, parses)."""
+        out: List[Dict] = []
+        reqs = parses = 0
+        for page in range(1, ICIMS_MAX_PAGES + 1):
+            try:
+                with host_slot(search):
+                    r = s.get(
+                        search,
+                        params={"searchKeyword": kw, "searchLocation":"", "ss":"1", "pr": str(page)},
+                        timeout=12
+                    )
+                reqs += 1
+                if r.status_code != 200:
+                    # on page 1 this is usually a guessed tenant that does not exist
+                    if page > 1:
+                        mark_partial("icims.error", error=True)
+                    break
+                batch, has_next = self._parse_page(r.text, r.url)
+                parses += 1
+            except Exception:
+                if page > 1:
+                    mark_partial("icims.error", error=True)
+                break
+            if not batch:
+                break
+            out.extend(batch)
+            if not has_next:
+                break
+        else:
+            mark_partial("icims.max_pages")
+        return out, reqs, parses
+
     def fetch(self, company, _session) -> List[Dict]:
         out: List[Dict] = []
         if not company.careers_url:
             return out
 
-        s = requests.Session()
+        s = race_session(requests.Session())
         s.headers.update({"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"})
 
         search = self._search_url(company.careers_url)
 
-        def _parse_listing(url: str) -> List[Dict]:
-            try:
-                r = s.get(url, timeout=12)
-                if r.status_code != 200:
-                    return []
-                soup = BeautifulSoup(r.text, "html.parser")
-                tmp=[]
-
-                anchors = soup.select('a.iCIMS_Anchor[href*="/jobs/"], a[href*="/jobs/"]')
-                for a in anchors:
-                    t = a.get_text(" ", strip=True) or ""
-                    href = a.get("href") or ""
-                    if not href or not _keep(t):
+        # a learned plan issues only the terms that found something last time;
+        # exploring runs go through the whole list and record what each term found
+        pool = search_keywords()
+        terms, exploring = plan_terms(company, "icims", pool)
+        collected=[]; seen=set(); found={}
+        reqs = parses = 0
+        issued = 0
+        crawl = lambda kw: (kw, *self._crawl_keyword(s, search, kw))
+        for wave in in_waves(crawl, terms, ICIMS_KW_PARALLEL):
+            issued += len(wave)
+            for kw, batch, n_req, n_parse in wave:
+                reqs += n_req; parses += n_parse
+                found[kw] = [h["apply_url"] for h in batch]
+                for h in batch:
+                    if h["apply_url"] in seen:
                         continue
-                    if href.startswith("http"):
-                        full = href
-                    else:
-                        base = r.url.split("/jobs/")[0]
-                        full = f"{base}/jobs/{href.split('/jobs/')[-1]}"
-                    tmp.append({"title": t or "Data Scientist", "apply_url": full, "source":"icims-html", "snippet": None})
-
-                seen=set(); dedup=[]
-                for h in tmp:
-                    if h["apply_url"] in seen: 
-                        continue
-                    seen.add(h["apply_url"]); dedup.append(h)
-                return dedup
-            except Exception:
-                return []
+                    seen.add(h["apply_url"]); collected.append(h)
+            # stop after the first wave that yields hits, unless this run has to
+            # see every term's results to learn a plan from them
+            if collected and not exploring:
+                if issued < len(terms):
+                    mark_partial("icims.cutoff")
+                break
 
-        collected=[]
-        for kw in KEYWORDS:
-            page = 1
-            for _ in range(3):
-                try:
-                    r = s.get(
-                        search,
-                        params={"searchKeyword": kw, "searchLocation":"", "ss":"1", "pr": str(page)},
-                        timeout=12
-                    )
-                    if r.status_code != 200:
-                        break
-                    batch = _parse_listing(r.url)
-                    if not batch:
-                        break
-                    collected.extend(batch)
+        if exploring:
+            learn_terms(company, "icims", pool, found)
+        elif not collected:
+            plan_missed(company, "icims")
 
-                    soup = BeautifulSoup(r.text, "html.parser")
-                    has_next = bool(soup.select_one('a[aria-label="Next"], a[rel="next"]'))
-                    if not has_next:
-                        break
-                    page += 1
-                except Exception:
-                    break
-            if collected:
-                break
+        bump("icims.requests", reqs)
+        bump("icims.parses", parses)
+        vlog(f"[ICIMS] {getattr(company, 'name', '')} requests={reqs} parses={parses} hits={len(collected)}")
 
         if collected:
-
-            return collected[:300]
+            if len(collected) > ICIMS_MAX_HITS:
+                mark_partial("icims.max_hits")
+            return collected[:ICIMS_MAX_HITS]
 
         dq = getattr(company, "data_query_url", None)
         if dq:
             try:
                 r = s.get(dq, timeout=12)
+                bump("icims.requests")
                 if r.status_code == 200:
+                    from bs4 import BeautifulSoup
                     soup = BeautifulSoup(r.text, "html.parser")
+                    bump("icims.parses")
                     tmp=[]
                     for a in soup.select('a[href]'):
                         t = a.get_text(" ", strip=True) or ""
@@ -125,7 +165,7 @@ class ICIMSScraper:
                         if not href: 
                             continue
                         low = t.lower() + " " + href.lower()
-                        if not _keep(low):
+                        if not keep_title(low):
                             continue
                         full = href if href.startswith("http") else r.url.split("?")[0].rstrip("/") + "/" + href.lstrip("/")
                         tmp.append({"title": t or "Data Scientist", "apply_url": full, "source":"icims-fallback", "snippet": None})
@@ -134,9 +174,10 @@ class ICIMSScraper:
                         if h["apply_url"] in seen: 
                             continue
                         seen.add(h["apply_url"]); dedup.append(h)
+                    # an unpaginated result page: what is past it was never seen
+                    mark_partial("icims.fallback_page")
                     return dedup[:200]
             except Exception:
                 pass
 
         return out
-
@@ -0,0 +1,168 @@
+# jobs/scraper/jsonstream.py
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+import codecs, json, re
+
+# Incremental reader for board APIs that return one big JSON array
+# (Lever: top-level list, Greenhouse: {"jobs": [...]}). Postings are decoded
+# one at a time from a rolling buffer, so memory stays at roughly one posting
+# plus one network chunk no matter how large the board is. A stream that ends
+# early or is not the expected shape raises ValueError, so callers can mark
+# the scrape partial instead of treating a cut-off listing as the whole board.
+
+STREAM_CHUNK = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WS = " \t\r\n"
+# where a bare number / true / false / null ends; one that runs to the end of
+# the buffer may continue in the next chunk
+_SCALAR_END = re.compile(r"[\s,\]\}]")
+
+
+def _project(item: Any, fields: Optional[Sequence[str]]) -> Any:
+    if fields is None or not isinstance(item, dict):
+        return item
+    return {k: item[k] for k in fields if k in item}
+
+
+def iter_array_items(
+    chunks: Iterable[bytes],
+    key: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    where: Optional[Callable[[Any], bool]] = None,
+) -> Iterator[Dict]:
+    """
+    Yield the elements of a JSON array read from byte chunks.
+    key=None expects the array at the top level; otherwise the array is the
+    `key` member of the top-level object (nested members of the same name
+    are skipped). `where` drops elements as soon as they are decoded;
+    `fields` trims the survivors to the keys we actually use before they are
+    handed out. Raises ValueError on truncated or malformed input.
+    """
+    it = iter(chunks)
+    dec = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buf = ""
+    eof = False
+
+    def more() -> bool:
+        nonlocal buf, eof
+        for chunk in it:
+            if chunk:
+                buf += dec.decode(chunk)
+                return True
+        if not eof:
+            buf += dec.decode(b"", final=True)
+            eof = True
+        return False
+
+    def skip_ws(pos: int) -> int:
+        while True:
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            if pos < len(buf) or not more():
+                return pos
+
+    def value(pos: int) -> Tuple[Any, int]:
+        while True:
+            if pos >= len(buf):
+                if not more():
+                    raise ValueError("JSON stream ends early")
+                continue
+            if buf[pos] not in '{["':
+                m = _SCALAR_END.search(buf, pos)
+                if m is None and more():
+                    continue
+                stop = m.start() if m else len(buf)
+                try:
+                    item, end = _decoder.raw_decode(buf, pos)
+                except ValueError:
+                    end = -1
+                if end != stop:
+                    raise ValueError(f"bad JSON value {buf[pos:stop][:40]!r}")
+                return item, end
+            try:
+                return _decoder.raw_decode(buf, pos)
+            except ValueError:
+                # an element split across chunks; at the end of the stream it never closes
+                if not more():
+                    raise ValueError("JSON stream ends early") from None
+
+    def skip_value(pos: int) -> int:
+        # step over one member value without decoding it, dropping the text as we go
+        nonlocal buf
+        depth = 0
+        in_str = esc = False
+        while True:
+            while pos < len(buf):
+                c = buf[pos]
+                if in_str:
+                    if esc:
+                        esc = False
+                    elif c == "\\":
+                        esc = True
+                    elif c == '"':
+                        in_str = False
+                        if not depth:
+                            return pos + 1
+                elif c == '"':
+                    in_str = True
+                elif c in "{[":
+                    depth += 1
+                elif c in "}]":
+                    if not depth:
+                        return pos
+                    depth -= 1
+                    if not depth:
+                        return pos + 1
+                elif c == "," and not depth:
+                    return pos
+                pos += 1
+            buf, pos = buf[pos:], 0
+            if not more():
+                raise ValueError("JSON stream ends early")
+
+    # 1) find the opening bracket of the array
+    pos = skip_ws(0)
+    if key is None:
+        if buf[pos:pos + 1] != "[":
+            raise ValueError("expected a JSON array")
+        pos += 1
+    else:
+        if buf[pos:pos + 1] != "{":
+            raise ValueError(f"expected a JSON object with a {key!r} array")
+        pos += 1
+        while True:
+            pos = skip_ws(pos)
+            if buf[pos:pos + 1] == ",":
+                pos = skip_ws(pos + 1)
+            if buf[pos:pos + 1] == "}":
+                raise ValueError(f"no {key!r} array in the JSON object")
+            name, pos = value(pos)
+            pos = skip_ws(pos)
+            if not isinstance(name, str) or buf[pos:pos + 1] != ":":
+                raise ValueError("bad JSON object member")
+            pos = skip_ws(pos + 1)
+            if name == key and buf[pos:pos + 1] == "[":
+                pos += 1
+                break
+            pos = skip_value(pos)
+            buf, pos = buf[pos:], 0
+
+    # 2) decode elements one by one, dropping consumed text as we go
+    first = True
+    while True:
+        pos = skip_ws(pos)
+        c = buf[pos:pos + 1]
+        if not c:
+            raise ValueError("JSON array ends early")
+        if c == "]":
+            return
+        if not first:
+            if c != ",":
+                raise ValueError(f"unexpected {c!r} between JSON array elements")
+            pos = skip_ws(pos + 1)
+        item, end = value(pos)
+        first = False
+        buf, pos = buf[end:], 0
+        if where is None or where(item):
+            yield _project(item, fields)
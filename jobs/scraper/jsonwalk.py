@@ -0,0 +1,71 @@
+# jobs/scraper/jsonwalk.py
+from __future__ import annotations
+from typing import Any, Callable
+import json, os
+
+# Bounded helpers for the JSON state embedded in careers pages
+# (Next.js / Nuxt / Apollo blobs can run to many MB).
+
+GENERIC_MAX_BLOB = int(os.getenv("GENERIC_MAX_BLOB", str(8 * 1024 * 1024)))  # chars
+GENERIC_MAX_DEPTH = int(os.getenv("GENERIC_MAX_DEPTH", "40"))
+GENERIC_MAX_NODES = int(os.getenv("GENERIC_MAX_NODES", "200000"))
+
+_decoder = json.JSONDecoder()
+
+
+def load_blob(text: str, start: int = 0, max_len: int = GENERIC_MAX_BLOB) -> Any:
+    """
+    Decode the {...} / [...] literal that begins at the first non-space char
+    from `start`. raw_decode stops at the matching closing bracket, so
+    trailing script (`;window.x = ...`) is ignored and nothing is re-parsed.
+    None when there is no literal there, it is not JSON, or it runs past max_len.
+    """
+    n = len(text or "")
+    i = start
+    while i < n and text[i] in " \t\r\n":
+        i += 1
+    if i >= n or text[i] not in "{[":
+        return None
+    if n - i > max_len:
+        text = text[i:i + max_len]
+        i = 0
+    try:
+        obj, _end = _decoder.raw_decode(text, i)
+    except ValueError:
+        return None
+    return obj
+
+
+def walk_json(
+    root: Any,
+    visit: Callable[[dict], bool],
+    max_depth: int = GENERIC_MAX_DEPTH,
+    max_nodes: int = GENERIC_MAX_NODES,
+) -> int:
+    """
+    Depth-first over dicts/lists without recursion. visit(dict) returning
+    True stops the walk; subtrees below max_depth are skipped and the walk
+    ends after max_nodes containers. Returns the number of containers seen.
+    """
+    stack = [(root, 0)]
+    seen = 0
+    while stack:
+        if seen >= max_nodes:
+            break
+        node, depth = stack.pop()
+        seen += 1
+        if isinstance(node, dict):
+            if visit(node):
+                break
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            continue
+        if depth >= max_depth:
+            continue
+        # reversed keeps document order when popping
+        for v in reversed(list(children)):
+            if isinstance(v, (dict, list)):
+                stack.append((v, depth + 1))
+    return seen
@@ -6,4 +6,46 @@ KEYWORDS = [
     "data scientist intern", "data science intern", "data analyst intern",
     "machine learning analyst",
 ]
-KEY_SUBSTRINGS = [k.lower() for k in KEYWORDS]
+
+# Whitelist phrase -> category, highest precedence first: a title matching
+# several phrases gets the category of the earliest one (so "ML Engineer /
+# Data Scientist" is a Data Engineer). Titles that also say "intern" go to
+# Data Analyst when they mention "analyst" and Data Scientist otherwise.
+# Compiled by jobs.scraper.titles.
+TITLE_RULES = [
+    ("machine learning analyst", "Data Scientist"),
+
+    ("data engineer", "Data Engineer"),
+    ("machine learning engineer", "Data Engineer"),
+    ("ml engineer", "Data Engineer"),
+
+    ("data scientist", "Data Scientist"),
+    ("applied scientist", "Data Scientist"),
+    ("ml scientist", "Data Scientist"),
+    ("machine learning scientist", "Data Scientist"),
+    ("data science intern", "Data Scientist"),
+
+    ("data analyst", "Data Analyst"),
+    ("data analytics", "Data Analyst"),
+    ("business intelligence", "Data Analyst"),
+    ("bi analyst", "Data Analyst"),
+]
+
+# Runtime overrides loaded from the admin-editable TaxonomyTerm table
+# (jobs/taxonomy.py). None means the built-in list above is in effect;
+# readers go through the accessors so a reload reaches modules that were
+# imported long before it.
+_overrides = {"search": None, "hint": None}
+
+
+def search_keywords():
+    return _overrides["search"] or KEYWORDS
+
+
+def anchor_hints(default):
+    return _overrides["hint"] or default
+
+
+def set_overrides(search=None, hint=None):
+    _overrides["search"] = list(search) if search else None
+    _overrides["hint"] = list(hint) if hint else None
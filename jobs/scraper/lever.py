@@ -1,18 +1,18 @@
 from __future__ import annotations
-from typing import List, Dict
+from typing import Dict, Iterator, List
 from urllib.parse import urlparse
-from .keywords import KEY_SUBSTRINGS
+from .titles import keep_title
+from .jsonstream import iter_array_items, STREAM_CHUNK
+from .coverage import mark_partial
 import requests
 
-def handles(self, url_or_company) -> bool:
-    url = getattr(url_or_company, "careers_url", url_or_company) or ""
-    return ("lever.co" in url.lower()) or (getattr(url_or_company, "ats_type", "") == "lever")
-
-def _keep(title: str) -> bool:
-    t = (title or "").lower()
-    return any(k in t for k in KEY_SUBSTRINGS)
+LEVER_FIELDS = ("text", "title", "hostedUrl", "applyUrl", "url", "categories")
 
 class LeverScraper:
+    def handles(self, url_or_company) -> bool:
+        url = getattr(url_or_company, "careers_url", url_or_company) or ""
+        return ("lever.co" in url.lower()) or (getattr(url_or_company, "ats_type", "") == "lever")
+
     def _org(self, url: str) -> str|None:
         u = urlparse(url or "")
         parts = [p for p in u.path.split("/") if p]
@@ -20,26 +20,28 @@ class LeverScraper:
             return parts[0]
         return None
 
-    def fetch(self, company, session) -> List[Dict]:
-        out: List[Dict] = []
+    def iter_hits(self, company, session) -> Iterator[Dict]:
         org = self._org(company.careers_url or "")
-        if not org: return out
+        if not org: return
         api = f"https://api.lever.co/v0/postings/{org}?mode=json"
+        seen = set()
         try:
-            r = session.get(api, timeout=10)
-            if r.status_code != 200: return out
-            posts = r.json() or []
-            for p in posts:
-                title = (p.get("text") or p.get("title") or "").strip()
-                if not _keep(title):
-                    continue
-                url = p.get("hostedUrl") or p.get("applyUrl") or p.get("url")
-                if not url: continue
-                out.append({"title": title, "apply_url": url, "source":"lever", "snippet": None})
+            # stream the posting array; each hit goes out as soon as it is decoded
+            with session.get(api, timeout=10, stream=True) as r:
+                if r.status_code != 200:
+                    mark_partial("lever.error", error=True)
+                    return
+                wanted = lambda p: isinstance(p, dict) and keep_title(p.get("text") or p.get("title") or "")
+                for p in iter_array_items(r.iter_content(STREAM_CHUNK), fields=LEVER_FIELDS, where=wanted):
+                    title = (p.get("text") or p.get("title") or "").strip()
+                    url = p.get("hostedUrl") or p.get("applyUrl") or p.get("url")
+                    if not url or url in seen: continue
+                    seen.add(url)
+                    loc = (p.get("categories") or {}).get("location") if isinstance(p.get("categories"), dict) else None
+                    yield {"title": title, "apply_url": url, "source":"lever", "snippet": None, "location": loc}
         except Exception:
-            return out
-        seen=set(); dedup=[]
-        for h in out:
-            if h["apply_url"] in seen: continue
-            seen.add(h["apply_url"]); dedup.append(h)
-        return dedup
+            mark_partial("lever.error", error=True)
+            return
+
+    def fetch(self, company, session) -> List[Dict]:
+        return list(self.iter_hits(company, session))
@@ -1,19 +1,38 @@
+# jobs/scraper/oracle.py
 from __future__ import annotations
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
-from .keywords import KEYWORDS, KEY_SUBSTRINGS
-import re, requests
-from bs4 import BeautifulSoup
+from .keywords import search_keywords
+from .titles import keep_title
+from .cache import cache_get, cache_set, cache_drop
+from .pool import host_slot, fan_out, in_waves, race_session
+from .planner import plan_terms, learn_terms, plan_missed
+from .coverage import mark_partial
+from .stats import bump
+import os, re, requests
 
-def _keep(t: str) -> bool:
-    t = (t or "").lower()
-    return any(k in t for k in KEY_SUBSTRINGS)
+ATS_MAX_KW = int(os.getenv("ATS_MAX_KW", "4"))
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "12"))
+ORC_PAGE_SIZE = int(os.getenv("ORC_PAGE_SIZE", "50"))
+ORC_MAX_PAGES = int(os.getenv("ORC_MAX_PAGES", "20"))
 
-def _log(*a): 
-    try: print(*a, flush=True)
-    except Exception: pass
+def _log(*a):
+    try:
+        if os.getenv("VERBOSE", "0") == "1":
+            print(*a, flush=True)
+    except Exception:
+        pass
 
 class OracleCloudScraper:
+    def handles(self, url_or_company) -> bool:
+        url = getattr(url_or_company, "data_query_url", None) or getattr(url_or_company, "careers_url", None) or str(url_or_company) or ""
+        u = urlparse(url.lower())
+        return (
+            u.netloc.endswith("oraclecloud.com")
+            or "/hcmui/" in u.path
+            or "/candidateexperience/" in u.path
+        )
+
     def _derive(self, careers_url: str) -> Tuple[str|None, str|None, str]:
         u = urlparse(careers_url or "")
         origin = f"{u.scheme}://{u.netloc}" if u.netloc else None
@@ -28,19 +47,97 @@ class OracleCloudScraper:
     def _api(self, origin: str, lang: str, site: str) -> str:
         return f"{origin}/hcmUI/CandidateExperience/{lang}/sites/{site}/requisitions"
 
+    def _resolve_site(self, s: requests.Session, company, base_url: str, site_default: str) -> str:
+        # the preheat GET only exists to learn the site id from the redirect; pay it once per company
+        cached = cache_get(company, "oracle.site")
+        if cached:
+            return cached
+        site = site_default
+        try:
+            pre = s.get(base_url, timeout=min(HTTP_TIMEOUT, 10))
+            bump("oracle.requests")
+            pre.raise_for_status()
+            site = self._site_from_preheat(pre.url, site)
+            cache_set(company, "oracle.site", site)
+        except Exception:
+            pass
+        return site
+
+    def _page_meta(self, data: dict) -> Tuple[list, Optional[int], bool]:
+        items = data.get("items") or data.get("requisitions") or data.get("data") or []
+        total = data.get("totalResults") or data.get("TotalJobsCount")
+        # finder-style payloads wrap the requisitions in items[0].requisitionList
+        if items and isinstance(items[0], dict) and "requisitionList" in items[0]:
+            wrap = items[0]
+            items = wrap.get("requisitionList") or []
+            total = total or wrap.get("TotalJobsCount")
+        try:
+            total = int(total) if total is not None else None
+        except (TypeError, ValueError):
+            total = None
+        has_more = bool(data.get("hasMore")) or (total is None and len(items) >= ORC_PAGE_SIZE)
+        return items, total, has_more
+
+    def _get_page(self, s: requests.Session, api: str, kw: str, offset: int) -> Tuple[int, dict]:
+        try:
+            with host_slot(api):
+                r = s.get(api, params={"keyword":kw,"limit":ORC_PAGE_SIZE,"offset":offset}, timeout=HTTP_TIMEOUT, headers={"Accept":"application/json"})
+            bump("oracle.requests")
+            _log("ORC api:", r.status_code, r.url)
+            if r.status_code == 200 and "application/json" in r.headers.get("content-type",""):
+                return r.status_code, r.json() or {}
+            return r.status_code, {}
+        except Exception:
+            return 0, {}
+
+    def _crawl_keyword(self, s: requests.Session, api: str, kw: str) -> Tuple[int, list]:
+        """First page sequentially (it doubles as the 404 probe), the rest concurrently."""
+        status, first = self._get_page(s, api, kw, 0)
+        if status != 200:
+            return status, []
+        items, total, has_more = self._page_meta(first)
+        out = list(items)
+        if not items:
+            return status, out
+
+        def page(off: int):
+            st, body = self._get_page(s, api, kw, off)
+            if st != 200:
+                mark_partial("oracle.error", error=True)
+            return self._page_meta(body)
+
+        if total is not None:
+            # total known up front: every remaining offset can go out at once
+            if total > ORC_PAGE_SIZE * ORC_MAX_PAGES:
+                mark_partial("oracle.max_pages")
+            offsets = range(ORC_PAGE_SIZE, min(total, ORC_PAGE_SIZE * ORC_MAX_PAGES), ORC_PAGE_SIZE)
+            for got, _, _ in fan_out(page, offsets):
+                out.extend(got)
+        elif has_more:
+            # only hasMore to go on: fetch a wave ahead, stop at the first short page
+            offsets = range(ORC_PAGE_SIZE, ORC_PAGE_SIZE * ORC_MAX_PAGES, ORC_PAGE_SIZE)
+            for wave in in_waves(page, offsets):
+                done = False
+                for got, _, more in wave:
+                    out.extend(got)
+                    done = done or not got or not more
+                if done:
+                    break
+            else:
+                mark_partial("oracle.max_pages")
+        return status, out
+
     def _collect(self, items, base_detail: str) -> List[Dict]:
         out=[]; seen=set()
         for it in items or []:
             title = (it.get("Title") or it.get("title") or it.get("PostingTitle") or "").strip()
-            if not title or not _keep(title):
+            if not title or not keep_title(title):
                 continue
             rid = it.get("Id") or it.get("RequisitionId") or it.get("IdValue")
             url = it.get("ExternalURL") or it.get("url")
             if not url and rid:
                 url = f"{base_detail}/{rid}"
-            if not url: 
-                continue
-            if url in seen: 
+            if not url or url in seen:
                 continue
             seen.add(url)
             out.append({"title": title, "apply_url": url, "source": "oracle-api", "snippet": None})
@@ -48,49 +145,74 @@ class OracleCloudScraper:
 
     def fetch(self, company, _session) -> List[Dict]:
         out: List[Dict] = []
-        if not company.careers_url: 
+        base_url = getattr(company, "data_query_url", None) or getattr(company, "careers_url", None)
+        if not base_url or not self.handles(base_url):
             return out
 
-        origin, site, lang = self._derive(company.careers_url)
+        s = race_session(requests.Session())
+        s.headers.update({"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"})
+
+        origin, site_default, lang = self._derive(base_url)
         if not origin:
             return out
 
-        s = requests.Session()
-        s.headers.update({"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"})
-        try:
-            pre = s.get(company.careers_url, timeout=10)
-            pre.raise_for_status()
-            pre_url = pre.url
-        except Exception:
-            pre_url = company.careers_url
-
-        site = self._site_from_preheat(pre_url, site)
-        api = self._api(origin, lang, site)
-        base_detail = f"{origin}/hcmUI/CandidateExperience/{lang}/sites/{site}/requisition"
-
-        for kw in KEYWORDS:
-            try:
-                r = s.get(api, params={"keyword":kw,"limit":50,"offset":0}, timeout=10, headers={"Accept":"application/json"})
-                _log("ORC DEBUG api:", r.status_code, r.url)
-                if r.status_code == 200 and r.headers.get("content-type","").startswith("application/json"):
-                    data = r.json() or {}
-                    items = data.get("items") or data.get("requisitions") or data.get("data") or []
-                    got = self._collect(items, base_detail)
-                    if got:
-                        return got
-            except Exception as e:
-                _log("ORC DEBUG api EXC:", repr(e))
+        pool = search_keywords()[:ATS_MAX_KW]
+        if len(search_keywords()) > ATS_MAX_KW:
+            mark_partial("oracle.max_kw")
+        terms, exploring = plan_terms(company, "oracle", pool)
+        merged: List[Dict] = []
+        seen = set()
+        found: Dict[str, List[str]] = {}
+        for attempt in range(2):
+            was_cached = bool(cache_get(company, "oracle.site"))
+            site = self._resolve_site(s, company, base_url, site_default)
+            api = self._api(origin, lang, site)
+            base_detail = f"{origin}/hcmUI/CandidateExperience/{lang}/sites/{site}/requisition"
+
+            status = 0
+            for kw in terms:
+                status, items = self._crawl_keyword(s, api, kw)
+                if status == 404:
+                    _log("ORC fast-fail 404:", api)
+                    break
+                if status != 200:
+                    mark_partial("oracle.error", error=True)
+                hits = self._collect(items, base_detail)
+                found[kw] = [h["apply_url"] for h in hits]
+                for h in hits:
+                    if h["apply_url"] in seen:
+                        continue
+                    seen.add(h["apply_url"]); merged.append(h)
+
+            if status != 404:
+                if exploring:
+                    learn_terms(company, "oracle", pool, found)
+                elif not merged:
+                    plan_missed(company, "oracle")
+                break
+            # never keep a site id that 404s; a stale cached one gets one fresh preheat
+            cache_drop(company, "oracle.site")
+            if not was_cached:
+                break
+
+        _log(f"ORC {getattr(company, 'name', '')} site={site} hits={len(merged)}")
+        if merged:
+            return merged
 
         try:
-            r = s.get(pre_url, timeout=10)
+            r = s.get(base_url, timeout=min(HTTP_TIMEOUT, 10))
+            bump("oracle.requests")
+            if r.status_code != 200:
+                return out
+            from bs4 import BeautifulSoup  # imported on first parse, not at module import
             soup = BeautifulSoup(r.text, "html.parser")
             tmp=[]
             for a in soup.select('a[href*="/requisition/"]'):
                 t = a.get_text(" ", strip=True) or ""
-                if not _keep(t): 
+                if not keep_title(t):
                     continue
                 href = a.get("href") or ""
-                if not href: 
+                if not href:
                     continue
                 url = href if href.startswith("http") else f"{origin}{href}"
                 tmp.append({"title": t or "Data Scientist", "apply_url": url, "source": "oracle-html", "snippet": None})
@@ -98,8 +220,8 @@ class OracleCloudScraper:
             for h in tmp:
                 if h["apply_url"] in seen: continue
                 seen.add(h["apply_url"]); dedup.append(h)
+            if dedup:
+                mark_partial("oracle.html_page")   # first page of the listing only
             return dedup
-        except Exception as e:
-            _log("ORC DEBUG html EXC:", repr(e))
-
-        return out
+        except Exception:
+            return out
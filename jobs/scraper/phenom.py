@@ -1,17 +1,24 @@
-# jobs/scraper/oracle.py
+# jobs/scraper/phenom.py
 from __future__ import annotations
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlparse
-from .keywords import KEYWORDS, KEY_SUBSTRINGS
+from .titles import keep_title
+from .cache import cache_get, cache_set, cache_drop
+from .coverage import mark_partial
+from .pool import host_slot, fan_out, in_waves
+from .stats import bump
 import os, re, requests
-from bs4 import BeautifulSoup
 
-ATS_MAX_KW = int(os.getenv("ATS_MAX_KW", "4"))
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "12"))
+PH_PAGE_SIZE = int(os.getenv("PH_PAGE_SIZE", "50"))
+PH_MAX_PAGES = int(os.getenv("PH_MAX_PAGES", "20"))
+PH_TERMS = [t.strip() for t in (os.getenv("PH_TERMS") or "data").split(",") if t.strip()]
 
-def _keep(t: str) -> bool:
-    t = (t or "").lower()
-    return any(k in t for k in KEY_SUBSTRINGS)
+SEARCH_PATH = "/phsearch/api/v1/search"
+
+# phApp.ddo / widget config embedded in every Phenom careers page
+REFNUM_RE = re.compile(r'["\']refNum["\']\s*:\s*["\']([A-Za-z0-9_\-]+)["\']')
+LOCALE_RE = re.compile(r'["\']locale["\']\s*:\s*["\']([a-z]{2}_[a-z]{2})["\']', re.I)
 
 def _log(*a):
     try:
@@ -20,124 +27,136 @@ def _log(*a):
     except Exception:
         pass
 
-class OracleCloudScraper:
+class PhenomScraper:
     def handles(self, url_or_company) -> bool:
         url = getattr(url_or_company, "data_query_url", None) or getattr(url_or_company, "careers_url", None) or str(url_or_company) or ""
         u = urlparse(url.lower())
-       
-        return (
-            u.netloc.endswith("oraclecloud.com")
-            or "/hcmui/" in u.path
-            or "/candidateexperience/" in u.path
-        )
-
-    def _derive(self, careers_url: str) -> Tuple[str|None, str|None, str]:
-        u = urlparse(careers_url or "")
-        origin = f"{u.scheme}://{u.netloc}" if u.netloc else None
-        m = re.search(r"/sites/([^/]+)/?", u.path)
-        site = (m.group(1) if m else "CX")
-        return origin, site, "en"
-
-    def _site_from_preheat(self, url: str, site_default: str) -> str:
-        m = re.search(r"/sites/([^/]+)/", url)
-        return m.group(1) if m else site_default
-
-    def _api(self, origin: str, lang: str, site: str) -> str:
-        return f"{origin}/hcmUI/CandidateExperience/{lang}/sites/{site}/requisitions"
-
-    def _quick_probe(self, s: requests.Session, api: str) -> int:
-        
+        if "phenom" in u.netloc and not u.netloc.startswith("cdn."):
+            return True
+        if "phsearch" in u.path:
+            return True
+        ats = (getattr(url_or_company, "ats", "") or "").upper()
+        ats_type = (getattr(url_or_company, "ats_type", "") or "").lower()
+        return ats == "PHENOM" or ats_type == "phenom" or bool(cache_get(url_or_company, "phenom.site"))
+
+    def _origin(self, url: str) -> Optional[str]:
+        u = urlparse(url or "")
+        return f"{u.scheme or 'https'}://{u.netloc}" if u.netloc else None
+
+    def _site(self, s: requests.Session, company, base_url: str) -> Optional[Dict]:
+        """refNum/locale of the tenant; the careers page is only fetched when not cached."""
+        site = cache_get(company, "phenom.site")
+        if site:
+            return site
         try:
-            r = s.get(api, params={"keyword":"data","limit":1,"offset":0}, timeout=min(HTTP_TIMEOUT, 8), headers={"Accept":"application/json"})
-            return r.status_code
+            r = s.get(base_url, timeout=min(HTTP_TIMEOUT, 10), headers={"Accept": "text/html"})
+            bump("phenom.requests")
+            if r.status_code != 200:
+                return None
+            html = r.text or ""
         except Exception:
-            return 0
-
-    def _collect(self, items, base_detail: str) -> List[Dict]:
-        out=[]; seen=set()
-        for it in items or []:
-            title = (it.get("Title") or it.get("title") or it.get("PostingTitle") or "").strip()
-            if not title or not _keep(title):
-                continue
-            rid = it.get("Id") or it.get("RequisitionId") or it.get("IdValue")
-            url = it.get("ExternalURL") or it.get("url")
-            if not url and rid:
-                url = f"{base_detail}/{rid}"
-            if not url or url in seen:
-                continue
-            seen.add(url)
-            out.append({"title": title, "apply_url": url, "source": "oracle-api", "snippet": None})
-        return out
-
-    def fetch(self, company, _session) -> List[Dict]:
+            return None
+        m = REFNUM_RE.search(html)
+        if not m:
+            return None
+        lm = LOCALE_RE.search(html)
+        site = {"refNum": m.group(1), "locale": (lm.group(1).lower() if lm else "en_us")}
+        cache_set(company, "phenom.site", site)
+        return site
+
+    def _page(self, s: requests.Session, api: str, site: Dict, term: str, offset: int) -> Tuple[int, list, int]:
+        """One search page; returns (status, jobs, total hits)."""
+        try:
+            with host_slot(api):
+                r = s.get(api, params={
+                    "refNum": site["refNum"], "locale": site.get("locale") or "en_us",
+                    "keywords": term, "from": offset, "size": PH_PAGE_SIZE,
+                }, headers={"Accept": "application/json"}, timeout=HTTP_TIMEOUT)
+            bump("phenom.requests")
+            _log("PH api:", r.status_code, r.url)
+            if r.status_code != 200:
+                return r.status_code, [], 0
+            data = r.json() or {}
+        except Exception:
+            return 0, [], 0
+        # responses come either flat or wrapped as {"refineSearch": {"data": ...}}
+        body = (data.get("refineSearch") or {}).get("data") or data.get("data") or data
+        jobs = body.get("jobs") or []
+        try:
+            total = int(body.get("totalHits") or (data.get("refineSearch") or {}).get("totalHits") or body.get("hits") or 0)
+        except (TypeError, ValueError):
+            total = 0
+        return 200, jobs, total
+
+    def _job_url(self, origin: str, site: Dict, job: Dict) -> Optional[str]:
+        url = job.get("applyUrl") or job.get("jobUrl") or job.get("url")
+        if url:
+            return url if url.startswith("http") else f"{origin}/{url.lstrip('/')}"
+        jid = job.get("jobSeqNo") or job.get("jobId") or job.get("reqId")
+        if not jid:
+            return None
+        # Phenom detail pages live under /<country>/<lang>/job/<id>
+        lang, _, country = (site.get("locale") or "en_us").partition("_")
+        return f"{origin}/{country or 'us'}/{lang}/job/{jid}"
+
+    def fetch(self, company, session=None) -> List[Dict]:
         out: List[Dict] = []
         base_url = getattr(company, "data_query_url", None) or getattr(company, "careers_url", None)
-        if not base_url or not self.handles(base_url):
-            return out
-
-        s = requests.Session()
-        s.headers.update({"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"})
-
-        origin, site, lang = self._derive(base_url)
+        origin = self._origin(base_url or "")
         if not origin:
             return out
 
-        
-        try:
-            pre = s.get(base_url, timeout=min(HTTP_TIMEOUT, 10))
-            pre.raise_for_status()
-            site = self._site_from_preheat(pre.url, site)
-        except Exception:
-            pass
-
-        api = self._api(origin, lang, site)
-        base_detail = f"{origin}/hcmUI/CandidateExperience/{lang}/sites/{site}/requisition"
-
-      
-        status = self._quick_probe(s, api)
-        if status == 404:
-            _log("ORC fast-fail 404:", api)
+        s = session or requests.Session()
+        site = self._site(s, company, base_url)
+        if not site:
             return out
-
-        tried = 0
-        for kw in KEYWORDS:
-            if tried >= ATS_MAX_KW:
-                break
-            tried += 1
-            try:
-                r = s.get(api, params={"keyword":kw,"limit":50,"offset":0}, timeout=HTTP_TIMEOUT, headers={"Accept":"application/json"})
-                _log("ORC api:", r.status_code, r.url)
-                if r.status_code == 404:
-           
-                    break
-                if r.status_code == 200 and "application/json" in r.headers.get("content-type",""):
-                    data = r.json() or {}
-                    items = data.get("items") or data.get("requisitions") or data.get("data") or []
-                    got = self._collect(items, base_detail)
-                    if got:
-                        return got
-            except Exception:
-                continue
-
-        try:
-            r = s.get(base_url, timeout=min(HTTP_TIMEOUT, 10))
-            if r.status_code != 200:
-                return out
-            soup = BeautifulSoup(r.text, "html.parser")
-            tmp=[]
-            for a in soup.select('a[href*="/requisition/"]'):
-                t = a.get_text(" ", strip=True) or ""
-                if not _keep(t):
+        api = origin + SEARCH_PATH
+
+        def crawl(term: str) -> list:
+            status, jobs, total = self._page(s, api, site, term, 0)
+            if status in (400, 404):
+                # the cached tenant no longer answers; re-learn it next run
+                cache_drop(company, "phenom.site")
+            if status != 200:
+                mark_partial("phenom.error", error=True)
+                return []
+            jobs = list(jobs)
+            page = lambda off: self._page(s, api, site, term, off)
+            if total:
+                # total known up front: every remaining offset can go out at once
+                if total > PH_PAGE_SIZE * PH_MAX_PAGES:
+                    mark_partial("phenom.max_pages")
+                offsets = range(PH_PAGE_SIZE, min(total, PH_PAGE_SIZE * PH_MAX_PAGES), PH_PAGE_SIZE)
+                for st, more, _ in fan_out(page, offsets):
+                    if st != 200:
+                        mark_partial("phenom.error", error=True)
+                    jobs.extend(more)
+            elif len(jobs) >= PH_PAGE_SIZE:
+                # no usable totalHits but a full page: fetch a wave ahead, stop at the first short page
+                offsets = range(PH_PAGE_SIZE, PH_PAGE_SIZE * PH_MAX_PAGES, PH_PAGE_SIZE)
+                for wave in in_waves(page, offsets):
+                    done = False
+                    for st, more, _ in wave:
+                        if st != 200:
+                            mark_partial("phenom.error", error=True)
+                        jobs.extend(more)
+                        done = done or st != 200 or len(more) < PH_PAGE_SIZE
+                    if done:
+                        break
+                else:
+                    mark_partial("phenom.max_pages")
+            return jobs
+
+        seen = set()
+        for jobs in fan_out(crawl, PH_TERMS or ["data"]):
+            for j in jobs:
+                title = (j.get("title") or j.get("jobTitle") or "").strip()
+                if not title or not keep_title(title):
                     continue
-                href = a.get("href") or ""
-                if not href:
+                url = self._job_url(origin, site, j)
+                if not url or url in seen:
                     continue
-                url = href if href.startswith("http") else f"{origin}{href}"
-                tmp.append({"title": t or "Data Scientist", "apply_url": url, "source": "oracle-html", "snippet": None})
-            seen=set(); dedup=[]
-            for h in tmp:
-                if h["apply_url"] in seen: continue
-                seen.add(h["apply_url"]); dedup.append(h)
-            return dedup
-        except Exception:
-            return out
+                seen.add(url)
+                out.append({"title": title, "apply_url": url, "source": "phenom-api", "snippet": None})
+        _log(f"PH {getattr(company, 'name', '')} refNum={site.get('refNum')} hits={len(out)}")
+        return out
@@ -0,0 +1,81 @@
+# jobs/scraper/planner.py
+from __future__ import annotations
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+import os, zlib
+
+from .cache import cache_get, cache_set, cache_drop
+from .coverage import mark_partial
+from .stats import bump
+
+# Per-company search-term plans for the keyword-driven ATS scrapers.
+# An exploring run issues every term and records which postings each one
+# found; the greedy set cover of those results is stored in scrape_cache and
+# later runs only issue the covering terms. The plan expires after
+# PLAN_REEXPLORE_HOURS so new kinds of postings get picked up again.
+PLAN_REEXPLORE_HOURS = int(os.getenv("PLAN_REEXPLORE_HOURS", str(24 * 7)))
+PLAN_ENABLED = os.getenv("PLAN_ENABLED", "1") == "1"
+
+
+def _key(ats: str) -> str:
+    return f"plan.{ats}"
+
+
+def _pool_sig(pool: Sequence[str]) -> int:
+    # a changed keyword list invalidates old plans
+    return zlib.crc32("\n".join(pool).encode("utf-8"))
+
+
+def plan_terms(company, ats: str, pool: Sequence[str]) -> Tuple[List[str], bool]:
+    """(terms to issue, exploring?) for this company and ATS; with planning off nothing explores."""
+    pool = list(pool)
+    if not PLAN_ENABLED:
+        return pool, False
+    plan = cache_get(company, _key(ats), ttl_hours=PLAN_REEXPLORE_HOURS)
+    if not isinstance(plan, dict) or plan.get("pool") != _pool_sig(pool):
+        bump(f"{ats}.plan_explore")
+        return pool, True
+    terms = [t for t in plan.get("terms") or [] if t in pool] or pool[:1]
+    bump(f"{ats}.plan_used")
+    bump(f"{ats}.terms_saved", len(pool) - len(terms))
+    if len(terms) < len(pool):
+        # postings only the dropped terms would find go unseen this run
+        mark_partial(f"{ats}.planned")
+    return terms, False
+
+
+def cover(found: Dict[str, Iterable[str]], pool: Sequence[str]) -> List[str]:
+    """Greedy set cover: terms (pool order on ties) that together find every posting seen."""
+    sets: Dict[str, Set[str]] = {t: set(found.get(t) or ()) for t in pool}
+    left: Set[str] = set().union(*sets.values()) if sets else set()
+    out: List[str] = []
+    while left:
+        best = max(pool, key=lambda t: len(sets[t] & left))
+        gain = sets[best] & left
+        if not gain:
+            break
+        out.append(best)
+        left -= gain
+    return out
+
+
+def learn_terms(company, ats: str, pool: Sequence[str], found: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    Store the cover of an exploring run. A run that found nothing stores no
+    plan, so the next run explores again instead of issuing a one-term plan
+    that would only mark the scrape partial.
+    """
+    pool = list(pool)
+    if not PLAN_ENABLED or not pool:
+        return pool
+    terms = cover(found, pool)
+    if not terms:
+        cache_drop(company, _key(ats))
+        return pool
+    cache_set(company, _key(ats), {"terms": terms, "pool": _pool_sig(pool)})
+    return terms
+
+
+def plan_missed(company, ats: str) -> None:
+    """A planned run came back empty: explore again on the next run."""
+    cache_drop(company, _key(ats))
+    bump(f"{ats}.plan_missed")
@@ -0,0 +1,148 @@
+# jobs/scraper/pool.py
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+from urllib.parse import urlparse
+import os, threading
+
+# Small concurrency helpers shared by the ATS scrapers.
+# Per-host slots keep a company's fan-out polite even when
+# run_scrape_now drives several companies in parallel.
+HTTP_PER_HOST = int(os.getenv("HTTP_PER_HOST", "4"))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_host_sems: Dict[str, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    try:
+        return (urlparse(url or "").netloc or "").lower()
+    except Exception:
+        return ""
+
+
+# ---------- cancellation (race mode) ----------
+class Cancelled(Exception):
+    """Raised instead of issuing a request once the scraper's race was lost."""
+
+
+class RaceTicket:
+    """
+    One racing scraper: a stop event shared by the whole race plus counts of
+    the requests it sent and the ones it was refused after the race ended.
+    """
+
+    def __init__(self, stop: threading.Event):
+        self.stop = stop
+        self.sent = 0
+        self.blocked = 0
+        self._lock = threading.Lock()
+
+    def check(self) -> None:
+        if self.stop.is_set():
+            with self._lock:
+                self.blocked += 1
+            raise Cancelled()
+
+    def count(self) -> None:
+        with self._lock:
+            self.sent += 1
+
+
+_ticket: ContextVar[Optional[RaceTicket]] = ContextVar("race_ticket", default=None)
+
+
+@contextmanager
+def racing(ticket: RaceTicket):
+    """Attach ticket to the current context; fan_out carries it into workers."""
+    token = _ticket.set(ticket)
+    try:
+        yield ticket
+    finally:
+        _ticket.reset(token)
+
+
+def check_cancelled() -> None:
+    t = _ticket.get()
+    if t is not None:
+        t.check()
+
+
+class RaceSession:
+    """requests.Session wrapper that counts requests and refuses them after a lost race."""
+
+    def __init__(self, session, ticket: RaceTicket):
+        self._s = session
+        self._ticket = ticket
+
+    def __getattr__(self, name):
+        return getattr(self._s, name)
+
+    def _call(self, method: str, *args, **kwargs):
+        self._ticket.check()
+        self._ticket.count()
+        return getattr(self._s, method)(*args, **kwargs)
+
+    def request(self, *args, **kwargs):
+        return self._call("request", *args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        return self._call("get", *args, **kwargs)
+
+    def post(self, *args, **kwargs):
+        return self._call("post", *args, **kwargs)
+
+    def head(self, *args, **kwargs):
+        return self._call("head", *args, **kwargs)
+
+
+def race_session(session):
+    """session as-is outside a race, wrapped in a RaceSession inside one."""
+    t = _ticket.get()
+    if t is None or isinstance(session, RaceSession):
+        return session
+    return RaceSession(session, t)
+
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of HTTP_PER_HOST slots for the url's host while a request runs."""
+    check_cancelled()
+    host = _host(url)
+    with _host_lock:
+        sem = _host_sems.get(host)
+        if sem is None:
+            sem = _host_sems[host] = threading.BoundedSemaphore(max(1, HTTP_PER_HOST))
+    with sem:
+        # the race may have ended while we waited for the slot
+        check_cancelled()
+        yield
+
+
+def fan_out(fn: Callable[[T], R], items: Iterable[T], workers: int = HTTP_PER_HOST) -> List[R]:
+    """Map fn over items concurrently; results keep the input order."""
+    items = list(items)
+    if not items:
+        return []
+    if workers <= 1 or len(items) == 1:
+        return [fn(x) for x in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as ex:
+        # each task runs in a copy of the caller's context so a race ticket follows it
+        futs = [ex.submit(copy_context().run, fn, x) for x in items]
+        return [f.result() for f in futs]
+
+
+def in_waves(fn: Callable[[T], R], items: Iterable[T], width: int = HTTP_PER_HOST) -> Iterator[List[R]]:
+    """
+    Run fn over items `width` at a time and yield each wave's results,
+    so callers can stop issuing requests once a wave stops paying off.
+    """
+    items = list(items)
+    width = max(1, width)
+    for i in range(0, len(items), width):
+        yield fan_out(fn, items[i:i + width], workers=width)
@@ -0,0 +1,135 @@
+# jobs/scraper/registry.py
+from __future__ import annotations
+from importlib import import_module
+from typing import Dict, List, Optional, Tuple, Union
+import logging
+import threading
+
+# ATS name -> scraper class, imported on first use.
+# Built-ins are listed as "module:Class" strings so importing the registry
+# (and jobs.scraper.api) does not pull in every scraper and its dependencies.
+#
+# Third-party scrapers register through the "jobs.scrapers" entry-point group:
+#
+#   [project.entry-points."jobs.scrapers"]
+#   myats = "mypkg.scrapers:MyAtsScraper"
+
+ENTRY_POINT_GROUP = "jobs.scrapers"
+
+log = logging.getLogger(__name__)
+
+BUILTIN_SCRAPERS: Dict[str, str] = {
+    "workday": "jobs.scraper.workday:WorkdayScraper",
+    "greenhouse": "jobs.scraper.greenhouse:GreenhouseScraper",
+    "lever": "jobs.scraper.lever:LeverScraper",
+    "successfactors": "jobs.scraper.successfactors:SuccessFactorsScraper",
+    "icims": "jobs.scraper.icims:ICIMSScraper",
+    "phenom": "jobs.scraper.phenom:PhenomScraper",
+    "oracle": "jobs.scraper.oracle:OracleCloudScraper",
+    "smartrecruiters": "jobs.scraper.smartrecruiters:SmartRecruitersScraper",
+    "taleo": "jobs.scraper.taleo:TaleoScraper",
+    "generic": "jobs.scraper.generic:GenericScraper",
+}
+
+# Lowercase substrings of a company's URLs, at least one of which is present
+# whenever the scraper's handles() can claim it (an ats/ats_type equal to the
+# name, or a "<name>." scrape_cache entry, also count). Lets the candidate
+# list skip importing scrapers that cannot apply; a scraper without hints is
+# always imported and asked.
+BUILTIN_HINTS: Dict[str, Tuple[str, ...]] = {
+    "workday": ("workday", "wd"),
+    "greenhouse": ("greenhouse.io",),
+    "lever": ("lever.co",),
+    "successfactors": ("successfactors.com", "careersection", "sfcareer"),
+    "phenom": ("phenom", "phsearch"),
+    "oracle": ("oraclecloud.com", "/hcmui/", "/candidateexperience/"),
+    "smartrecruiters": ("smartrecruiters.com",),
+    "taleo": ("taleo.net",),
+}
+
+_targets: Dict[str, Union[str, type]] = dict(BUILTIN_SCRAPERS)
+_hints: Dict[str, Tuple[str, ...]] = dict(BUILTIN_HINTS)
+_loaded: Dict[str, type] = {}
+_failed: Dict[str, str] = {}   # name -> target that failed to import (logged once)
+_lock = threading.Lock()
+_entry_points_done = False
+
+
+def register(name: str, target: Union[str, type], hints: Optional[Tuple[str, ...]] = None) -> None:
+    """
+    Register (or override) a scraper by ATS name; target is a class or "module:Class".
+    hints are optional URL substrings, see BUILTIN_HINTS.
+    """
+    key = name.lower()
+    with _lock:
+        _targets[key] = target
+        if hints:
+            _hints[key] = tuple(h.lower() for h in hints)
+        else:
+            _hints.pop(key, None)
+        _loaded.pop(key, None)
+        _failed.pop(key, None)
+
+
+def _load_entry_points() -> None:
+    global _entry_points_done
+    if _entry_points_done:
+        return
+    with _lock:
+        if _entry_points_done:
+            return
+        try:
+            from importlib.metadata import entry_points
+            for ep in entry_points(group=ENTRY_POINT_GROUP):
+                # built-ins win; a plugin can still override explicitly via register()
+                _targets.setdefault(ep.name.lower(), ep.value)
+        except Exception:
+            log.exception("could not read %r entry points", ENTRY_POINT_GROUP)
+        _entry_points_done = True
+
+
+def names() -> List[str]:
+    """Registered ATS names: built-ins first, plugins after, "generic" last."""
+    _load_entry_points()
+    keys = [k for k in _targets if k != "generic"]
+    return keys + (["generic"] if "generic" in _targets else [])
+
+
+def hints(name: str) -> Optional[Tuple[str, ...]]:
+    """URL hints of a registered scraper, or None when it has to be asked."""
+    return _hints.get(name.lower())
+
+
+def get(name: Optional[str]) -> Optional[type]:
+    if not name:
+        return None
+    key = name.lower()
+    cls = _loaded.get(key)
+    if cls is not None:
+        return cls
+    _load_entry_points()
+    target = _targets.get(key)
+    if target is None:
+        return None
+    if isinstance(target, str):
+        if _failed.get(key) == target:
+            return None
+        mod, _, attr = target.partition(":")
+        try:
+            cls = getattr(import_module(mod), attr)
+        except Exception:
+            # a broken scraper (missing dependency, typo in a plugin) would otherwise
+            # look like an ATS nobody registered: say so once, then skip it quietly
+            log.exception("scraper %r (%s) failed to import; skipping it", key, target)
+            with _lock:
+                _failed[key] = target
+            return None
+    else:
+        cls = target
+    with _lock:
+        _loaded[key] = cls
+    return cls
+
+
+def load_all() -> Dict[str, type]:
+    return {k: c for k in names() if (c := get(k)) is not None}
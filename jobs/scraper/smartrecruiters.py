@@ -1,14 +1,23 @@
+# jobs/scraper/smartrecruiters.py
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from urllib.parse import urlparse
-from .keywords import KEY_SUBSTRINGS
-import requests
+from .titles import keep_title
+from .base import vlog
+from .coverage import mark_partial
+from .pool import host_slot, fan_out
+from .stats import bump
+import os, requests
 
-def _keep(title: str) -> bool:
-    t = (title or "").lower()
-    return any(k in t for k in KEY_SUBSTRINGS)
+SR_PAGE_SIZE = int(os.getenv("SR_PAGE_SIZE", "100"))      # API maximum
+SR_MAX_PAGES = int(os.getenv("SR_MAX_PAGES", "50"))
+SR_TERMS = [t.strip() for t in (os.getenv("SR_TERMS") or "data").split(",") if t.strip()]
 
 class SmartRecruitersScraper:
+    def handles(self, url_or_company) -> bool:
+        url = getattr(url_or_company, "careers_url", url_or_company) or ""
+        return self._company(url) is not None
+
     def _company(self, url: str) -> str|None:
         u = urlparse(url or "")
         parts = [p for p in u.path.split("/") if p]
@@ -16,27 +25,67 @@ class SmartRecruitersScraper:
             return parts[0]
         return None
 
+    def _page(self, session, api: str, term: str, offset: int) -> Tuple[int, List[Dict], int]:
+        """One postings page; returns (status, postings, totalFound)."""
+        try:
+            with host_slot(api):
+                r = session.get(api, params={"q":term,"limit":SR_PAGE_SIZE,"offset":offset}, timeout=10)
+            if r.status_code != 200:
+                return r.status_code, [], 0
+            data = r.json() or {}
+        except Exception:
+            return 0, [], 0
+        jobs = data.get("content") or data.get("data") or []
+        try:
+            total = int(data.get("totalFound") or 0)
+        except (TypeError, ValueError):
+            total = 0
+        return 200, jobs, total
+
+    def _crawl_term(self, session, api: str, term: str) -> Tuple[List[Dict], int, int]:
+        """All pages for one query term; returns (postings, requests, postings past page one)."""
+        status, jobs, total = self._page(session, api, term, 0)
+        if status != 200:
+            mark_partial("smartrecruiters.error", error=True)
+            return [], 1, 0
+        out = list(jobs)
+        if total > SR_PAGE_SIZE * SR_MAX_PAGES:
+            mark_partial("smartrecruiters.max_pages")
+        elif total < len(jobs) and len(jobs) >= SR_PAGE_SIZE:
+            # a full first page without a usable totalFound: the rest is unknown
+            mark_partial("smartrecruiters.no_total")
+        offsets = range(SR_PAGE_SIZE, min(total, SR_PAGE_SIZE * SR_MAX_PAGES), SR_PAGE_SIZE)
+        for st, more, _ in fan_out(lambda off: self._page(session, api, term, off), offsets):
+            if st != 200:
+                mark_partial("smartrecruiters.error", error=True)
+            out.extend(more)
+        return out, 1 + len(offsets), len(out) - len(jobs)
+
     def fetch(self, company, session) -> List[Dict]:
         out: List[Dict] = []
         comp = self._company(company.careers_url or "")
         if not comp: return out
         api = f"https://api.smartrecruiters.com/v1/companies/{comp}/postings"
-        try:
-            r = session.get(api, params={"q":"data","limit":200,"offset":0}, timeout=10) 
-            if r.status_code != 200: return out
-            data = r.json() or {}
-            jobs = data.get("content") or data.get("data") or []
+
+        reqs = extra = 0
+        for jobs, n_req, n_extra in fan_out(lambda t: self._crawl_term(session, api, t), SR_TERMS or ["data"]):
+            reqs += n_req; extra += n_extra
             for j in jobs:
                 title = (j.get("name") or "").strip()
-                if not _keep(title): 
+                if not keep_title(title):
                     continue
                 url = j.get("referralUrl") or j.get("applyUrl") or j.get("postingUrl") or j.get("externalPath")
                 if not url: continue
                 out.append({"title": title, "apply_url": url, "source":"smartrecruiters", "snippet": None})
-        except Exception:
-            return out
+
         seen=set(); dedup=[]
         for h in out:
             if h["apply_url"] in seen: continue
             seen.add(h["apply_url"]); dedup.append(h)
+
+        # postings beyond the first page are the ones the old single request cut off
+        bump("smartrecruiters.companies")
+        bump("smartrecruiters.requests", reqs)
+        bump("smartrecruiters.truncation_avoided", extra)
+        vlog(f"[SR] {getattr(company, 'name', '')} requests={reqs} past_first_page={extra} hits={len(dedup)}")
         return dedup
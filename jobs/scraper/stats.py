@@ -0,0 +1,33 @@
+# jobs/scraper/stats.py
+from __future__ import annotations
+from collections import Counter
+from typing import Dict
+import threading
+
+# Process-wide run counters (requests, parses, pages ...).
+# Scrapers bump them from worker threads; run_scrape_now prints them at the end.
+_counts: Counter = Counter()
+_lock = threading.Lock()
+
+
+def bump(key: str, n: int = 1) -> None:
+    if not n:
+        return
+    with _lock:
+        _counts[key] += n
+
+
+def snapshot() -> Dict[str, int]:
+    with _lock:
+        return dict(_counts)
+
+
+def reset() -> None:
+    with _lock:
+        _counts.clear()
+
+
+def format_stats(prefix: str = "") -> str:
+    snap = snapshot()
+    keys = sorted(k for k in snap if k.startswith(prefix))
+    return " ".join(f"{k}={snap[k]}" for k in keys)
@@ -2,16 +2,19 @@
 from __future__ import annotations
 from typing import List, Dict
 from urllib.parse import urlparse, parse_qs, urljoin
-from .keywords import KEYWORDS, KEY_SUBSTRINGS
+from .keywords import search_keywords
+from .titles import keep_title
+from .cache import cache_get, cache_set
+from .pool import host_slot, in_waves, race_session
+from .planner import plan_terms, learn_terms, plan_missed
+from .coverage import mark_partial
+from .stats import bump
 import os, requests
-from bs4 import BeautifulSoup
 
 ATS_MAX_KW = int(os.getenv("ATS_MAX_KW", "4"))
 HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "12"))
-
-def _keep(title: str) -> bool:
-    t = (title or "").lower()
-    return any(k in t for k in KEY_SUBSTRINGS)
+SF_KW_PARALLEL = int(os.getenv("SF_KW_PARALLEL", "4"))
+SF_PROBE_TTL_HOURS = int(os.getenv("SF_PROBE_TTL_HOURS", "72"))
 
 def _log(*a):
     try:
@@ -33,57 +36,98 @@ class SuccessFactorsScraper:
         company = (qs.get("company") or [""])[0] or None
         return origin, company
 
-    def _api_search(self, s: requests.Session, origin: str, company: str|None):
-        path = "/careersection/rest/jobboard/search"
-        url  = origin + path
+    def _parse_items(self, data: dict, origin: str) -> List[Dict]:
         out=[]
+        items = data.get("jobPostings") or data.get("jobs") or data.get("requisitionList") or []
+        for p in items:
+            title = (p.get("title") or p.get("jobTitle") or p.get("displayJobTitle") or "").strip()
+            href  = (p.get("externalPath") or p.get("jobUrl") or p.get("url") or p.get("jobPostingUrl") or "")
+            if not title or not keep_title(title):
+                continue
+            if not href:
+                jobid = p.get("jobId") or p.get("id")
+                if jobid:
+                    href = f"/careersection/jobdetail.ftl?job={jobid}"
+            if not href:
+                continue
+            full = href if href.startswith("http") else urljoin(origin, href.lstrip("/"))
+            out.append({"title": title, "apply_url": full, "source": "successfactors-api", "snippet": None})
+        return out
 
-        
+    def _search(self, s: requests.Session, url: str, company: str|None, kw: str, timeout: int):
+        """One keyword search; returns (status, parsed json or None)."""
         try:
-            r0 = s.get(url, params={"company":company or "", "keyword":"data", "lang":"en_US", "location":""},
-                       headers={"Accept":"application/json"}, timeout=min(HTTP_TIMEOUT, 8))
-            if r0.status_code == 404:
-                _log("SF fast-fail 404:", r0.url)
-                return []
+            with host_slot(url):
+                r = s.get(url, params={"company":company or "", "keyword":kw, "lang":"en_US", "location":""},
+                          headers={"Accept":"application/json"}, timeout=timeout)
+            bump("successfactors.requests")
+            _log("SF api:", r.status_code, r.url)
+            if r.status_code != 200 or "application/json" not in r.headers.get("content-type",""):
+                return r.status_code, None
+            return r.status_code, (r.json() or {})
         except Exception:
+            return 0, None
+
+    def _api_search(self, s: requests.Session, origin: str, company: str|None, cache_owner=None):
+        path = "/careersection/rest/jobboard/search"
+        url  = origin + path
+        probe_key = f"successfactors.probe.{origin}"
+
+        # dead endpoints are remembered per origin in the company cache, for SF_PROBE_TTL_HOURS
+        if cache_get(cache_owner, probe_key, ttl_hours=SF_PROBE_TTL_HOURS) == "dead":
+            _log("SF cached dead origin:", origin)
+            bump("successfactors.probe_skipped")
+            return []
+
+        # the first planned term doubles as the probe, so its results are kept
+        rest = [kw for kw in search_keywords() if kw != "data"]
+        pool = ["data"] + rest[:ATS_MAX_KW]
+        if len(rest) > ATS_MAX_KW:
+            mark_partial("successfactors.max_kw")
+        terms, exploring = plan_terms(cache_owner, "successfactors", pool)
+        status, data = self._search(s, url, company, terms[0], min(HTTP_TIMEOUT, 8))
+        if status == 404:
+            _log("SF fast-fail 404:", url)
+            cache_set(cache_owner, probe_key, "dead")
             return []
+        if status == 0:
+            mark_partial("successfactors.error", error=True)
+            return []
+        cache_set(cache_owner, probe_key, "ok")
+
+        out=[]; seen=set(); found={}
+        def merge(kw, data) -> int:
+            batch = self._parse_items(data, origin) if data else []
+            found[kw] = [h["apply_url"] for h in batch]
+            added = 0
+            for h in batch:
+                if h["apply_url"] in seen: continue
+                seen.add(h["apply_url"]); out.append(h); added += 1
+            return added
+
+        merge(terms[0], data)
 
-        tried = 0
-        for kw in KEYWORDS:
-            if tried >= ATS_MAX_KW:
+        search = lambda kw: (kw, *self._search(s, url, company, kw, HTTP_TIMEOUT))
+        issued = 1
+        for wave in in_waves(search, terms[1:], SF_KW_PARALLEL):
+            issued += len(wave)
+            added = 0
+            for kw, status, data in wave:
+                added += merge(kw, data)
+                if status not in (200, 404):
+                    mark_partial("successfactors.error", error=True)
+            # stop once a whole wave of keywords brings nothing new; an exploring
+            # run then learns its plan from the terms it did issue
+            if not added or any(st == 404 for _, st, _ in wave):
+                if issued < len(terms):
+                    mark_partial("successfactors.cutoff")
                 break
-            tried += 1
-            try:
-                r = s.get(url, params={"company":company or "", "keyword":kw, "lang":"en_US", "location":""},
-                          headers={"Accept":"application/json"}, timeout=HTTP_TIMEOUT)
-                _log("SF api:", r.status_code, r.url)
-                if r.status_code == 404:
-                    break
-                if r.status_code != 200 or "application/json" not in r.headers.get("content-type",""):
-                    continue
-                data = r.json() or {}
-                items = data.get("jobPostings") or data.get("jobs") or data.get("requisitionList") or []
-                for p in items:
-                    title = (p.get("title") or p.get("jobTitle") or p.get("displayJobTitle") or "").strip()
-                    href  = (p.get("externalPath") or p.get("jobUrl") or p.get("url") or p.get("jobPostingUrl") or "")
-                    if not title or not _keep(title):
-                        continue
-                    if not href:
-                        jobid = p.get("jobId") or p.get("id")
-                        if jobid:
-                            href = f"/careersection/jobdetail.ftl?job={jobid}"
-                    if not href: 
-                        continue
-                    full = href if href.startswith("http") else urljoin(origin, href.lstrip("/"))
-                    out.append({"title": title, "apply_url": full, "source": "successfactors-api", "snippet": None})
-            except Exception:
-                continue
 
-        seen=set(); dedup=[]
-        for h in out:
-            if h["apply_url"] in seen: continue
-            seen.add(h["apply_url"]); dedup.append(h)
-        return dedup
+        if exploring:
+            learn_terms(cache_owner, "successfactors", pool, found)
+        elif not out:
+            plan_missed(cache_owner, "successfactors")
+        return out
 
     def _html_search(self, s: requests.Session, careers_url: str):
         try:
@@ -91,13 +135,14 @@ class SuccessFactorsScraper:
             _log("SF html:", r.status_code, r.url)
             if r.status_code != 200:
                 return []
+            from bs4 import BeautifulSoup  # imported on first parse, not at module import
             soup = BeautifulSoup(r.text, "html.parser")
             out=[]
             for a in soup.select('a[href*="job"]'):
                 t = a.get_text(" ", strip=True)
                 href = a.get("href") or ""
                 if not href: continue
-                if not _keep(t) and "scientist" not in (href or "").lower():
+                if not keep_title(t) and "scientist" not in (href or "").lower():
                     continue
                 full = href if href.startswith("http") else urljoin(r.url, href.lstrip("/"))
                 out.append({"title": t or "Data Scientist", "apply_url": full, "source": "successfactors-html", "snippet": None})
@@ -106,6 +151,8 @@ class SuccessFactorsScraper:
             for h in out:
                 if h["apply_url"] in seen: continue
                 seen.add(h["apply_url"]); dedup.append(h)
+            if dedup:
+                mark_partial("successfactors.html_page")   # first page of the listing only
             return dedup
         except Exception:
             return []
@@ -118,9 +165,9 @@ class SuccessFactorsScraper:
         origin, comp = self._derive(base)
         if not origin:
             return out
-        s = requests.Session()
+        s = race_session(requests.Session())
         s.headers.update({"User-Agent":"Mozilla/5.0","Accept-Language":"en-US,en;q=0.9"})
-        out = self._api_search(s, origin, comp)
+        out = self._api_search(s, origin, comp, cache_owner=company)
         if out:
             return out
         return self._html_search(s, base)
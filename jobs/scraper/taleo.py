@@ -1,22 +1,138 @@
+# jobs/scraper/taleo.py
 from __future__ import annotations
-from typing import List, Dict
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from .base import BaseScraper
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from .base import BaseScraper, vlog
+from .titles import keep_title
+from .cache import cache_get, cache_set, cache_drop
+from .coverage import mark_partial
+from .pool import host_slot, fan_out
+from .stats import bump
+import os, re, requests
+
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", "12"))
+TALEO_MAX_PAGES = int(os.getenv("TALEO_MAX_PAGES", "20"))
+TALEO_TERMS = [t.strip() for t in (os.getenv("TALEO_TERMS") or "data").split(",") if t.strip()]
+
+SECTION_RE = re.compile(r"/careersection/([^/]+)/", re.I)
+# jobsearch.ftl embeds the portal id used by the ajax search (portal=101430233 / portal: '101430233')
+PORTAL_RE = re.compile(r"portal['\"]?\s*[=:]\s*['\"]?(\d{5,})", re.I)
+
+def _search_body(term: str, page_no: int) -> Dict:
+    return {
+        "multilineEnabled": False,
+        "sortingSelection": {"sortBySelectionParam": "3", "ascendingSortingOrder": "false"},
+        "fieldData": {"fields": {"KEYWORD": term, "LOCATION": "", "CATEGORY": ""}, "valid": True},
+        "filterSelectionParam": {"searchFilterSelections": []},
+        "advancedSearchFiltersSelectionParam": {"searchFilterSelections": []},
+        "pageNo": page_no,
+    }
 
 class TaleoScraper(BaseScraper):
-    def fetch(self, company, session) -> List[Dict]:
+    name = "taleo"
+
+    def handles(self, url_or_company) -> bool:
+        url = getattr(url_or_company, "data_query_url", None) or getattr(url_or_company, "careers_url", None) or str(url_or_company) or ""
+        host = urlparse(url.lower()).netloc
+        if host.endswith("taleo.net"):
+            return True
+        ats = (getattr(url_or_company, "ats", "") or "").upper()
+        ats_type = (getattr(url_or_company, "ats_type", "") or "").lower()
+        return ats == "TALEO" or ats_type == "taleo"
+
+    def _site(self, s: requests.Session, company, base_url: str) -> Optional[Dict]:
+        """careersection + portal id; the search page is only fetched when not cached."""
+        site = cache_get(company, "taleo.site")
+        if site:
+            return site
+        try:
+            r = s.get(base_url, timeout=min(HTTP_TIMEOUT, 10), headers={"Accept": "text/html"})
+            bump("taleo.requests")
+            if r.status_code != 200:
+                return None
+        except Exception:
+            return None
+        m = SECTION_RE.search(urlparse(r.url).path + "/") or SECTION_RE.search(urlparse(base_url).path + "/")
+        p = PORTAL_RE.search(r.text or "")
+        if not m or not p:
+            return None
+        site = {"section": m.group(1), "portal": p.group(1)}
+        cache_set(company, "taleo.site", site)
+        return site
+
+    def _page(self, s: requests.Session, api: str, site: Dict, term: str, page_no: int) -> Tuple[int, list, Tuple[int, int]]:
+        """One ajax search page; returns (status, requisitions, (total count, page size))."""
+        try:
+            with host_slot(api):
+                r = s.post(api, params={"lang": "en", "portal": site["portal"]}, json=_search_body(term, page_no),
+                           headers={"Accept": "application/json", "tz": "GMT-05:00"}, timeout=HTTP_TIMEOUT)
+            bump("taleo.requests")
+            vlog("[TALEO] api:", r.status_code, r.url)
+            if r.status_code != 200:
+                return r.status_code, [], (0, 0)
+            data = r.json() or {}
+        except Exception:
+            return 0, [], (0, 0)
+        paging = data.get("pagingData") or {}
+        try:
+            total = int(paging.get("totalCount") or 0)
+            size = int(paging.get("pageSize") or 0)
+        except (TypeError, ValueError):
+            total = size = 0
+        return 200, data.get("requisitionList") or [], (total, size)
+
+    def fetch(self, company, session=None) -> List[Dict]:
         out: List[Dict] = []
-        resp = session.get(company.careers_url, timeout=8)
-        resp.raise_for_status()
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for a in soup.find_all("a", href=True):
-            text = a.get_text(" ", strip=True)
-            if self._match_title(text):
-                out.append({
-                    "title": text,
-                    "apply_url": urljoin(resp.url, a["href"]),
-                    "source": "taleo",
-                    "snippet": None,
-                })
-        return out
\ No newline at end of file
+        base_url = getattr(company, "data_query_url", None) or getattr(company, "careers_url", None)
+        if not base_url or not self.handles(base_url):
+            return out
+        u = urlparse(base_url)
+        origin = f"{u.scheme or 'https'}://{u.netloc}"
+
+        s = session or requests.Session()
+        site = self._site(s, company, base_url)
+        if not site:
+            return out
+        api = f"{origin}/careersection/rest/jobboard/searchjobs"
+        detail = f"{origin}/careersection/{site['section']}/jobdetail.ftl"
+
+        def crawl(term: str) -> list:
+            status, reqs, (total, size) = self._page(s, api, site, term, 1)
+            if status in (400, 404):
+                cache_drop(company, "taleo.site")
+            if status != 200:
+                mark_partial("taleo.error", error=True)
+            if status != 200 or not reqs:
+                return reqs
+            if not size:
+                # no page size to page by: whatever the total says is past page one goes unseen
+                if total > len(reqs):
+                    mark_partial("taleo.no_paging")
+                return reqs
+            if -(-total // size) > TALEO_MAX_PAGES:
+                mark_partial("taleo.max_pages")
+            pages = range(2, min(-(-total // size), TALEO_MAX_PAGES) + 1)
+            for st, more, _ in fan_out(lambda n: self._page(s, api, site, term, n), pages):
+                if st != 200:
+                    mark_partial("taleo.error", error=True)
+                reqs.extend(more)
+            return reqs
+
+        seen = set()
+        for reqs in fan_out(crawl, TALEO_TERMS or ["data"]):
+            for it in reqs:
+                if not isinstance(it, dict):
+                    continue
+                cols = it.get("column") or []
+                # a missing column or field comes back as null; rows without a title are skipped
+                title = str((cols[0] if cols else None) or it.get("title") or "").strip()
+                contest = it.get("contestNo") or it.get("jobId")
+                if not title or not contest or not keep_title(title):
+                    continue
+                url = f"{detail}?job={contest}&lang=en"
+                if url in seen:
+                    continue
+                seen.add(url)
+                out.append(self.make_hit(title=title, url=url, company=company,
+                                         snippet=(str(cols[1]) if len(cols) > 1 else None), source="taleo-api"))
+        return out
@@ -0,0 +1,156 @@
+# jobs/scraper/titles.py
+from __future__ import annotations
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os, re, threading
+
+from .keywords import TITLE_RULES
+
+# The one title filter/classifier: scrapers use keep_title() as their
+# pre-filter, the orchestrator and the UI use classify_title().
+# All whitelist phrases are compiled into a single trie-shaped regex, so a
+# title is lowercased once and scanned once; titles that match nothing (most
+# of a board) stop there, and only matches look at the intern rule.
+
+# Results are memoized per matcher on the case-folded title ("Senior Data
+# Scientist" repeats across every board); a new taxonomy means a new matcher,
+# so its cache starts empty.
+TITLE_CACHE_SIZE = int(os.getenv("TITLE_CACHE_SIZE", "65536"))
+
+DS, DE, DA = "Data Scientist", "Data Engineer", "Data Analyst"
+
+_WS_RE = re.compile(r"\s+")
+_INTERN_RE = re.compile(r"\bintern(?:s|ship)?\b")
+
+
+def _norm(phrase: str) -> str:
+    return _WS_RE.sub(" ", (phrase or "").strip().lower())
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Alternation of phrases factored into a prefix trie (longest match first)."""
+    trie: Dict = {}
+    for p in phrases:
+        node = trie
+        for ch in p:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def emit(node: Dict) -> str:
+        end = "" in node
+        alts = []
+        for ch in sorted(k for k in node if k):
+            head = r"\s+" if ch == " " else re.escape(ch)
+            alts.append(head + emit(node[ch]))
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:%s)" % "|".join(alts)
+        if end:
+            # a complete phrase that can also be extended: try the longer one first
+            return "(?:%s)?" % body
+        return body
+
+    return emit(trie)
+
+
+def _overlapping(phrases: Sequence[str]) -> bool:
+    """True when some phrase could begin inside another one's match."""
+    for a in phrases:
+        for b in phrases:
+            for k in range(1, min(len(a), len(b))):
+                if a.endswith(b[:k]) and a != b:
+                    return True
+            if a != b and b in a[1:]:
+                return True
+    return False
+
+
+class TitleMatcher:
+    """
+    Compiled from ordered (phrase, category) rules. classify() returns the
+    category of the highest-precedence phrase found in the title (substring
+    match, any whitespace between words), or None when no phrase matches.
+    Titles with the word intern/interns/internship are Data Analyst when they
+    also say "analyst" and Data Scientist otherwise.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str]], cache_size: int = TITLE_CACHE_SIZE):
+        self.rules: List[Tuple[str, str]] = []
+        self._rank: Dict[str, int] = {}
+        for phrase, cat in rules:
+            p = _norm(phrase)
+            if p and p not in self._rank:
+                self._rank[p] = len(self.rules)
+                self.rules.append((p, cat))
+        self.phrases = [p for p, _ in self.rules]
+        self._re: Optional[re.Pattern] = None
+        if self.phrases:
+            pat = _trie_pattern(self.phrases)
+            if _overlapping(self.phrases):
+                # a phrase can start inside another: match at every position
+                pat = r"(?=(%s))" % pat
+            self._re = re.compile(pat)
+        self._cached = lru_cache(maxsize=cache_size)(self._scan) if cache_size > 0 else None
+
+    def _scan(self, t: str) -> Optional[str]:
+        found = self._re.findall(t)
+        if not found:
+            return None
+        rank = self._rank
+        best = min(rank[p] if p in rank else rank[_norm(p)] for p in found)
+        if _INTERN_RE.search(t):
+            return DA if "analyst" in t else DS
+        return self.rules[best][1]
+
+    def classify(self, title: str) -> Optional[str]:
+        if self._re is None or not title:
+            return None
+        # key: case-folded title; runs of whitespace are absorbed by the pattern itself
+        t = title.strip().lower()
+        return self._cached(t) if self._cached is not None else self._scan(t)
+
+    def cache_stats(self) -> Dict[str, float]:
+        if self._cached is None:
+            return {"hits": 0, "misses": 0, "size": 0, "hit_rate": 0.0}
+        info = self._cached.cache_info()
+        calls = info.hits + info.misses
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize,
+                "hit_rate": round(info.hits / calls, 4) if calls else 0.0}
+
+    def keep(self, title: str) -> bool:
+        return self.classify(title) is not None
+
+    def classify_many(self, titles: Iterable[str]) -> List[Optional[str]]:
+        c = self.classify
+        return [c(t) for t in titles]
+
+
+MATCHER = TitleMatcher(TITLE_RULES)
+_swap_lock = threading.Lock()
+
+
+def set_rules(rules: Sequence[Tuple[str, str]]) -> TitleMatcher:
+    """Swap in a matcher for a changed taxonomy; the old one and its cache are dropped."""
+    global MATCHER
+    new = TitleMatcher(rules)
+    with _swap_lock:
+        if new.rules != MATCHER.rules:
+            MATCHER = new
+        return MATCHER
+
+
+def cache_stats() -> Dict[str, float]:
+    return MATCHER.cache_stats()
+
+
+def classify_title(title: str) -> Optional[str]:
+    """Category for a whitelisted title, None when the title is not kept."""
+    return MATCHER.classify(title)
+
+
+def keep_title(title: str) -> bool:
+    return MATCHER.classify(title) is not None
+
+
+def classify_titles(titles: Iterable[str]) -> List[Optional[str]]:
+    return MATCHER.classify_many(titles)
@@ -4,11 +4,14 @@ from __future__ import annotations
 import os
 import json
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 import time
 import requests
 
+from .base import BaseScraper
+from .coverage import mark_partial
+
 
 US_ONLY = os.getenv("WD_US_ONLY", "1") == "1"
 
@@ -25,7 +28,9 @@ TERMS = [t.strip() for t in (os.getenv("WD_TERMS") or "data").split(",") if t.st
 SEARCH_TERMS = ["data","analytics","machine learning","ml","business intelligence"]
 TERMS_RE = re.compile(r"(data|analytics|machine learning|ml|business intelligence)", re.I)
 
-class WorkdayScraper:
+class WorkdayScraper(BaseScraper):
+    name = "workday-api"
+
     def _session(self, session: Optional[requests.Session], referer: str) -> requests.Session:
         s = session or requests.Session()
         s.headers.update({
@@ -110,15 +115,14 @@ class WorkdayScraper:
             return f"https://{host}{p}"
         return f"https://{host}/{site}{p}"
 
-    def fetch(self, company, session: Optional[requests.Session] = None) -> List[Dict]:
+    def iter_hits(self, company, session: Optional[requests.Session] = None) -> Iterator[Dict]:
         # 1) 入口：优先 data_query_url，其次 careers_url
         entry_url = getattr(company, "data_query_url", None) or (company.careers_url or "")
         try:
             api, host, site = self._build_api(entry_url)
         except Exception:
-            return []
+            return
         s = self._session(session, entry_url or f"https://{host}/{site}")
-        out: List[Dict] = []
         seen = set()
 
         limit = 20
@@ -134,6 +138,7 @@ class WorkdayScraper:
 
                     # 明确错误或临时错误重试
                     if r.status_code in (400, 404):
+                        mark_partial("workday.error", error=True)
                         break
                     if r.status_code in (502, 503, 504):
                         r = s.post(api, json=payload, timeout=TIMEOUT)
@@ -141,6 +146,7 @@ class WorkdayScraper:
                     r.raise_for_status()
                     j = r.json() or {}
                 except Exception:
+                    mark_partial("workday.error", error=True)
                     break
 
                 postings = j.get("jobPostings") or []
@@ -149,6 +155,9 @@ class WorkdayScraper:
 
                 for p in postings:
                     title = (p.get("title") or "").strip()
+                    # title first: location checks, URL building and the hit dict only for keepers
+                    if not self.accept_title(title):
+                        continue
                     loc = (p.get("locationsText") or "").strip()
                     if US_ONLY and not self._is_us(loc):
                         continue
@@ -156,16 +165,21 @@ class WorkdayScraper:
                     if not url or url in seen:
                         continue
                     seen.add(url)
-                    out.append({
+                    yield {
                         "title": title or "Data Role",
                         "apply_url": url,
                         "source": "workday-api",
                         "snippet": loc,
-                    })
+                        "location": loc,
+                    }
 
                 offset += limit
                 if len(postings) < limit:
                     break
+            else:
+                # WD_MAX_PAGES ran out before the listing did
+                mark_partial("workday.max_pages")
 
-        return out
+    def fetch(self, company, session: Optional[requests.Session] = None) -> List[Dict]:
+        return list(self.iter_hits(company, session))
 
@@ -1,30 +1,56 @@
 from __future__ import annotations
+import logging
+
 from django.utils import timezone
 from celery import shared_task
-from .models import Company, JobHit
-from .scraper import fetch_company_jobs
+from .models import Company
+from .scraper import iter_company_jobs
+from .scraper.coverage import Coverage
+from . import ingest, retention, taxonomy
+
+log = logging.getLogger(__name__)
+
+
+def _merge(c: Company, batch, now) -> bool:
+    """One bulk batch for company c; a failure is logged and reported, not raised."""
+    try:
+        ingest.merge_hits(batch, now)
+        return True
+    except Exception:
+        log.exception("bulk merge of %d hits for %s failed", len(batch), c.name)
+        return False
+
 
 @shared_task
 def run_daily_scrape():
     now = timezone.now()
     companies = Company.objects.filter(is_active=True)
+    bulk = ingest.bulk_enabled()
     for c in companies:
-        hits = fetch_company_jobs(c) or []
+        # long-lived workers pick up admin edits here (cheap, throttled version check)
+        taxonomy.refresh()
+        # hits are written as the scrapers yield them
+        seen = 0
+        batch = []
+        lost = False  # a hit or batch failed to write: it was never stamped, so no sweep
+        cov = Coverage()
+        for h in iter_company_jobs(c, coverage=cov):
+            seen += 1
+            if bulk:
+                # PostgreSQL: COPY + one merge statement per batch
+                batch.append((c.id, h))
+                if len(batch) >= ingest.INGEST_BATCH:
+                    lost |= not _merge(c, batch, now)
+                    batch = []
+                continue
+            # a hit that could not be written was never stamped: no sweep either
+            lost |= not ingest.upsert_hit(c, h, now)
+        if batch:
+            lost |= not _merge(c, batch, now)
+        # postings this run did not see are closed; an empty scrape or one that
+        # swallowed an error is treated as a failure, a partial one only gets the grace period
+        if seen and not cov.errors and not lost:
+            retention.deactivate_unseen(c, now, complete=cov.complete)
         c.last_checked_at = now
-        c.save(update_fields=["last_checked_at"])
-        for h in hits:
-            obj, created = JobHit.objects.update_or_create(
-                company=c,
-                apply_url=h.get("apply_url"),
-                defaults={
-                    "title": h.get("title") or "Data Scientist",
-                    "source": h.get("source") or "auto",
-                    "raw_snippet": h.get("snippet"),
-                    "is_active": True,
-                    "found_at": now,                        
-                    "category": (h.get("category") or None),
-                },
-            )
-            if created and not obj.first_seen_at:
-                obj.first_seen_at = now
-                obj.save(update_fields=["first_seen_at"])
\ No newline at end of file
+        c.save(update_fields=["last_checked_at", "scrape_cache"])
+    retention.archive_unseen()
@@ -0,0 +1,65 @@
+# jobs/taxonomy.py
+from __future__ import annotations
+from typing import Optional, Tuple
+import os, threading, time
+
+from jobs.scraper import keywords, titles
+
+# Loads the TaxonomyTerm table into the scraper layer. Each process compiles
+# it once; afterwards refresh() costs one aggregate query (row counts + newest
+# updated_at) at most every TAXONOMY_CHECK_SECONDS, and only a changed
+# version triggers a reload. Empty kinds fall back to the built-in lists.
+TAXONOMY_CHECK_SECONDS = float(os.getenv("TAXONOMY_CHECK_SECONDS", "60"))
+
+_lock = threading.Lock()
+_version: Optional[Tuple] = None
+_checked_at = 0.0
+
+
+def _current_version() -> Tuple:
+    from django.db.models import Count, Max, Q
+    from jobs.models import TaxonomyTerm
+
+    # the active count also catches queryset.update(is_active=...), which skips auto_now
+    agg = TaxonomyTerm.objects.aggregate(
+        n=Count("id"), active=Count("id", filter=Q(is_active=True)), ts=Max("updated_at"),
+    )
+    return agg["n"], agg["active"], agg["ts"]
+
+
+def _load() -> None:
+    from jobs.models import TaxonomyTerm
+
+    rows = list(
+        TaxonomyTerm.objects.filter(is_active=True)
+        .order_by("priority", "id")
+        .values_list("kind", "phrase", "category")
+    )
+    rules = [(p, c) for k, p, c in rows if k == TaxonomyTerm.KIND_TITLE and c]
+    search = [p for k, p, _ in rows if k == TaxonomyTerm.KIND_SEARCH]
+    hint = [p for k, p, _ in rows if k == TaxonomyTerm.KIND_HINT]
+
+    titles.set_rules(rules or keywords.TITLE_RULES)
+    keywords.set_overrides(search=search, hint=hint)
+
+
+def refresh(force: bool = False) -> bool:
+    """Reload the taxonomy if it changed since the last check; True when it did."""
+    global _version, _checked_at
+    now = time.monotonic()
+    if not force and now - _checked_at < TAXONOMY_CHECK_SECONDS:
+        return False
+    with _lock:
+        if not force and now - _checked_at < TAXONOMY_CHECK_SECONDS:
+            return False
+        _checked_at = now
+        try:
+            version = _current_version()
+            if version == _version:
+                return False
+            _load()
+        except Exception:
+            # table missing (not migrated yet) or DB hiccup: keep what we have
+            return False
+        _version = version
+        return True
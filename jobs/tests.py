@@ -1,3 +1,1245 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from datetime import timedelta
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import ingest, retention, taxonomy, views
+from jobs.models import Company, JobHit, TaxonomyTerm
+from jobs.scraper import registry, stats
+from jobs.scraper.api import _build_candidates, _race, iter_company_jobs
+from jobs.scraper.base import BaseScraper
+from jobs.scraper.coverage import Coverage, tracking
+from jobs.scraper.canonical import canonical_key
+from jobs.scraper.crosspost import posting_group, title_signature
+from jobs.scraper.endpoints import allowed_endpoint
+from jobs.scraper.generic import GENERIC_MAX_PAGES, GenericScraper
+from jobs.scraper.htmlscan import scan_html
+from jobs.scraper.icims import ICIMS_KW_PARALLEL, ICIMSScraper
+from jobs.scraper.jsonstream import iter_array_items
+from jobs.scraper.jsonwalk import load_blob, walk_json
+from jobs.scraper.keywords import KEYWORDS, TITLE_RULES, anchor_hints, search_keywords
+from jobs.scraper.lever import LeverScraper
+from jobs.scraper.oracle import ORC_PAGE_SIZE, OracleCloudScraper
+from jobs.scraper.phenom import PH_PAGE_SIZE, PhenomScraper
+from jobs.scraper.smartrecruiters import SR_PAGE_SIZE, SmartRecruitersScraper
+from jobs.scraper.pool import Cancelled, check_cancelled, fan_out
+from jobs.scraper.successfactors import SuccessFactorsScraper
+from jobs.scraper.taleo import TaleoScraper
+from jobs.scraper import titles
+from jobs.scraper.titles import DA, DE, DS, TitleMatcher, classify_title, keep_title
+
+
+class TitleMatcherTests(SimpleTestCase):
+    def test_categories(self):
+        cases = {
+            "Senior Data Scientist": DS,
+            "Sr. Machine Learning Engineer II": DE,
+            "Business Intelligence Analyst": DA,
+            "Machine Learning Analyst": DS,
+            "DATA   ENGINEER\t- Remote": DE,
+            "Software Engineer": None,
+            "Financial Analyst": None,
+            "": None,
+        }
+        for title, cat in cases.items():
+            self.assertEqual(classify_title(title), cat, title)
+            self.assertEqual(keep_title(title), cat is not None, title)
+
+    def test_earlier_rule_wins(self):
+        # "data engineer" is listed before "data scientist" and "data analyst"
+        self.assertEqual(classify_title("Data Scientist / Data Engineer"), DE)
+        self.assertEqual(classify_title("Data Analyst, Data Engineering"), DE)
+
+    def test_intern_rule_needs_the_word(self):
+        self.assertEqual(classify_title("Data Analyst Intern"), DA)
+        self.assertEqual(classify_title("Data Engineer Internship"), DS)
+        self.assertEqual(classify_title("Data Engineer, Internal Tools"), DE)
+
+    def test_overlapping_phrases_match_at_every_position(self):
+        # "science lead" starts inside "data science"; a plain scan would only see the latter
+        m = TitleMatcher([("science lead", "Lead"), ("data science", "DS")])
+        self.assertEqual(m.classify("Data Science Lead"), "Lead")
+        self.assertEqual(m.classify("Data Science Manager"), "DS")
+
+    def test_matches_a_plain_substring_scan(self):
+        ranked = [(p.lower(), cat) for p, cat in TITLE_RULES]
+
+        def reference(title):
+            t = " ".join(title.lower().split())
+            found = [cat for p, cat in ranked if p in t]
+            if not found:
+                return None
+            if {"intern", "interns", "internship"} & set(t.replace(",", " ").split()):
+                return DA if "analyst" in t else DS
+            return found[0]
+
+        titles = [f"{lvl}{role}{tail}" for lvl in ("", "Lead ", "Staff ")
+                  for role in ("Data Scientist", "ML Engineer", "BI Analyst", "Data Analytics Manager",
+                               "Applied Scientist", "Product Manager", "Data Science Intern")
+                  for tail in ("", " Intern", ", Marketing", " (Contract)")]
+        m = TitleMatcher(TITLE_RULES, cache_size=0)
+        self.assertEqual(m.classify_many(titles), [reference(t) for t in titles])
+
+
+class TitleCacheTests(SimpleTestCase):
+    def test_repeats_hit_the_cache_case_folded(self):
+        m = TitleMatcher(TITLE_RULES, cache_size=8)
+        for t in ("Data Scientist", "DATA SCIENTIST", "  data scientist ", "Cashier"):
+            m.classify(t)
+        self.assertEqual(m.cache_stats(), {"hits": 2, "misses": 2, "size": 2, "hit_rate": 0.5})
+
+    def test_cache_is_bounded(self):
+        m = TitleMatcher(TITLE_RULES, cache_size=4)
+        m.classify_many(f"Data Engineer {i}" for i in range(10))
+        self.assertEqual(m.cache_stats()["size"], 4)
+        self.assertEqual(m.classify("Data Engineer 9"), DE)
+        self.assertEqual(m.cache_stats()["hits"], 1)
+
+    def test_zero_disables_it(self):
+        m = TitleMatcher(TITLE_RULES, cache_size=0)
+        self.assertEqual(m.classify("Data Analyst"), DA)
+        self.assertEqual(m.cache_stats()["size"], 0)
+
+    def test_new_rules_start_a_new_cache(self):
+        old = titles.MATCHER
+        try:
+            self.assertIs(titles.set_rules(TITLE_RULES), old)
+            new = titles.set_rules([("analytics engineer", DE)])
+            self.assertIsNot(new, old)
+            self.assertEqual(new.cache_stats()["size"], 0)
+            self.assertEqual(classify_title("Analytics Engineer"), DE)
+            self.assertIsNone(classify_title("Data Scientist"))
+        finally:
+            titles.MATCHER = old
+
+
+class TitleSignatureTests(SimpleTestCase):
+    def test_keeps_role_text_after_a_comma(self):
+        self.assertEqual(
+            title_signature("Data Scientist, AI Platform"),
+            ["data", "scientist", "artificial", "intelligence", "platform"],
+        )
+        self.assertEqual(
+            title_signature("Senior Data Analyst, HR Analytics"),
+            ["senior", "data", "analyst", "hr", "analytics"],
+        )
+
+    def test_keeps_word_order_and_repeats(self):
+        self.assertEqual(title_signature("Data Engineer - Data Platform"), ["data", "engineer", "data", "platform"])
+        self.assertNotEqual(title_signature("Analyst, Data Engineering"), title_signature("Data Engineering Analyst"))
+
+    def test_strips_own_location_and_state_codes(self):
+        self.assertEqual(title_signature("Data Analyst - Chicago", "Chicago, IL"), ["data", "analyst"])
+        self.assertEqual(title_signature("Data Analyst - New York, NY", "New York, NY"), ["data", "analyst"])
+        self.assertEqual(title_signature("Data Analyst (TX)"), ["data", "analyst"])
+        # a city is only known as a city when the hit says so
+        self.assertEqual(title_signature("Data Analyst - Austin, TX"), ["data", "analyst", "austin"])
+
+    def test_lower_case_two_letter_words_are_not_states(self):
+        self.assertEqual(title_signature("IT Data Analyst"), ["it", "data", "analyst"])
+
+    def test_strips_requisition_ids_and_spelling_variants(self):
+        self.assertEqual(title_signature("Sr. Data Engineer (R12345)"), ["senior", "data", "engineer"])
+        self.assertEqual(title_signature("Senior Data Engineer, Req #4432"), ["senior", "data", "engineer"])
+        self.assertEqual(title_signature("Data Analyst II - Remote"), ["data", "analyst", "ii"])
+
+
+class PostingGroupTests(SimpleTestCase):
+    def test_distinct_roles_get_distinct_groups(self):
+        pairs = [
+            ("Data Scientist, AI Platform", "Data Engineer, ML Platform"),
+            ("Senior Data Analyst, HR Analytics", "Machine Learning Engineer, AI Analytics"),
+            ("Data Analyst II", "Data Analyst III"),
+        ]
+        for a, b in pairs:
+            with self.subTest(a=a, b=b):
+                self.assertNotEqual(posting_group(1, a), posting_group(1, b))
+
+    def test_cross_posts_share_a_group(self):
+        self.assertEqual(
+            posting_group(1, "Data Analyst - Chicago", "Chicago, IL"),
+            posting_group(1, "Data Analyst", "Seattle, WA"),
+        )
+        self.assertEqual(posting_group(1, "Sr. Data Engineer (R12345)"), posting_group(1, "Senior Data Engineer"))
+
+    def test_group_is_per_company(self):
+        self.assertNotEqual(posting_group(1, "Data Analyst"), posting_group(2, "Data Analyst"))
+        self.assertEqual(len(posting_group(1, "Data Analyst")), 16)
+
+
+class CanonicalKeyTests(SimpleTestCase):
+    def test_generic_sites_keep_id_like_params(self):
+        self.assertNotEqual(canonical_key("https://acme.com/job.php?ref=1234"), canonical_key("https://acme.com/job.php?ref=5678"))
+        self.assertNotEqual(canonical_key("https://acme.com/jobs?source=42"), canonical_key("https://acme.com/jobs?source=43"))
+
+    def test_campaign_and_click_ids_are_dropped_everywhere(self):
+        self.assertEqual(
+            canonical_key("https://www.acme.com/job.php?utm_source=li&ref=1234&gclid=abc&fbclid=x"),
+            canonical_key("https://acme.com/job.php?ref=1234"),
+        )
+
+    def test_ats_hosts_drop_their_source_params(self):
+        self.assertEqual(
+            canonical_key("https://jobs.lever.co/acme?lever-source=linkedin&team=data"),
+            canonical_key("https://jobs.lever.co/acme?team=data"),
+        )
+        self.assertEqual(
+            canonical_key("https://boards.greenhouse.io/acme/jobs/123?gh_src=abc"),
+            canonical_key("https://acme.com/careers?gh_jid=123&source=li"),
+        )
+
+
+class RegistryTests(SimpleTestCase):
+    def tearDown(self):
+        registry._targets.pop("broken", None)
+        registry._failed.pop("broken", None)
+
+    def test_import_failure_is_logged_once(self):
+        registry.register("broken", "jobs.scraper.no_such_module:Scraper")
+        with self.assertLogs("jobs.scraper.registry", "ERROR") as cm:
+            self.assertIsNone(registry.get("broken"))
+            self.assertIsNone(registry.get("broken"))
+        self.assertEqual(len(cm.records), 1)
+        self.assertIn("broken", cm.output[0])
+
+    def _company(self, url, **kw):
+        return SimpleNamespace(name="Acme", careers_url=url, data_query_url=None,
+                               ats="AUTO", ats_type="", scrape_cache={}, **kw)
+
+    def test_candidates_import_only_scrapers_that_can_claim(self):
+        with mock.patch.object(registry, "get", wraps=registry.get) as get:
+            cand = _build_candidates(self._company("https://boards.greenhouse.io/acme"))
+        self.assertEqual({c.args[0] for c in get.call_args_list}, {"greenhouse", "icims", "generic"})
+        self.assertEqual(type(cand[0]).__name__, "GreenhouseScraper")
+
+    def test_hints_do_not_change_candidates(self):
+        companies = [self._company(u) for u in (
+            "https://careers.acme.com/jobs",
+            "https://boards.greenhouse.io/acme",
+            "https://jobs.lever.co/acme",
+            "https://acme.wd5.myworkdayjobs.com/External",
+            "https://career5.successfactors.com/career?company=acme",
+            "https://acme.taleo.net/careersection/2/jobsearch.ftl",
+            "https://careers.acme.com/phsearch",
+            "https://acme.fa.us2.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1",
+            "https://careers.smartrecruiters.com/Acme",
+            "https://careers-acme.icims.com/jobs/search",
+        )]
+        companies += [
+            SimpleNamespace(name="Acme", careers_url="https://careers.acme.com", data_query_url=None,
+                            ats="TALEO", ats_type="lever", scrape_cache={"phenom.site": {"v": "x", "ts": 0}}),
+        ]
+        for c in companies:
+            with mock.patch.object(registry, "hints", return_value=None):
+                eager = [type(sc) for sc in _build_candidates(c)]
+            self.assertEqual([type(sc) for sc in _build_candidates(c)], eager, c.careers_url)
+
+
+class BaseScraperTests(SimpleTestCase):
+    def test_fetch_is_required(self):
+        class NoFetch(BaseScraper):
+            def iter_hits(self, company, session=None):
+                yield {}
+
+        with self.assertRaises(TypeError):
+            NoFetch()
+
+    def test_iter_hits_defaults_to_fetch(self):
+        class Listing(BaseScraper):
+            def fetch(self, company, session=None):
+                return [{"title": "Data Scientist"}]
+
+        self.assertEqual(list(Listing().iter_hits(None)), [{"title": "Data Scientist"}])
+
+
+class GenericPageUrlTests(SimpleTestCase):
+    def test_literal_braces_survive(self):
+        scan = SimpleNamespace(anchors=[("/jobs?page=2&q={x}&f[0]=1", "2"), ("/jobs?page=3&q={x}&f[0]=1", "3")])
+        urls = GenericScraper()._page_urls(scan, "https://acme.com/jobs?q={x}")
+        self.assertEqual(urls[0], "https://acme.com/jobs?page=2&q={x}&f[0]=1")
+        self.assertEqual(len(urls), GENERIC_MAX_PAGES - 1)
+        self.assertTrue(all("q={x}&f[0]=1" in u for u in urls))
+
+
+class EndpointHostTests(SimpleTestCase):
+    def test_own_domain_and_ats_hosts_only(self):
+        page = "https://careers.acme.co.uk/jobs"
+        self.assertTrue(allowed_endpoint("https://api.acme.co.uk/v1/jobs", page))
+        self.assertTrue(allowed_endpoint("https://acme.wd5.myworkdayjobs.com/wday/cxs/acme/jobs", page))
+        self.assertTrue(allowed_endpoint("https://api.smartrecruiters.com/v1/companies/acme/postings", page))
+        self.assertFalse(allowed_endpoint("https://other.co.uk/api/jobs", page))
+        self.assertFalse(allowed_endpoint("https://tracker.example.com/api/jobs", page))
+
+
+class HtmlScanTests(SimpleTestCase):
+    def test_gt_inside_quoted_attribute(self):
+        scan = scan_html('<a data-v="a>b" href="/jobs/1">Data <b>Analyst</b></a><a title=\'x>y\' href=/jobs/2>Engineer</a>')
+        self.assertEqual(scan.anchors, [("/jobs/1", "Data <b>Analyst</b>"), ("/jobs/2", "Engineer")])
+
+    def test_href_is_the_attribute_not_text_in_a_value(self):
+        scan = scan_html('<a data-href="/no" title="see href=/bad" href="/ok">x</a>')
+        self.assertEqual(scan.anchors, [("/ok", "x")])
+
+    def test_unclosed_anchor_and_scripts(self):
+        scan = scan_html('<a href="/a">A<a href="/b">B</a><script type="application/json">{"x": "<a href=\'/c\'>"}</script>')
+        self.assertEqual(scan.anchors, [("/a", "A"), ("/b", "B")])
+        self.assertEqual(scan.json_scripts, ['{"x": "<a href=\'/c\'>"}'])
+
+    def test_unterminated_tags_scan_in_linear_time(self):
+        # 20k repeats took minutes when each failed tag was rescanned to the end of the page
+        for junk in ("<a ", "<script ", '<a title="', "<a '", '<a "x" ', "<a href=x>" + "<a"):
+            started = time.perf_counter()
+            scan_html("<p>" + junk * 20000)
+            self.assertLess(time.perf_counter() - started, 1.0, junk)
+
+    def test_tag_that_never_closes_swallows_the_rest(self):
+        scan = scan_html('<a href="/a">A</a><a title="x href="/b">B</a>')
+        self.assertEqual(scan.anchors, [("/a", "A")])
+
+
+class JsonWalkTests(SimpleTestCase):
+    def test_load_blob_stops_at_the_closing_bracket(self):
+        self.assertEqual(load_blob(' {"a": [1, "};"]};window.x = {"b": 2};', 0), {"a": [1, "};"]})
+        self.assertEqual(load_blob('x = [1, 2] // tail', 4), [1, 2])
+
+    def test_load_blob_rejects_non_literals_and_oversized_input(self):
+        self.assertIsNone(load_blob("function() {}"))
+        self.assertIsNone(load_blob('{"a": undefined}'))
+        self.assertIsNone(load_blob('{"a": "' + "x" * 100 + '"}', max_len=50))
+
+    def test_walk_visits_dicts_in_document_order_and_stops_when_asked(self):
+        root = {"a": {"n": 1}, "b": [{"n": 2}, {"n": 3, "c": {"n": 4}}], "d": {"n": 5}}
+        order = []
+        walk_json(root, lambda d: order.append(d.get("n")) or d.get("n") == 4)
+        self.assertEqual(order, [None, 1, 2, 3, 4])
+
+    def test_walk_is_bounded_by_depth_and_nodes(self):
+        deep = node = {}
+        for i in range(100000):   # far past the recursion limit
+            node["c"] = node = {"i": i}
+        seen = []
+        walk_json(deep, lambda d: seen.append(d) and False, max_depth=10)
+        self.assertEqual(len(seen), 11)
+        self.assertEqual(walk_json(deep, lambda d: False, max_depth=10 ** 6, max_nodes=500), 500)
+
+    def test_later_blobs_are_not_decoded_once_max_hits_is_reached(self):
+        decoded = []
+
+        def blobs():
+            for i in range(3):
+                decoded.append(i)
+                yield {"jobs": [{"title": f"Data Analyst {i}-{j}", "url": f"/jobs/{i}-{j}"} for j in range(5)]}
+
+        hits = GenericScraper()._json_hits(blobs(), "https://acme.com/careers", [], timezone.now(), max_hits=7)
+        self.assertEqual(len(hits), 7)   # the walk stops inside the second blob; the third is never decoded
+        self.assertEqual(decoded, [0, 1])
+
+
+class _ScriptedSF(SuccessFactorsScraper):
+    """SuccessFactors scraper answering searches from a {keyword: (status, data)} script."""
+
+    def __init__(self, script):
+        self.script, self.asked = script, []
+
+    def _search(self, s, url, company, kw, timeout):
+        self.asked.append(kw)
+        return self.script.get(kw, (200, {"jobPostings": []}))
+
+
+class SuccessFactorsProbeTests(SimpleTestCase):
+    origin = "https://acme.successfactors.com"
+
+    def test_dead_origin_expires_with_the_cache_entry(self):
+        company = SimpleNamespace(scrape_cache={})
+        sf = _ScriptedSF({"data": (404, None)})
+        self.assertEqual(sf._api_search(None, self.origin, "acme", cache_owner=company), [])
+        sf._api_search(None, self.origin, "acme", cache_owner=company)
+        self.assertEqual(sf.asked, ["data"])   # second run skipped the probe
+
+        company.scrape_cache[f"successfactors.probe.{self.origin}"]["ts"] = 0
+        sf._api_search(None, self.origin, "acme", cache_owner=company)
+        self.assertEqual(sf.asked, ["data", "data"])
+
+    def test_stops_after_a_wave_without_new_postings(self):
+        job = {"jobPostings": [{"title": "Data Scientist", "jobId": 1}]}
+        sf = _ScriptedSF({"data": (200, job)})
+        with mock.patch("jobs.scraper.successfactors.SF_KW_PARALLEL", 1):
+            out = sf._api_search(None, self.origin, "acme", cache_owner=SimpleNamespace(scrape_cache={}))
+        self.assertEqual(len(out), 1)
+        self.assertEqual(len(sf.asked), 2)   # the probe, then one empty wave
+
+
+class JsonStreamTests(SimpleTestCase):
+    doc = ('{"meta": {"jobs": [0]}, "n": 12, "s": "q\\\\\\"}", '
+           '"jobs": [1.5, -2e3, "a\\"b \u00e9", {"t": "x,]"}, true, null, [1, 2], 10], "total": 8}')
+
+    def test_any_chunk_boundary_gives_the_same_items(self):
+        data, want = self.doc.encode(), json.loads(self.doc)["jobs"]
+        for i in range(len(data) + 1):
+            for j in range(i, len(data) + 1, 7):
+                self.assertEqual(list(iter_array_items([data[:i], data[i:j], data[j:]], key="jobs")), want, (i, j))
+
+    def test_number_split_inside_its_fraction(self):
+        self.assertEqual(list(iter_array_items([b"[1.", b"5, 2", b"0]"])), [1.5, 20])
+
+    def test_key_matches_only_the_top_level_member(self):
+        self.assertEqual(list(iter_array_items([b'{"a": {"jobs": [0]}, "jobs": [1]}'], key="jobs")), [1])
+        with self.assertRaises(ValueError):
+            list(iter_array_items([b'{"a": {"jobs": [0]}}'], key="jobs"))
+
+    def test_truncated_stream_raises(self):
+        data = self.doc.encode()
+        end = data.index(b', "total"')   # just past the array's closing bracket
+        for cut in range(end):
+            with self.assertRaises(ValueError, msg=cut):
+                list(iter_array_items([data[:cut]], key="jobs"))
+        self.assertEqual(len(list(iter_array_items([data[:end]], key="jobs"))), 8)
+
+    def test_malformed_input_raises(self):
+        for bad in (b"[1, 2 3]", b"[1.5.2]", b'{"error": "nope"}', b"<html>"):
+            with self.assertRaises(ValueError, msg=bad):
+                list(iter_array_items([bad]))
+
+    def test_cut_off_board_marks_the_scrape_partial(self):
+        body = json.dumps([{"text": "Data Analyst", "hostedUrl": f"https://jobs.lever.co/acme/{i}"} for i in range(3)])
+        r = mock.MagicMock(status_code=200)
+        r.__enter__.return_value = r
+        r.iter_content.return_value = [body[:-40].encode()]
+        cov = Coverage()
+        with tracking(cov):
+            hits = list(LeverScraper().iter_hits(SimpleNamespace(careers_url="https://jobs.lever.co/acme"),
+                                                 mock.Mock(get=mock.Mock(return_value=r))))
+        self.assertEqual(len(hits), 2)
+        self.assertEqual((cov.reasons, cov.errors), (["lever.error"], 1))
+
+
+class _ICIMSSession:
+    """
+    requests.Session stand-in: every search answers `status` with one posting
+    per keyword and page, `pages` pages deep; keywords in `empty` find nothing.
+    """
+
+    def __init__(self, status=200, pages=1, empty=(), delay=0):
+        self.status, self.pages, self.empty, self.delay = status, pages, set(empty), delay
+        self.headers, self.asked = {}, []
+        self.busy = self.peak = 0
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        kw, page = params["searchKeyword"], int(params["pr"])
+        with self._lock:
+            self.asked.append((kw, page))
+            self.busy += 1
+            self.peak = max(self.peak, self.busy)
+        time.sleep(self.delay)
+        with self._lock:
+            self.busy -= 1
+        html = "" if kw in self.empty else f'<a href="/jobs/{kw.replace(" ", "-")}-{page}/job">Data Analyst</a>'
+        if page < self.pages:
+            html += f'<a rel="next" href="?pr={page + 1}">Next</a>'
+        return SimpleNamespace(status_code=self.status, text=html, url=url)
+
+
+class ICIMSPlanTests(SimpleTestCase):
+    def company(self):
+        return SimpleNamespace(name="Acme", careers_url="https://careers.acme.com", data_query_url=None, scrape_cache={})
+
+    def scrape(self, company, session):
+        cov = Coverage()
+        with mock.patch("jobs.scraper.icims.requests.Session", return_value=session), tracking(cov):
+            hits = ICIMSScraper().fetch(company, None)
+        return hits, cov
+
+    def test_non_icims_company_stores_no_plan(self):
+        company = self.company()
+        for _ in range(2):
+            s = _ICIMSSession(status=404)
+            hits, cov = self.scrape(company, s)
+            self.assertEqual(hits, [])
+            self.assertTrue(cov.complete)
+            self.assertEqual(len(s.asked), len(search_keywords()))
+        self.assertNotIn("plan.icims", company.scrape_cache)
+
+    def test_stops_after_the_first_wave_with_hits_when_not_exploring(self):
+        s = _ICIMSSession()
+        with mock.patch("jobs.scraper.planner.PLAN_ENABLED", False):
+            hits, cov = self.scrape(self.company(), s)
+        self.assertEqual(len(s.asked), ICIMS_KW_PARALLEL)
+        self.assertEqual(len(hits), ICIMS_KW_PARALLEL)
+        self.assertEqual(cov.reasons, ["icims.cutoff"])
+
+    def test_exploring_run_issues_every_term(self):
+        s = _ICIMSSession()
+        company = self.company()
+        self.scrape(company, s)
+        self.assertEqual(len(s.asked), len(search_keywords()))
+        self.assertIn("plan.icims", company.scrape_cache)
+
+
+class ICIMSCrawlTests(SimpleTestCase):
+    search = "https://acme.icims.com/jobs/search?ss=1"
+
+    def test_each_page_is_fetched_and_parsed_once(self):
+        s = _ICIMSSession(pages=3)
+        hits, reqs, parses = ICIMSScraper()._crawl_keyword(s, self.search, "data analyst")
+        self.assertEqual(s.asked, [("data analyst", 1), ("data analyst", 2), ("data analyst", 3)])
+        self.assertEqual((len(hits), reqs, parses), (3, 3, 3))
+
+    def test_stops_after_the_first_wave_with_hits(self):
+        pool = search_keywords()
+        s = _ICIMSSession(empty=pool[:ICIMS_KW_PARALLEL])
+        company = SimpleNamespace(name="Acme", careers_url="https://careers.acme.com", data_query_url=None)
+        stats.reset()
+        with mock.patch("jobs.scraper.planner.PLAN_ENABLED", False), \
+                mock.patch("jobs.scraper.icims.requests.Session", return_value=s):
+            hits = ICIMSScraper().fetch(company, None)
+        self.assertEqual(len(s.asked), 2 * ICIMS_KW_PARALLEL)
+        self.assertEqual(len(hits), ICIMS_KW_PARALLEL)
+        self.assertEqual(stats.snapshot()["icims.requests"], len(s.asked))
+
+    def test_keyword_waves_share_the_host_slots(self):
+        s = _ICIMSSession(delay=0.02)
+        with mock.patch("jobs.scraper.pool.HTTP_PER_HOST", 2):
+            fan_out(lambda kw: ICIMSScraper()._crawl_keyword(s, "https://slots.icims.com/jobs/search?ss=1", kw),
+                    search_keywords()[:8], workers=8)
+        self.assertLessEqual(s.peak, 2)
+
+
+class _OracleSession:
+    """Oracle HCM stand-in: `total` requisitions on site `site`, paged by offset."""
+
+    origin = "https://acme.fa.oraclecloud.com"
+
+    def __init__(self, total, site="CX_1", report_total=True):
+        self.total, self.site, self.report_total = total, site, report_total
+        self.headers, self.asked = {}, []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None, headers=None):
+        with self._lock:
+            self.asked.append((url, (params or {}).get("offset")))
+        if "/requisitions" not in url:   # the preheat lands on the real site
+            return self.response(200, url=f"{self.origin}/hcmUI/CandidateExperience/en/sites/{self.site}/jobs")
+        if f"/sites/{self.site}/" not in url:
+            return self.response(404)
+        off = params["offset"]
+        body = {"items": [{"Id": i + 1, "Title": "Data Analyst"} for i in range(off, min(off + ORC_PAGE_SIZE, self.total))]}
+        if self.report_total:
+            body["totalResults"] = self.total
+        else:
+            body["hasMore"] = off + ORC_PAGE_SIZE < self.total
+        return self.response(200, url=url, body=body)
+
+    def response(self, status, url="", body=None):
+        return SimpleNamespace(status_code=status, url=url, text="", headers={"content-type": "application/json"},
+                               json=lambda: body, raise_for_status=lambda: None)
+
+    def preheats(self):
+        return sum(1 for url, _ in self.asked if "/requisitions" not in url)
+
+
+class OracleCrawlTests(SimpleTestCase):
+    api = "https://acme.fa.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX_1/requisitions"
+
+    def company(self, **cache):
+        return SimpleNamespace(name="Acme", data_query_url=None, scrape_cache=cache,
+                               careers_url="https://acme.fa.oraclecloud.com/hcmUI/CandidateExperience/en/sites/CX/jobs")
+
+    def scrape(self, company, s):
+        with mock.patch("jobs.scraper.oracle.requests.Session", return_value=s):
+            return OracleCloudScraper().fetch(company, None)
+
+    def test_known_total_fetches_every_page(self):
+        s = _OracleSession(2 * ORC_PAGE_SIZE + 20)
+        status, items = OracleCloudScraper()._crawl_keyword(s, self.api, "data")
+        self.assertEqual((status, len(items)), (200, 2 * ORC_PAGE_SIZE + 20))
+        self.assertEqual(sorted(off for _, off in s.asked), [0, ORC_PAGE_SIZE, 2 * ORC_PAGE_SIZE])
+
+    def test_has_more_pages_until_the_last_one(self):
+        cov = Coverage()
+        with tracking(cov):
+            status, items = OracleCloudScraper()._crawl_keyword(_OracleSession(2 * ORC_PAGE_SIZE + 20, report_total=False),
+                                                                self.api, "data")
+        self.assertEqual(len(items), 2 * ORC_PAGE_SIZE + 20)
+        self.assertTrue(cov.complete)
+
+    def test_site_id_is_preheated_once_per_company(self):
+        company = self.company()
+        s = _OracleSession(3)
+        self.assertEqual(len(self.scrape(company, s)), 3)
+        self.scrape(company, s)
+        self.assertEqual(s.preheats(), 1)
+        self.assertEqual(company.scrape_cache["oracle.site"]["v"], "CX_1")
+
+    def test_stale_site_id_gets_one_fresh_preheat(self):
+        company = self.company(**{"oracle.site": {"v": "OLD", "ts": int(time.time())}})
+        s = _OracleSession(3)
+        self.assertEqual(len(self.scrape(company, s)), 3)
+        self.assertEqual(s.preheats(), 1)
+        self.assertEqual(company.scrape_cache["oracle.site"]["v"], "CX_1")
+
+
+class _SRSession:
+    """SmartRecruiters postings API stand-in: `total` postings, pages at `failing` offsets answer 503."""
+
+    def __init__(self, total, failing=(), report_total=True):
+        self.total, self.failing, self.report_total = total, set(failing), report_total
+        self.asked = []
+
+    def get(self, url, params=None, timeout=None):
+        off = params["offset"]
+        self.asked.append((params["q"], off))
+        if off in self.failing:
+            return SimpleNamespace(status_code=503)
+        content = [{"name": "Data Analyst", "referralUrl": f"https://jobs.smartrecruiters.com/Acme/{i}"}
+                   for i in range(off, min(off + SR_PAGE_SIZE, self.total))]
+        body = {"content": content, "totalFound": self.total if self.report_total else None}
+        return SimpleNamespace(status_code=200, json=lambda: body)
+
+
+class SmartRecruitersPagingTests(SimpleTestCase):
+    company = SimpleNamespace(name="Acme", careers_url="https://careers.smartrecruiters.com/Acme")
+
+    def scrape(self, s):
+        cov = Coverage()
+        stats.reset()
+        with tracking(cov):
+            hits = SmartRecruitersScraper().fetch(self.company, s)
+        return hits, cov
+
+    def test_every_page_is_fetched(self):
+        s = _SRSession(2 * SR_PAGE_SIZE + 50)
+        hits, cov = self.scrape(s)
+        self.assertEqual(len(hits), 2 * SR_PAGE_SIZE + 50)
+        self.assertEqual(sorted(off for _, off in s.asked), [0, SR_PAGE_SIZE, 2 * SR_PAGE_SIZE])
+        self.assertTrue(cov.complete)
+        self.assertEqual(stats.snapshot()["smartrecruiters.truncation_avoided"], SR_PAGE_SIZE + 50)
+
+    def test_failed_page_is_an_error(self):
+        hits, cov = self.scrape(_SRSession(2 * SR_PAGE_SIZE, failing={SR_PAGE_SIZE}))
+        self.assertEqual(len(hits), SR_PAGE_SIZE)
+        self.assertEqual((cov.reasons, cov.errors), (["smartrecruiters.error"], 1))
+
+    def test_page_cap_and_missing_total_make_the_scrape_partial(self):
+        with mock.patch("jobs.scraper.smartrecruiters.SR_MAX_PAGES", 2):
+            hits, cov = self.scrape(_SRSession(3 * SR_PAGE_SIZE))
+        self.assertEqual(len(hits), 2 * SR_PAGE_SIZE)
+        self.assertEqual(cov.reasons, ["smartrecruiters.max_pages"])
+        hits, cov = self.scrape(_SRSession(3 * SR_PAGE_SIZE, report_total=False))
+        self.assertEqual(cov.reasons, ["smartrecruiters.no_total"])
+        self.assertEqual(cov.errors, 0)
+
+    def test_terms_are_merged_without_duplicates(self):
+        s = _SRSession(30)
+        with mock.patch("jobs.scraper.smartrecruiters.SR_TERMS", ["data", "analyst"]):
+            hits, _ = self.scrape(s)
+        self.assertEqual(len(hits), 30)
+        self.assertEqual(sorted(q for q, _ in s.asked), ["analyst", "data"])
+
+
+class _PhenomSession:
+    """Phenom search API stand-in: `total` jobs, with or without totalHits in the response."""
+
+    def __init__(self, total, report_total=True):
+        self.total, self.report_total = total, report_total
+        self.asked = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        off = params["from"]
+        with self._lock:
+            self.asked.append(off)
+        jobs = [{"title": "Data Analyst", "jobSeqNo": f"J{i}"} for i in range(off, min(off + PH_PAGE_SIZE, self.total))]
+        body = {"refineSearch": {"data": {"jobs": jobs}, "totalHits": self.total if self.report_total else 0}}
+        return SimpleNamespace(status_code=200, url=url, json=lambda: body)
+
+
+class PhenomPagingTests(SimpleTestCase):
+    def scrape(self, s):
+        company = SimpleNamespace(name="Acme", careers_url="https://careers.acme.com", data_query_url=None,
+                                  scrape_cache={"phenom.site": {"v": {"refNum": "ACME", "locale": "en_us"}, "ts": int(time.time())}})
+        cov = Coverage()
+        with tracking(cov):
+            hits = PhenomScraper().fetch(company, s)
+        return hits, cov
+
+    def test_known_total(self):
+        hits, cov = self.scrape(_PhenomSession(2 * PH_PAGE_SIZE + 5))
+        self.assertEqual(len(hits), 2 * PH_PAGE_SIZE + 5)
+        self.assertTrue(cov.complete)
+
+    def test_full_pages_without_a_total_keep_paging(self):
+        s = _PhenomSession(2 * PH_PAGE_SIZE + 5, report_total=False)
+        hits, cov = self.scrape(s)
+        self.assertEqual(len(hits), 2 * PH_PAGE_SIZE + 5)
+        self.assertTrue(cov.complete)
+
+    def test_paging_without_a_total_stops_at_the_cap(self):
+        with mock.patch("jobs.scraper.phenom.PH_MAX_PAGES", 2):
+            hits, cov = self.scrape(_PhenomSession(5 * PH_PAGE_SIZE, report_total=False))
+        self.assertEqual(len(hits), 2 * PH_PAGE_SIZE)
+        self.assertEqual(cov.reasons, ["phenom.max_pages"])
+
+
+class TaleoRowTests(SimpleTestCase):
+    company = SimpleNamespace(name="Acme", careers_url="https://acme.taleo.net/careersection/ex/jobsearch.ftl",
+                              data_query_url=None,
+                              scrape_cache={"taleo.site": {"v": {"section": "ex", "portal": "12345"}, "ts": int(time.time())}})
+
+    def scrape(self, rows, paging):
+        body = {"requisitionList": rows, "pagingData": paging}
+        s = mock.Mock(post=mock.Mock(return_value=SimpleNamespace(status_code=200, url="", json=lambda: body)))
+        cov = Coverage()
+        with tracking(cov):
+            hits = TaleoScraper().fetch(self.company, s)
+        return hits, cov
+
+    def test_rows_without_a_title_are_skipped(self):
+        rows = [
+            {"column": [None, "NY"], "contestNo": "1"},
+            {"column": [], "title": None, "contestNo": "2"},
+            {"contestNo": "3"},
+            None,
+            {"column": ["Data Analyst", "NY"], "contestNo": "4"},
+        ]
+        hits, cov = self.scrape(rows, {"totalCount": 5, "pageSize": 25})
+        self.assertEqual([h["apply_url"].split("job=")[1] for h in hits], ["4&lang=en"])
+        self.assertTrue(cov.complete)
+
+    def test_total_past_page_one_without_a_page_size_is_partial(self):
+        hits, cov = self.scrape([{"column": ["Data Analyst"], "contestNo": "1"}], {"totalCount": 40})
+        self.assertEqual(len(hits), 1)
+        self.assertEqual(cov.reasons, ["taleo.no_paging"])
+
+
+class _RaceScraper:
+    """Returns its hits once `release` is set; gives up at the first request after losing a race."""
+
+    def __init__(self, name, hits, release=None):
+        self.name, self.hits = name, hits
+        self.release = release or threading.Event()
+        if release is None:
+            self.release.set()
+        self.cancelled = False
+
+    def fetch(self, company, session):
+        while not self.release.wait(0.01):
+            try:
+                check_cancelled()
+            except Cancelled:
+                self.cancelled = True
+                return []
+        return [{"title": "Data Scientist", "apply_url": f"https://{self.name}.example.com/jobs/{i}"} for i in range(self.hits)]
+
+
+class RaceTests(SimpleTestCase):
+    company = SimpleNamespace(pk=1, name="Acme", careers_url="https://acme.example.com")
+
+    def urls(self, cands, cov=None):
+        return {h["apply_url"].split("/")[2] for h in _race(self.company, None, cands, cov or Coverage())}
+
+    def test_top_ranked_wins_even_when_slower(self):
+        slow = threading.Event()
+        top, other = _RaceScraper("top", 2, slow), _RaceScraper("other", 3)
+        threading.Timer(0.1, slow.set).start()
+        self.assertEqual(self.urls([top, other]), {"top.example.com"})
+
+    def test_lower_ranked_wins_once_higher_ones_come_back_empty(self):
+        self.assertEqual(self.urls([_RaceScraper("top", 0), _RaceScraper("other", 3)]), {"other.example.com"})
+
+    def test_top_hit_cancels_lower_ranked(self):
+        never = _RaceScraper("slow", 3, threading.Event())
+        cov = Coverage()
+        self.assertEqual(self.urls([_RaceScraper("top", 1), never], cov), {"top.example.com"})
+        self.assertTrue(never.cancelled)
+        self.assertFalse(cov.complete)   # the cancelled candidate's postings went unseen
+
+    def test_last_ranked_winner_leaves_the_scrape_complete(self):
+        cov = Coverage()
+        self.assertEqual(self.urls([_RaceScraper("top", 0), _RaceScraper("other", 3)], cov), {"other.example.com"})
+        self.assertTrue(cov.complete)
+
+
+class _FlakyScraper:
+    """Streams `n` postings, then fails the way a dropped connection would."""
+
+    def __init__(self, n):
+        self.n = n
+
+    def iter_hits(self, company, session):
+        for i in range(self.n):
+            yield {"title": "Data Analyst", "apply_url": f"https://acme.example.com/jobs/{i}"}
+        raise ConnectionError("reset by peer")
+
+
+class CoverageTests(SimpleTestCase):
+    company = SimpleNamespace(pk=1, name="Acme", careers_url="https://acme.example.com", data_query_url=None)
+
+    def scrape(self, scraper):
+        cov = Coverage()
+        with mock.patch("jobs.scraper.api._build_candidates", return_value=[scraper]):
+            hits = list(iter_company_jobs(self.company, session=object(), cascade="all", coverage=cov))
+        return hits, cov
+
+    def test_swallowed_error_makes_the_scrape_partial(self):
+        hits, cov = self.scrape(_FlakyScraper(1))
+        self.assertEqual(len(hits), 1)
+        self.assertFalse(cov.complete)
+        self.assertEqual(cov.errors, 1)
+
+    def test_planned_terms_make_the_scrape_partial(self):
+        from jobs.scraper.planner import learn_terms, plan_terms
+
+        company = SimpleNamespace(scrape_cache={})
+        learn_terms(company, "icims", ["a", "b", "c"], {"a": ["u1"], "b": ["u1"]})
+        cov = Coverage()
+        with tracking(cov):
+            terms, exploring = plan_terms(company, "icims", ["a", "b", "c"])
+        self.assertEqual((terms, exploring), (["a"], False))
+        self.assertEqual(cov.reasons, ["icims.planned"])
+
+
+class LatestViewTests(TestCase):
+    def setUp(self):
+        views._categories.clear()
+        c = Company.objects.create(name="Acme", careers_url="https://acme.example.com")
+        now = timezone.now()
+        JobHit.objects.create(company=c, title="Data Engineer", apply_url="https://acme.example.com/1",
+                              category=DE, found_at=now, first_seen_at=now)
+        JobHit.objects.create(company=c, title="Senior Data Analyst", apply_url="https://acme.example.com/2",
+                              category=None, found_at=now, first_seen_at=now)
+
+    def tearDown(self):
+        views._categories.clear()
+
+    def _distinct_queries(self, query="", changed=False):
+        with mock.patch("jobs.taxonomy.refresh", return_value=changed), \
+                CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("jobs_latest") + query)
+        self.assertEqual(resp.status_code, 200)
+        return resp, sum("DISTINCT" in q["sql"] for q in ctx.captured_queries)
+
+    def test_stored_categories_are_read_once(self):
+        _, n = self._distinct_queries()
+        self.assertEqual(n, 1)
+        resp, n = self._distinct_queries("?category=Data%20Analyst")
+        self.assertEqual(n, 0)
+        # the uncategorized row is still found and classified per row
+        self.assertEqual([r["title"] for r in resp.context["rows"]], ["Senior Data Analyst"])
+        self.assertEqual(resp.context["categories"], [DA, DE])
+
+    def test_taxonomy_change_drops_them(self):
+        self._distinct_queries()
+        _, n = self._distinct_queries(changed=True)
+        self.assertEqual(n, 1)
+
+
+class SweepTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", careers_url="https://acme.example.com")
+        self.run = timezone.now()
+        before = self.run - timedelta(days=1)
+        JobHit.objects.bulk_create([
+            JobHit(company=self.company, title="Data Analyst", apply_url=f"https://acme.example.com/jobs/{i}",
+                   canonical_key=f"k{i}", last_seen_at=self.run if i == 0 else before)
+            for i in range(10)
+        ])
+
+    def active(self):
+        return JobHit.objects.filter(company=self.company, is_active=True).count()
+
+    def test_needs_consecutive_complete_misses(self):
+        self.assertEqual(retention.deactivate_unseen(self.company, self.run, misses=2, grace_days=0), 0)
+        self.assertEqual(self.active(), 10)
+        self.assertEqual(retention.deactivate_unseen(self.company, self.run, misses=2, grace_days=0), 9)
+        self.assertEqual(self.active(), 1)
+
+    def test_partial_scrape_counts_no_miss(self):
+        for _ in range(3):
+            retention.deactivate_unseen(self.company, self.run, complete=False, misses=2, grace_days=0)
+        self.assertEqual(self.active(), 10)
+        self.assertFalse(JobHit.objects.filter(missed_runs__gt=0).exists())
+
+    def test_grace_period_applies_to_partial_scrapes(self):
+        JobHit.objects.filter(canonical_key="k1").update(last_seen_at=self.run - timedelta(days=30))
+        self.assertEqual(retention.deactivate_unseen(self.company, self.run, complete=False, grace_days=14), 1)
+        self.assertFalse(JobHit.objects.get(canonical_key="k1").is_active)
+
+
+class _OneHitScraper:
+    def iter_hits(self, company, session):
+        yield {"title": "Data Analyst", "apply_url": "https://acme.example.com/jobs/0"}
+
+
+class ScrapeSweepTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", careers_url="https://acme.example.com")
+        JobHit.objects.bulk_create([
+            JobHit(company=self.company, title="Data Analyst", apply_url=f"https://acme.example.com/jobs/{i}",
+                   canonical_key=f"https://acme.example.com/jobs/{i}", last_seen_at=timezone.now() - timedelta(days=1))
+            for i in range(10)
+        ])
+
+    def scrape(self, scraper):
+        out = StringIO()
+        with mock.patch("jobs.scraper.api._build_candidates", return_value=[scraper]):
+            call_command("run_scrape_now", "--parallel", "1", "--cascade", "all", "--archive-days", "0", stdout=out)
+        return JobHit.objects.filter(company=self.company, is_active=True).count()
+
+    def test_scrape_that_raised_deactivates_nothing(self):
+        self.assertEqual(self.scrape(_FlakyScraper(1)), 10)
+
+    def test_complete_scrapes_deactivate_after_repeated_misses(self):
+        self.assertEqual(retention.SWEEP_MISSES, 2)
+        self.assertEqual(self.scrape(_OneHitScraper()), 10)
+        self.assertEqual(self.scrape(_OneHitScraper()), 1)
+
+
+class ReclassifyJobsTests(TestCase):
+    def setUp(self):
+        acme = Company.objects.create(name="Acme", careers_url="https://acme.example.com")
+        other = Company.objects.create(name="Globex", careers_url="https://globex.example.com")
+        rows = [
+            (acme, "Senior Data Engineer", DS, True),    # wrong
+            (acme, "Data Analyst", None, True),          # never classified
+            (acme, "Analytics Engineer", DA, True),      # no longer whitelisted
+            (acme, "Data Scientist", DS, False),         # already right, inactive
+            (other, "BI Analyst", DS, True),             # wrong, other company
+        ]
+        JobHit.objects.bulk_create([
+            JobHit(company=c, title=t, apply_url=f"https://x.example.com/{i}", canonical_key=f"k{i}",
+                   category=cat, is_active=active)
+            for i, (c, t, cat, active) in enumerate(rows)
+        ])
+
+    def tearDown(self):
+        TaxonomyTerm.objects.all().delete()
+        taxonomy.refresh(force=True)
+
+    def reclassify(self, *args):
+        out = StringIO()
+        call_command("reclassify_jobs", *args, stdout=out)
+        return out.getvalue()
+
+    def categories(self):
+        return dict(JobHit.objects.values_list("title", "category"))
+
+    def test_rewrites_changed_rows_across_chunks(self):
+        self.assertIn("changed=4", self.reclassify("--chunk", "2"))
+        self.assertEqual(self.categories(), {
+            "Senior Data Engineer": DE, "Data Analyst": DA, "Analytics Engineer": "Other",
+            "Data Scientist": DS, "BI Analyst": DA,
+        })
+        self.assertIn("changed=0", self.reclassify())
+
+    def test_dry_run_writes_nothing(self):
+        before = self.categories()
+        self.assertIn("would change=4", self.reclassify("--dry-run"))
+        self.assertEqual(self.categories(), before)
+
+    def test_filters(self):
+        self.assertIn("rows=3 changed=3", self.reclassify("--company", "acme", "--only-active"))
+        self.assertEqual(self.categories()["BI Analyst"], DS)
+
+    def test_uses_the_admin_taxonomy(self):
+        TaxonomyTerm.objects.create(kind=TaxonomyTerm.KIND_TITLE, phrase="analytics engineer", category=DE)
+        self.reclassify()
+        self.assertEqual(self.categories()["Analytics Engineer"], DE)
+        self.assertEqual(self.categories()["Data Analyst"], "Other")
+
+
+class TaxonomyTests(TestCase):
+    def setUp(self):
+        taxonomy.refresh(force=True)
+
+    def tearDown(self):
+        TaxonomyTerm.objects.all().delete()
+        taxonomy.refresh(force=True)
+
+    def test_active_rows_replace_the_built_in_lists(self):
+        T = TaxonomyTerm
+        T.objects.create(kind=T.KIND_TITLE, phrase="analytics engineer", category=DE)
+        T.objects.create(kind=T.KIND_TITLE, phrase="quant researcher", category=DS, is_active=False)
+        T.objects.create(kind=T.KIND_SEARCH, phrase="analytics")
+        self.assertTrue(taxonomy.refresh(force=True))
+        self.assertEqual(classify_title("Analytics Engineer"), DE)
+        self.assertIsNone(classify_title("Quant Researcher"))
+        self.assertIsNone(classify_title("Data Scientist"))
+        self.assertEqual(search_keywords(), ["analytics"])
+        # a kind without rows keeps its built-in list
+        self.assertEqual(anchor_hints(["careers"]), ["careers"])
+
+    def test_deactivating_rows_falls_back(self):
+        TaxonomyTerm.objects.create(kind=TaxonomyTerm.KIND_SEARCH, phrase="analytics")
+        taxonomy.refresh(force=True)
+        # queryset.update() skips auto_now: the active count still changes the version
+        TaxonomyTerm.objects.update(is_active=False)
+        self.assertTrue(taxonomy.refresh(force=True))
+        self.assertEqual(search_keywords(), KEYWORDS)
+
+    def test_checks_are_throttled(self):
+        with mock.patch.object(taxonomy, "TAXONOMY_CHECK_SECONDS", 60), \
+                mock.patch("jobs.taxonomy.time.monotonic", return_value=taxonomy._checked_at + 30):
+            TaxonomyTerm.objects.create(kind=TaxonomyTerm.KIND_SEARCH, phrase="analytics")
+            with self.assertNumQueries(0):
+                self.assertFalse(taxonomy.refresh())
+        with mock.patch.object(taxonomy, "TAXONOMY_CHECK_SECONDS", 60), \
+                mock.patch("jobs.taxonomy.time.monotonic", return_value=taxonomy._checked_at + 61):
+            self.assertTrue(taxonomy.refresh())
+        self.assertEqual(search_keywords(), ["analytics"])
+
+    def test_unchanged_version_costs_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(taxonomy.refresh(force=True))
+
+
+class UpsertHitTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", careers_url="https://acme.example.com")
+        self.run = timezone.now()
+
+    def test_insert_then_update(self):
+        hit = {"title": "Data Engineer", "apply_url": "https://acme.example.com/jobs/1?src=li",
+               "canonical_key": "acme-1", "category": DE}
+        self.assertTrue(ingest.upsert_hit(self.company, hit, self.run - timedelta(days=1)))
+        first = JobHit.objects.get()
+        later = dict(hit, apply_url="https://acme.example.com/jobs/1", category=None, title="Sr. Data Engineer")
+        self.assertTrue(ingest.upsert_hit(self.company, later, self.run))
+        row = JobHit.objects.get()
+        self.assertEqual(row.apply_url, hit["apply_url"])   # the first URL seen
+        self.assertEqual(row.first_seen_at, first.first_seen_at)
+        self.assertEqual((row.title, row.category, row.last_seen_at), ("Sr. Data Engineer", DE, self.run))
+
+    def test_row_without_key_is_found_by_url(self):
+        JobHit.objects.create(company=self.company, title="Data Analyst", apply_url="https://acme.example.com/jobs/2",
+                              is_active=False, missed_runs=2)
+        self.assertTrue(ingest.upsert_hit(self.company, {"title": "Data Analyst",
+                                                         "apply_url": "https://acme.example.com/jobs/2"}, self.run))
+        row = JobHit.objects.get()
+        self.assertEqual((row.canonical_key, row.is_active, row.missed_runs),
+                         (canonical_key("https://acme.example.com/jobs/2"), True, 0))
+
+    def test_locked_database_is_retried(self):
+        with mock.patch.object(JobHit.objects, "create", side_effect=[OperationalError("locked"), None]) as create, \
+                mock.patch("jobs.ingest.time.sleep") as sleep:
+            self.assertTrue(ingest.upsert_hit(self.company, {"apply_url": "https://acme.example.com/jobs/3"}, self.run))
+        self.assertEqual(create.call_count, 2)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_celery_task_writes_through_it(self):
+        from jobs.tasks import run_daily_scrape
+
+        with mock.patch("jobs.scraper.api._build_candidates", return_value=[_OneHitScraper()]), \
+                mock.patch("jobs.ingest.upsert_hit", wraps=ingest.upsert_hit) as upsert:
+            run_daily_scrape()
+        self.assertEqual(upsert.call_count, 1)
+        self.assertEqual(JobHit.objects.get().apply_url, "https://acme.example.com/jobs/0")
+
+
+@skipUnless(connection.vendor == "postgresql", "the bulk merge runs on PostgreSQL only")
+class MergeHitsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Acme", careers_url="https://acme.example.com")
+        self.then = timezone.now() - timedelta(days=1)
+
+    def merge(self, *hits):
+        return ingest.merge_hits([(self.company.id, h) for h in hits], timezone.now())
+
+    def test_inserts_then_updates(self):
+        hit = {"title": "Data Analyst", "apply_url": "https://acme.example.com/jobs/1"}
+        self.assertEqual(self.merge(hit), (1, 0))
+        JobHit.objects.update(last_seen_at=self.then, missed_runs=1)
+        self.assertEqual(self.merge(dict(hit, title="Senior Data Analyst")), (0, 1))
+        row = JobHit.objects.get()
+        self.assertEqual(row.title, "Senior Data Analyst")
+        self.assertEqual(row.missed_runs, 0)
+        self.assertGreater(row.last_seen_at, self.then)
+
+    def test_stamps_the_row_holding_the_url_under_another_key(self):
+        JobHit.objects.bulk_create([
+            JobHit(company=self.company, title="Data Analyst", apply_url="https://acme.example.com/jobs/1",
+                   canonical_key="k", last_seen_at=self.then, missed_runs=1),
+            JobHit(company=self.company, title="Data Analyst", apply_url="https://acme.example.com/jobs/1?old",
+                   canonical_key="u", last_seen_at=self.then, missed_runs=1),
+        ])
+        self.assertEqual(self.merge({"title": "Data Analyst", "apply_url": "https://acme.example.com/jobs/1?old",
+                                     "canonical_key": "k"}), (0, 1))
+        for row in JobHit.objects.all():
+            self.assertEqual(row.missed_runs, 0)
+            self.assertGreater(row.last_seen_at, self.then)
+
+    def test_keyless_row_is_found_by_url(self):
+        JobHit.objects.create(company=self.company, title="Data Analyst", apply_url="https://acme.example.com/jobs/1")
+        self.assertEqual(self.merge({"title": "Data Analyst", "apply_url": "https://acme.example.com/jobs/1"}), (0, 1))
+        self.assertEqual(JobHit.objects.get().canonical_key, canonical_key("https://acme.example.com/jobs/1"))
+
+    def test_one_row_per_key_in_a_batch(self):
+        a = {"title": "Data Analyst", "apply_url": "https://acme.example.com/jobs/1?src=a", "canonical_key": "k"}
+        b = dict(a, apply_url="https://acme.example.com/jobs/1?src=b")
+        self.assertEqual(self.merge(a, b), (1, 0))
+        self.assertEqual(JobHit.objects.count(), 1)
+
+    def test_run_scrape_now_writes_through_it(self):
+        JobHit.objects.bulk_create([
+            JobHit(company=self.company, title="Data Analyst", apply_url=f"https://acme.example.com/jobs/{i}",
+                   canonical_key=f"https://acme.example.com/jobs/{i}", last_seen_at=self.then)
+            for i in range(10)
+        ])
+        with mock.patch.object(ingest, "PG_BULK_INGEST", True), \
+                mock.patch("jobs.ingest.merge_hits", wraps=ingest.merge_hits) as merge, \
+                mock.patch("jobs.scraper.api._build_candidates", return_value=[_OneHitScraper()]):
+            for _ in range(retention.SWEEP_MISSES):
+                call_command("run_scrape_now", "--parallel", "1", "--cascade", "all", "--archive-days", "0",
+                             stdout=StringIO())
+        self.assertEqual(merge.call_count, retention.SWEEP_MISSES)
+        self.assertEqual(list(JobHit.objects.filter(is_active=True).values_list("apply_url", flat=True)),
+                         ["https://acme.example.com/jobs/0"])
+
+
+class _MigrationStepTest(TransactionTestCase):
+    """Applies one request's migration on top of rows written through the historical models."""
+
+    before = after = None
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("jobs", target)])
+        return executor.loader.project_state([("jobs", target)]).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def seed(self, apps, n=2, **fields):
+        """A company with n hits, written through the models of apps."""
+        c = apps.get_model("jobs", "Company").objects.create(name="Acme", careers_url="https://acme.example.com")
+        Hit = apps.get_model("jobs", "JobHit")
+        for i in range(n):
+            Hit.objects.create(company=c, title="Data Engineer", apply_url=f"https://acme.example.com/jobs/{i}", **fields)
+        return c
+
+
+class ScrapeCacheMigrationTests(_MigrationStepTest):
+    before, after = "0001_initial", "0002_company_scrape_cache"
+
+    def test_existing_companies_start_with_an_empty_cache(self):
+        old = self.migrate(self.before)
+        old.get_model("jobs", "Company").objects.create(name="Acme", careers_url="https://acme.example.com")
+        new = self.migrate(self.after)
+        self.assertEqual(new.get_model("jobs", "Company").objects.get().scrape_cache, {})
+        self.migrate(self.before)
+        self.assertTrue(old.get_model("jobs", "Company").objects.filter(name="Acme").exists())
+
+
+class TaxonomyTermMigrationTests(_MigrationStepTest):
+    before, after = "0002_company_scrape_cache", "0003_taxonomyterm"
+
+    def test_table_comes_and_goes(self):
+        self.migrate(self.before)
+        self.assertNotIn("jobs_taxonomyterm", connection.introspection.table_names())
+        new = self.migrate(self.after)
+        Term = new.get_model("jobs", "TaxonomyTerm")
+        Term.objects.create(kind="title", phrase="data scientist", category="Data Scientist")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Term.objects.create(kind="title", phrase="data scientist", category="Data Engineer")
+        Term.objects.create(kind="search", phrase="data scientist")
+        self.migrate(self.before)
+        self.assertNotIn("jobs_taxonomyterm", connection.introspection.table_names())
+
+
+class CanonicalKeyMigrationTests(_MigrationStepTest):
+    before, after = "0003_taxonomyterm", "0004_jobhit_canonical_key"
+
+    def test_existing_rows_keep_a_null_key(self):
+        self.seed(self.migrate(self.before))
+        new = self.migrate(self.after)
+        Hit = new.get_model("jobs", "JobHit")
+        # NULL keys never collide, so the constraint goes on over any number of old rows
+        self.assertEqual(list(Hit.objects.values_list("canonical_key", flat=True)), [None, None])
+        first, second = Hit.objects.order_by("pk")
+        first.canonical_key = "acme-1"
+        first.save()
+        second.canonical_key = "acme-1"
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            second.save()
+        old = self.migrate(self.before)
+        self.assertEqual(old.get_model("jobs", "JobHit").objects.count(), 2)
+
+
+class PostingGroupMigrationTests(_MigrationStepTest):
+    before, after = "0004_jobhit_canonical_key", "0005_jobhit_posting_group"
+
+    def indexed(self):
+        with connection.cursor() as cur:
+            found = connection.introspection.get_constraints(cur, "jobs_jobhit")
+        return any(c["index"] and c["columns"] == ["posting_group"] for c in found.values())
+
+    def test_existing_rows_are_ungrouped(self):
+        self.seed(self.migrate(self.before))
+        new = self.migrate(self.after)
+        Hit = new.get_model("jobs", "JobHit")
+        # NULL groups are shown one row each by the latest view, as before
+        self.assertEqual(list(Hit.objects.values_list("posting_group", flat=True)), [None, None])
+        self.assertTrue(self.indexed())
+        Hit.objects.update(posting_group="0123456789abcdef")
+        self.assertEqual(Hit.objects.filter(posting_group="0123456789abcdef").count(), 2)
+        old = self.migrate(self.before)
+        self.assertFalse(self.indexed())
+        self.assertEqual(old.get_model("jobs", "JobHit").objects.count(), 2)
+
+
+class LastSeenArchiveMigrationTests(_MigrationStepTest):
+    before, after = "0005_jobhit_posting_group", "0006_jobhit_last_seen_at_archive"
+
+    def test_existing_rows_were_never_stamped(self):
+        self.seed(self.migrate(self.before))
+        new = self.migrate(self.after)
+        Hit = new.get_model("jobs", "JobHit")
+        # retention falls back to found_at for rows without last_seen_at
+        self.assertEqual(list(Hit.objects.values_list("last_seen_at", flat=True)), [None, None])
+        hit = Hit.objects.order_by("pk").first()
+        new.get_model("jobs", "JobHitArchive").objects.create(
+            hit_id=hit.pk, company_id=hit.company_id, title=hit.title, apply_url=hit.apply_url)
+        old = self.migrate(self.before)
+        self.assertNotIn("jobs_jobhitarchive", connection.introspection.table_names())
+        self.assertEqual(old.get_model("jobs", "JobHit").objects.count(), 2)
+
+
+class MissedRunsMigrationTests(_MigrationStepTest):
+    before, after = "0008_jobhit_query_indexes", "0009_jobhit_missed_runs"
+
+    def test_existing_rows_start_with_no_misses(self):
+        self.seed(self.migrate(self.before))
+        new = self.migrate(self.after)
+        self.assertEqual(list(new.get_model("jobs", "JobHit").objects.values_list("missed_runs", flat=True)), [0, 0])
+        old = self.migrate(self.before)
+        self.assertEqual(old.get_model("jobs", "JobHit").objects.count(), 2)
+
+
+class CategoryLengthMigrationTests(_MigrationStepTest):
+    before, after = "0006_jobhit_last_seen_at_archive", "0007_category_max_length"
+
+    def test_long_category_names_fit(self):
+        self.seed(self.migrate(self.before), category="DS")
+        new = self.migrate(self.after)
+        Hit = new.get_model("jobs", "JobHit")
+        self.assertEqual(set(Hit.objects.values_list("category", flat=True)), {"DS"})
+        Hit.objects.update(category="Data Scientist")   # longer than the old 10 characters
+        self.assertEqual(Hit.objects.filter(category="Data Scientist").count(), 2)
+        # back to 10 characters: PostgreSQL refuses to truncate, so only short values can go back
+        Hit.objects.update(category="DS")
+        old = self.migrate(self.before)
+        self.assertEqual(old.get_model("jobs", "JobHit").objects.count(), 2)
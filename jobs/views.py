@@ -1,7 +1,6 @@
 # jobs/views.py
 from __future__ import annotations
-import os
-import re
+import os, threading, time
 
 from datetime import timedelta
 from typing import Optional, Tuple
@@ -13,6 +12,9 @@ from django.http import Http404
 from django.shortcuts import redirect, render
 from django.utils import timezone
 
+from jobs import taxonomy
+from jobs.scraper.titles import classify_title
+
 PAGE_SIZES = [50, 100, 200]
 DAY_OPTIONS = [1, 3, 7, 14, 30]
 
@@ -85,21 +87,37 @@ def _pick_job_model() -> Tuple[object, dict]:
         raise Http404("No job model found")
     return best, best_map
 
-# 分类规则（与抓取侧白名单一致）
-_rule_ds = re.compile(r"\b(data\s+scientist(s)?|(applied|ml)\s+scientist|machine\s+learning(\s+analyst)?)\b", re.I)
-_rule_de = re.compile(r"\bdata\s+engineer(s)?\b", re.I)
-_rule_da = re.compile(r"\b(data\s+analyst(s)?|data\s+analytics|data\s+science\s+analyst|data\s+analyst\s+intern(s)?)\b", re.I)
+NEW_BADGE_HOURS = int(os.getenv("NEW_BADGE_HOURS", "24"))
 
-def classify(title: str) -> str:
-    t = title or ""
-    if _rule_ds.search(t): return "Data Scientist"
-    if _rule_de.search(t): return "Data Engineer"
-    if _rule_da.search(t): return "Data Analyst"
-    return "Other"
+# Distinct stored categories of the active rows, for the category menu and to
+# know whether uncategorized rows exist. Shared by all requests of a process
+# and re-read every CATEGORY_CACHE_SECONDS or when the taxonomy changes;
+# new rows are categorized at write time, so staleness only delays a new
+# category showing up in the menu.
+CATEGORY_CACHE_SECONDS = float(os.getenv("CATEGORY_CACHE_SECONDS", "300"))
+
+_categories_lock = threading.Lock()
+_categories: dict = {}   # (model label, field) -> (read at, set of values)
+
+
+def _stored_categories(M, field: str) -> set:
+    key = (M._meta.label, field)
+    now = time.monotonic()
+    hit = _categories.get(key)
+    if hit and now - hit[0] < CATEGORY_CACHE_SECONDS:
+        return hit[1]
+    qs = M.objects.all()
+    if "is_active" in _field_names(M):
+        qs = qs.filter(is_active=True)
+    cats = set(qs.order_by().values_list(field, flat=True).distinct())
+    with _categories_lock:
+        _categories[key] = (now, cats)
+    return cats
 
-NEW_BADGE_HOURS = int(os.getenv("NEW_BADGE_HOURS", "24"))
 
 def latest(request):
+    if taxonomy.refresh():
+        _categories.clear()
 
     PAGE_SIZES = [50, 100, 200]
     DAY_OPTIONS = [1, 3, 7, 14, 30]
@@ -113,6 +131,8 @@ def latest(request):
     except ValueError:
         days = 1
     category = request.GET.get("category", "All")
+    # cross-postings (same role, other city / requisition) collapse into one row unless group=0
+    grouped = request.GET.get("group", "1") != "0"
 
     M, m = _pick_job_model()
     title_f = m["title"]
@@ -121,19 +141,46 @@ def latest(request):
     company_fk = m.get("company_fk")     # e.g. 'company'
     company_name_f = m.get("company_name")
     category_f = m.get("category")
+    group_f = "posting_group" if grouped and "posting_group" in _field_names(M) else None
 
   
     qs = M.objects.all()
+    # closed postings are switched off at the end of each company's scrape
+    if "is_active" in _field_names(M):
+        qs = qs.filter(is_active=True)
     if days > 0:
         since = timezone.now() - timedelta(days=days)
         qs = qs.filter(**{f"{created_f}__gte": since})
 
+    # category filter in the WHERE clause, so the (category, found_at) index serves it;
+    # rows without a stored category (never reclassified) are classified per row below
+    # and only pulled in when there are any
+    filtered = bool(category and category.lower() != "all")
+    db_cats = None
+    if category_f:
+        db_cats = _stored_categories(M, category_f)
+        if filtered:
+            cond = Q(**{category_f: category})
+            if None in db_cats or "" in db_cats:
+                cond |= Q(**{f"{category_f}__isnull": True}) | Q(**{category_f: ""})
+            qs = qs.filter(cond)
+
+    # only the columns the loop below reads; the company join would otherwise
+    # drag every Company column (scrape_cache included) into each row
+    names = _field_names(M)
+    cols = [f for f in (title_f, url_f, created_f, category_f, group_f, "first_seen_at") if f and f in names]
     if company_fk:
         qs = qs.select_related(company_fk)
+        cols.append(company_fk)
+        related = M._meta.get_field(company_fk).related_model
+        if related is not None and "name" in _field_names(related):
+            cols.append(f"{company_fk}__name")
+    qs = qs.only(*cols)
 
     qs = qs.order_by(f"-{created_f}")
 
     rows = []
+    groups = {}  # posting_group -> row already emitted (the newest copy)
     now = timezone.now()
     new_cutoff = now - timedelta(hours=NEW_BADGE_HOURS)
 
@@ -162,25 +209,40 @@ def latest(request):
         if not cat and hasattr(obj, "category"):
             cat = getattr(obj, "category")
         if not cat:
-            cat = infer_category(title)
+            cat = classify_title(title)
 
         # found / first_seen
         found = getattr(obj, created_f, None)
         first_seen = getattr(obj, "first_seen_at", None)
         is_new = bool(first_seen and first_seen >= new_cutoff)
 
-        rows.append({
+        # the group key was computed at write time, so this is one dict lookup per row
+        group = getattr(obj, group_f, None) if group_f else None
+        if group and group in groups:
+            head = groups[group]
+            head["copies"] += 1
+            head["is_new"] = head["is_new"] or is_new
+            continue
+
+        row = {
             "company": company or "",
             "title": title or "",
             "url": url or "",
             "found": found,
             "cat": cat or "Other",
-            "is_new": is_new,  
-        })
+            "is_new": is_new,
+            "copies": 1,
+        }
+        if group:
+            groups[group] = row
+        rows.append(row)
 
  
-    categories = sorted({r["cat"] for r in rows if r.get("cat")})
-    if category and category.lower() != "all":
+    categories = {r["cat"] for r in rows if r.get("cat")}
+    if db_cats:
+        categories |= db_cats - {None, ""}
+    categories = sorted(categories)
+    if filtered:
         rows = [r for r in rows if r.get("cat") == category]
 
 
@@ -199,6 +261,7 @@ def latest(request):
         "day_options": DAY_OPTIONS,
         "today": timezone.localdate(),
         "new_badge_hours": NEW_BADGE_HOURS,
+        "grouped": grouped,
     }
     return render(request, "jobs/latest.html", ctx)
 